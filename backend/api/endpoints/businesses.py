@@ -2,6 +2,9 @@ from fastapi import APIRouter, HTTPException, Query
 from typing import List, Optional
 from models.schemas import BusinessData, ExportRequest, ExportMode, JobStats
 from models.database import database
+from services.reextraction_service import reextraction_service
+from services.enrichment_service import enrichment_service
+from services.freshness_service import freshness_service
 from bson.objectid import ObjectId
 import logging
 import json
@@ -387,6 +390,89 @@ async def mark_businesses_exported(export_request: ExportRequest):
         logger.error(f"Error marking businesses as exported: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/reextract")
+async def start_reextraction(
+    domain: str = Query(..., description="Domain whose archived pages should be re-parsed"),
+    fields: Optional[List[str]] = Query(None, description="Only update these fields (default: all)"),
+    processes: Optional[int] = Query(None, description="Worker processes (default: all cores)")
+):
+    """Re-extract businesses from the raw HTML archive without re-crawling"""
+    try:
+        run_id = await reextraction_service.start_run(domain, fields, processes)
+        return {"run_id": run_id, "message": "Re-extraction started"}
+    except Exception as e:
+        logger.error(f"Error starting re-extraction for {domain}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/reextract/{run_id}")
+async def get_reextraction_status(run_id: str):
+    """Get progress of a re-extraction run"""
+    try:
+        run = await reextraction_service.get_run(run_id)
+        if not run:
+            raise HTTPException(status_code=404, detail="Re-extraction run not found")
+        run["_id"] = str(run["_id"])
+        return run
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting re-extraction run {run_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/enrich")
+async def start_enrichment(
+    domain: str = Query(..., description="Domain whose listing-only businesses should get their detail pages")
+):
+    """Fetch detail pages of businesses saved from listing cards, at low priority"""
+    try:
+        run_id = await enrichment_service.start_run(domain)
+        return {"run_id": run_id, "message": "Enrichment started"}
+    except Exception as e:
+        logger.error(f"Error starting enrichment for {domain}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/enrich/{run_id}")
+async def get_enrichment_status(run_id: str):
+    """Get progress of an enrichment run"""
+    try:
+        run = await enrichment_service.get_run(run_id)
+        if not run:
+            raise HTTPException(status_code=404, detail="Enrichment run not found")
+        run["_id"] = str(run["_id"])
+        return run
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting enrichment run {run_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/revisit")
+async def start_freshness_run(
+    domain: str = Query(..., description="Domain whose due businesses should be revisited")
+):
+    """Re-scrape businesses due for a revisit and update the ones that changed, at low priority"""
+    try:
+        run_id = await freshness_service.start_run(domain)
+        return {"run_id": run_id, "message": "Freshness run started"}
+    except Exception as e:
+        logger.error(f"Error starting freshness run for {domain}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/revisit/{run_id}")
+async def get_freshness_status(run_id: str):
+    """Get progress of a freshness run"""
+    try:
+        run = await freshness_service.get_run(run_id)
+        if not run:
+            raise HTTPException(status_code=404, detail="Freshness run not found")
+        run["_id"] = str(run["_id"])
+        return run
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting freshness run {run_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/export/enhanced")
 async def export_businesses_enhanced(
     sort_by: Optional[str] = Query("country", description="Sort by: country, region, city, domain"),
@@ -3,6 +3,10 @@ from typing import List, Optional
 from models.schemas import ScrapingJobCreate, ScrapingJob, DashboardStats
 from services.scraping_service import scraping_service
 from services.job_seeding_service import job_seeding_service
+from scrapers.http_client import http_client_manager
+from scrapers.html_archive import html_archive
+from scrapers.parse_pool import parse_pool
+from utils.loop_monitor import loop_monitor
 from models.database import database
 from datetime import datetime, timedelta
 import logging
@@ -82,6 +86,21 @@ async def force_start_scraping_job(job_id: str):
         logger.error(f"Error force starting job {job_id}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/jobs/{job_id}/refresh")
+async def refresh_scraping_job(job_id: str, incremental: bool = Query(True, description="Stop paging cities once nothing new shows up")):
+    """Crawl a finished job again, by default incrementally"""
+    try:
+        success = await scraping_service.refresh_job(job_id, incremental)
+        if success:
+            return {"message": "Job refresh started"}
+        else:
+            raise HTTPException(status_code=400, detail="Job not found or not finished")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error refreshing job {job_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/jobs/{job_id}/pause")
 async def pause_scraping_job(job_id: str):
     """Pause a running job"""
@@ -137,6 +156,59 @@ async def get_job_status(job_id: str):
         logger.error(f"Error getting job status {job_id}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/jobs/{job_id}/throughput")
+async def get_job_throughput(job_id: str, minutes: int = Query(60, ge=1, le=1440)):
+    """Get per-minute throughput history of a job for charting"""
+    try:
+        return await scraping_service.get_job_throughput(job_id, minutes)
+    except Exception as e:
+        logger.error(f"Error getting throughput for job {job_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/http-clients")
+async def get_http_client_stats():
+    """Get connection reuse and handshake metrics for the shared HTTP client pool"""
+    try:
+        return {"hosts": http_client_manager.get_stats()}
+    except Exception as e:
+        logger.error(f"Error getting HTTP client stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/event-loop")
+async def get_event_loop_stats():
+    """Get event loop blocking time and HTML parse pool usage"""
+    try:
+        return {"event_loop": loop_monitor.get_stats(), "parse_pool": parse_pool.get_stats()}
+    except Exception as e:
+        logger.error(f"Error getting event loop stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/archive/page")
+async def get_archived_page(
+    url: str = Query(..., description="Page URL"),
+    at: Optional[datetime] = Query(None, description="Crawl time; latest version at or before it")
+):
+    """Get a page from the raw HTML archive"""
+    try:
+        page = await html_archive.get_page(url, at)
+        if not page:
+            raise HTTPException(status_code=404, detail="Page not archived")
+        return page
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error reading archived page {url}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/archive/stats")
+async def get_archive_stats():
+    """Get raw vs stored size of the HTML archive per host"""
+    try:
+        return {"hosts": await html_archive.get_stats()}
+    except Exception as e:
+        logger.error(f"Error getting archive stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/jobs", response_model=List[dict])
 async def list_scraping_jobs(skip: int = 0, limit: int = 20):
     """List all scraping jobs"""
@@ -439,6 +511,28 @@ async def resume_all_jobs():
         logger.error(f"Error resuming all jobs: {e}")
         raise HTTPException(status_code=500, detail="Failed to resume jobs")
 
+@router.post("/jobs/refresh-completed")
+async def refresh_completed_jobs(incremental: bool = Query(True, description="Stop paging cities once nothing new shows up")):
+    """Refresh every completed job, by default incrementally"""
+    try:
+        db = database.get_database()
+        jobs_collection = db.scraping_jobs
+        
+        refreshed = 0
+        async for job in jobs_collection.find({"status": "completed"}, {"_id": 1}):
+            if await scraping_service.refresh_job(str(job["_id"]), incremental):
+                refreshed += 1
+        
+        logger.info(f"Refreshing {refreshed} completed jobs")
+        return {
+            "message": f"Successfully started refreshing {refreshed} completed jobs",
+            "refreshed_count": refreshed
+        }
+        
+    except Exception as e:
+        logger.error(f"Error refreshing completed jobs: {e}")
+        raise HTTPException(status_code=500, detail="Failed to refresh jobs")
+
 @router.post("/jobs/resume-network-paused")
 async def resume_network_paused_jobs():
     """Resume only jobs that were paused due to network issues"""
@@ -633,16 +727,19 @@ async def update_job_settings(
         if not update_data:
             raise HTTPException(status_code=400, detail="No valid settings provided")
         
-        # Update the job
+        # Update the job; settings_updated_at tells scraper workers to apply it
         result = await jobs_collection.update_one(
             {"_id": ObjectId(job_id)},
-            {"$set": update_data}
+            {"$set": {**update_data, "settings_updated_at": datetime.utcnow()}}
         )
         
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Job not found")
         
-        return {"message": "Job settings updated successfully"}
+        # Jobs running in this process pick the change up through their control channel
+        applied = scraping_service.update_job_settings(job_id, update_data)
+        
+        return {"message": "Job settings updated successfully", "applied_to_running_job": applied}
         
     except HTTPException:
         raise
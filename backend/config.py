@@ -22,10 +22,129 @@ class Settings(BaseSettings):
     ]
     
     # Concurrency
-    MAX_CONCURRENT_SCRAPERS: int = 5
-    MAX_CONCURRENT_REQUESTS: int = 10
+    MAX_CONCURRENT_SCRAPERS: int = 5  # listing pages fetched at once per domain (pages of one city once sharded)
+    MAX_CONCURRENT_REQUESTS: int = 50  # global request budget shared by all jobs
+    MAX_REQUESTS_PER_HOST: int = 8  # politeness cap on in-flight requests per host
+    
+    # Scraper workers: "embedded" runs jobs in the API process, "worker" leaves
+    # them to `python -m workers.scraper` processes
+    SCRAPER_MODE: str = "embedded"
+    WORKER_JOBS_PER_PROCESS: int = 4
+    WORKER_POLL_INTERVAL: float = 2.0  # seconds between claims / control intent checks
+    # Request limits (MAX_CONCURRENT_REQUESTS, MAX_REQUESTS_PER_HOST, host rates) hold
+    # for all worker processes together: each process gets 1/WORKER_PROCESS_COUNT of
+    # the concurrency, and host rates are shared through Redis or divided the same way
+    WORKER_PROCESS_COUNT: int = 0  # worker processes of the whole deployment; 0 = --processes of this host
+    WORKER_RATE_BACKEND: str = "auto"  # "redis" shares host rate tokens via REDIS_URL, "local" divides them, "auto" = redis if reachable
+    
+    # Job leases: running jobs heartbeat their lease; expired ones are taken over
+    JOB_LEASE_SECONDS: int = 90
+    JOB_HEARTBEAT_INTERVAL: float = 20.0
+    JOB_TAKEOVER_STAGGER: float = 10.0  # seconds between resuming stuck jobs
     REQUEST_DELAY: float = 1.0
     
+    # Adaptive per-host rate control (requests/second)
+    RATE_MIN_PER_HOST: float = 0.2
+    RATE_MAX_PER_HOST: float = 20.0
+    RATE_BURST: float = 2.0
+    RATE_ADDITIVE_INCREASE: float = 0.05
+    RATE_DECREASE_FACTOR: float = 0.5
+    RATE_DECREASE_COOLDOWN: float = 2.0
+    RATE_LATENCY_SPIKE_FACTOR: float = 3.0
+    RATE_LATENCY_SPIKE_MIN: float = 2.0
+    RATE_ERROR_WINDOW: int = 100
+    RATE_MAX_RETRY_AFTER: float = 600.0
+    RATE_THROTTLE_RETRIES: int = 3
+    
+    # Shared HTTP client pool
+    HTTP_LIMIT_PER_HOST: int = 32
+    HTTP_DNS_CACHE_TTL: int = 600
+    HTTP_KEEPALIVE_TIMEOUT: float = 60.0
+    HTTP_REQUEST_TIMEOUT: float = 30.0
+    HTTP2_HOSTS: List[str] = []  # Hosts to fetch over HTTP/2 (requires the h2 package)
+    
+    # Raw HTML archive (zstd-compressed WARC segments)
+    HTML_ARCHIVE_ENABLED: bool = True
+    HTML_ARCHIVE_DIR: str = "data/html_archive"
+    HTML_ARCHIVE_LEVEL: int = 10
+    HTML_ARCHIVE_DICT_SAMPLES: int = 200
+    HTML_ARCHIVE_DICT_SIZE: int = 112640
+    HTML_ARCHIVE_FLUSH_RECORDS: int = 200
+    HTML_ARCHIVE_FLUSH_BYTES: int = 8 * 1024 * 1024
+    
+    # HTML parsing off the event loop
+    PARSE_IN_PROCESS_POOL: bool = True
+    PARSE_POOL_WORKERS: int = 0  # 0 = one process per core
+    PARSER_BACKEND: str = "lxml"  # "lxml" (falls back to BeautifulSoup per page) or "bs4"
+    EXTRACTION_PLAN_WARMUP: int = 20  # pages before a field's winning selector is tried first
+    EXTRACTION_PLAN_REVALIDATE: int = 200  # run the full selector chain every N pages
+    LISTING_FAST_SCAN: bool = True  # scan listing pages for links without building a DOM
+    LISTING_SCAN_CHUNK_SIZE: int = 16384
+    
+    # Write-behind buffer for scraped businesses
+    BUSINESS_WRITE_BATCH_SIZE: int = 100
+    BUSINESS_WRITE_FLUSH_INTERVAL: float = 2.0
+    
+    # Coalesced job progress checkpoints
+    PROGRESS_CHECKPOINT_INTERVAL: float = 5.0
+    PROGRESS_CHECKPOINT_PAGES: int = 50
+    PROGRESS_RETENTION_DAYS: int = 30  # per-minute throughput buckets expire after this
+    JOB_STOP_TIMEOUT: float = 15.0  # grace period for a job to checkpoint before it is cancelled
+    
+    # In-memory seen-set of known businesses per domain
+    SEEN_SET_BLOOM_CAPACITY: int = 1000000  # URLs without a company id
+    SEEN_SET_BLOOM_ERROR_RATE: float = 0.001
+
+    # Persisted crawl frontier (listing pages and business URLs as work units)
+    FRONTIER_LEASE_SECONDS: int = 600  # leased units are reclaimed after this long
+    FRONTIER_MAX_ATTEMPTS: int = 3  # fetch attempts per business URL before giving up
+    FRONTIER_POLL_INTERVAL: float = 1.0  # seconds between claims when no unit is ready
+    FRONTIER_RETENTION_DAYS: int = 7  # units of a completed job expire after this
+    FRONTIER_BACKEND: str = "mongo"  # "redis" shares units and host rate tokens across nodes via REDIS_URL
+    
+    # Intra-city page sharding: a city's pages are fetched in parallel once its last page is estimated
+    CITY_SHARDING: bool = True
+    CITY_MAX_PAGES: int = 5000  # upper bound for estimated and probed last pages
+    
+    # Category partitioning: cities deeper than this are crawled as category x city listings
+    CATEGORY_PARTITIONING: bool = True
+    CATEGORY_PARTITION_MIN_PAGES: int = 100
+    CATEGORY_BROWSE_PATH: str = "/browse-business-directory"  # category directory, if a city page has no category links
+    
+    # URL discovery: "listing" walks city listing pages; "sitemap" reads the company
+    # sitemaps from robots.txt and falls back to listing pages when a site has none
+    URL_DISCOVERY: str = "listing"
+    
+    # Crawl depth: "full" scrapes every business's detail page; "listing" saves
+    # businesses from their listing cards and leaves detail pages to enrichment
+    CRAWL_DEPTH: str = "full"
+    ENRICHMENT_AUTO_START: bool = True  # enrich a domain once a listing-depth job completes
+    ENRICHMENT_WEIGHT: float = 1.0  # scheduler share of enrichment (a job's share is its concurrent_requests)
+    ENRICHMENT_CONCURRENCY: int = 5  # detail pages fetched at once per enrichment run
+    ENRICHMENT_BATCH_SIZE: int = 100  # businesses leased per batch
+    
+    # Incremental refresh: a city listed before stops paging after this many pages
+    # in a row without unseen businesses newer than its watermark
+    INCREMENTAL_CUTOFF_PAGES: int = 3
+    
+    # Freshness revisits of scraped businesses: a domain's businesses are due once
+    # FRESHNESS_MIN_AGE_DAYS / (its observed change rate) old, within the max age
+    FRESHNESS_SCHEDULE_INTERVAL: float = 0  # seconds between scans for due domains; 0 = runs on demand only
+    FRESHNESS_MIN_AGE_DAYS: float = 7.0
+    FRESHNESS_MAX_AGE_DAYS: float = 90.0
+    FRESHNESS_WEIGHT: float = 0.5  # scheduler share of revisits, kept below crawl jobs
+    FRESHNESS_MAX_RATE_PER_HOST: float = 1.0  # revisit requests/second per host, whatever the host allows
+    FRESHNESS_CONCURRENCY: int = 5  # pages revisited at once per run
+    FRESHNESS_BATCH_SIZE: int = 100  # businesses leased per batch
+    
+    # City registry: each domain's cities and business counts, rediscovered once
+    # older than the TTL (jobs then start and resume without discovery requests)
+    CITY_REGISTRY_TTL_DAYS: float = 7.0
+    CITY_CENSUS_CONCURRENCY: int = 10  # domains discovered at once by a census
+    
+    # Offline re-extraction from the HTML archive
+    REEXTRACT_BATCH_SIZE: int = 200
+    
     # Browser settings
     HEADLESS_BROWSER: bool = True
     BROWSER_TIMEOUT: int = 30
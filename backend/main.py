@@ -2,6 +2,14 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from api.endpoints import scraping, businesses, api_export_simple, public_api
 from models.database import database
+from services.scraping_service import scraping_service
+from services.enrichment_service import enrichment_service
+from services.freshness_service import freshness_service
+from scrapers.http_client import http_client_manager
+from scrapers.html_archive import html_archive
+from scrapers.parse_pool import parse_pool
+from utils.redis_client import close_redis
+from utils.loop_monitor import loop_monitor
 import logging
 
 # Configure logging
@@ -37,12 +45,26 @@ app.include_router(public_api.router)
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database connection on startup"""
+    """Connect to the database and start background services on startup"""
     await database.connect_db()
+    loop_monitor.start()
+    # Resume jobs left RUNNING by a crash or redeploy and schedule revisits
+    # (scraper workers do both themselves)
+    if not scraping_service.uses_workers:
+        scraping_service.start_lease_keeper(takeover=True)
+        freshness_service.start_scheduler()
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Close database connection on shutdown"""
+    """Stop running work and close shared resources on shutdown"""
+    await scraping_service.shutdown()
+    await enrichment_service.shutdown()
+    await freshness_service.shutdown()
+    await http_client_manager.close()
+    await html_archive.close()
+    parse_pool.shutdown()
+    await close_redis()
+    await loop_monitor.stop()
     await database.close_db()
 
 @app.get("/")
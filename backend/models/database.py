@@ -1,5 +1,6 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
 from config import settings
 import logging
 
@@ -41,20 +42,74 @@ class Database:
         # Business data indexes
         businesses = db.businesses
         await businesses.create_index([("domain", ASCENDING), ("page_url", ASCENDING)], unique=True)
+        await businesses.create_index(
+            [("business_key", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"business_key": {"$exists": True}}
+        )
         await businesses.create_index([("city", ASCENDING), ("country", ASCENDING)])
         await businesses.create_index([("category", ASCENDING)])
         await businesses.create_index([("scraped_at", DESCENDING)])
         await businesses.create_index([("exported_at", ASCENDING)])  # New index for export tracking
         await businesses.create_index([("export_mode", ASCENDING)])  # New index for export mode
+        # Enrichment queue: listing-only businesses whose detail page is due
+        await businesses.create_index([("domain", ASCENDING), ("completeness", ASCENDING), ("enrich_after", ASCENDING)])
+        # Freshness queue: least recently (re)visited businesses first
+        await businesses.create_index([("domain", ASCENDING), ("revisited_at", ASCENDING), ("scraped_at", ASCENDING)])
+        
+        # Newest company id per city listing, for incremental refreshes
+        city_watermarks = db.city_watermarks
+        await city_watermarks.create_index([("domain", ASCENDING), ("city", ASCENDING)], unique=True)
+        
+        # Discovered cities and business counts per domain
+        city_registry = db.city_registry
+        await city_registry.create_index([("domain", ASCENDING)], unique=True)
+        
+        # Observed change rate per domain, which sets its revisit age
+        freshness_domains = db.freshness_domains
+        await freshness_domains.create_index([("domain", ASCENDING)], unique=True)
         
         # Job indexes
         jobs = db.scraping_jobs
         await jobs.create_index([("status", ASCENDING)])
         await jobs.create_index([("created_at", DESCENDING)])
+        await jobs.create_index([("status", ASCENDING), ("lease_expires_at", ASCENDING)])
+        
+        # Per-minute throughput buckets, expired after the retention period
+        throughput = db.job_throughput
+        await throughput.create_index(
+            [("job_id", ASCENDING), ("minute", ASCENDING), ("domain", ASCENDING)],
+            unique=True
+        )
+        retention = settings.PROGRESS_RETENTION_DAYS * 86400
+        try:
+            await throughput.create_index([("minute", ASCENDING)], expireAfterSeconds=retention)
+        except OperationFailure:
+            # Created with another retention (scripts/mongo-init.js uses the default): change it in place
+            await db.command(
+                "collMod", "job_throughput",
+                index={"keyPattern": {"minute": 1}, "expireAfterSeconds": retention}
+            )
+        
+        # Crawl frontier indexes: one unit per URL per job, claims in crawl order
+        frontier = db.crawl_frontier
+        await frontier.create_index([("job_id", ASCENDING), ("url", ASCENDING)], unique=True)
+        await frontier.create_index([
+            ("job_id", ASCENDING), ("domain", ASCENDING), ("kind", ASCENDING),
+            ("state", ASCENDING), ("city_index", ASCENDING), ("page", ASCENDING)
+        ])
+        await frontier.create_index([("lease_token", ASCENDING)], sparse=True)
+        # Units of a completed job get an expire_at (CrawlFrontier.expire)
+        await frontier.create_index([("expire_at", ASCENDING)], expireAfterSeconds=0)
+        
+        # Sitemaps read per domain, to skip ones unchanged since (by lastmod)
+        sitemap_reads = db.sitemap_reads
+        await sitemap_reads.create_index([("domain", ASCENDING), ("url", ASCENDING)], unique=True)
         
-        # Progress indexes
-        progress = db.scraping_progress
-        await progress.create_index([("job_id", ASCENDING), ("timestamp", DESCENDING)])
+        # Raw HTML archive index
+        html_archive = db.html_archive
+        await html_archive.create_index([("url", ASCENDING), ("fetched_at", DESCENDING)])
+        await html_archive.create_index([("host", ASCENDING), ("digest", ASCENDING)])
         
         logger.info("Database indexes created successfully")
 
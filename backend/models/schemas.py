@@ -15,6 +15,10 @@ class ExportMode(str, Enum):
     JSON = "json"
     API = "api"
 
+class Completeness(str, Enum):
+    LISTING = "listing"  # saved from a listing card, detail page not fetched yet
+    DETAIL = "detail"  # extracted from the business's detail page
+
 class BusinessData(BaseModel):
     id: Optional[str] = Field(None, alias="_id")
     title: str
@@ -40,6 +44,7 @@ class BusinessData(BaseModel):
     scraped_at: datetime = Field(default_factory=datetime.utcnow)
     exported_at: Optional[datetime] = None
     export_mode: Optional[ExportMode] = None
+    completeness: Optional[Completeness] = None  # None on records saved before crawl depths existed (detail)
     
     class Config:
         populate_by_name = True
@@ -61,6 +66,7 @@ class ScrapingJob(BaseModel):
     cities_completed: int = 0
     total_businesses: int = 0
     businesses_scraped: int = 0
+    estimated_businesses: int = 0  # business counts of the job's cities, as listed by their sites
     current_domain: Optional[str] = None
     current_city: Optional[str] = None
     current_page: int = 1
@@ -72,6 +78,9 @@ class ScrapingJob(BaseModel):
     latitude: Optional[float] = None
     longitude: Optional[float] = None
     is_seeded: Optional[bool] = False
+    # Refreshes of a finished job
+    incremental: Optional[bool] = False
+    refreshed_at: Optional[datetime] = None
     
     class Config:
         populate_by_name = True
@@ -11,11 +11,21 @@ import requests
 import asyncio
 import aiohttp
 import re
+import time
 import logging
 from typing import List, Dict, Optional, Tuple
 from urllib.parse import urljoin, urlparse
 from models.schemas import BusinessData, CityData
+from scrapers.rate_controller import rate_controller, is_captcha_page, THROTTLE_STATUS_CODES
+from scrapers.crawl_scheduler import crawl_scheduler
+from scrapers.redis_rate_limiter import redis_rate_limiter
+from scrapers.html_archive import html_archive
+from scrapers.parse_pool import parse_pool
+from scrapers.listing_scanner import ListingScanner
+from scrapers.sitemap import SitemapEntry, parse_robots_sitemaps, parse_sitemap
 from config import settings
+from utils.redis_client import shared_rates
+from utils.helpers import listing_page_url
 
 logger = logging.getLogger(__name__)
 
@@ -38,11 +48,91 @@ class BaseScraper(ABC):
             'Upgrade-Insecure-Requests': '1',
         }
     
+    async def fetch_page(
+        self,
+        url: str,
+        scanner: Optional[ListingScanner] = None,
+        archive: bool = True,
+        validators: Optional[Dict[str, Optional[str]]] = None
+    ) -> Tuple[int, Optional[bytes]]:
+        """Fetch a page through the crawl scheduler. Returns (status, raw body or None)
+
+        Throttled responses (429/503 or a captcha page) are retried after the
+        controller's backoff; a captcha that persists is reported as 429. A
+        scanner, if given, is fed the body chunk by chunk as it arrives. Pages
+        are kept in the HTML archive unless archive is False (e.g. sitemaps).
+        Validators ({etag, last_modified} of an earlier fetch) make the request
+        conditional, so an unchanged page comes back as a bodiless 304; a 200
+        replaces them with the response's own.
+        """
+        host = urlparse(url).netloc
+        headers = self.get_headers()
+        if validators:
+            if validators.get('etag'):
+                headers['If-None-Match'] = validators['etag']
+            if validators.get('last_modified'):
+                headers['If-Modified-Since'] = validators['last_modified']
+        for attempt in range(settings.RATE_THROTTLE_RETRIES + 1):
+            # A slot from the global budget, granted once the host's rate allows it
+            async with crawl_scheduler.request(host):
+                if shared_rates():
+                    # The host's rate holds for all nodes and worker processes together
+                    await redis_rate_limiter.acquire(host, rate_controller.current_rate(host))
+                start = time.monotonic()
+                try:
+                    async with self.session.get(url, headers=headers) as response:
+                        status = response.status
+                        if status != 200:
+                            body = None
+                        elif scanner is None:
+                            body = await response.read()
+                        else:
+                            body = await self._read_scanning(response, scanner)
+                        retry_after = response.headers.get('Retry-After')
+                        if validators is not None and status == 200:
+                            validators['etag'] = response.headers.get('ETag')
+                            validators['last_modified'] = response.headers.get('Last-Modified')
+                except Exception:
+                    rate_controller.record_failure(host, time.monotonic() - start)
+                    raise
+
+            captcha = is_captcha_page(body)
+            rate_controller.record_response(
+                host, status, time.monotonic() - start,
+                retry_after=retry_after, captcha=captcha
+            )
+            if captcha:
+                status, body = 429, None
+            if status not in THROTTLE_STATUS_CODES:
+                # Keep the raw page so parser fixes never require a re-crawl
+                if archive:
+                    html_archive.store(url, body, status)
+                break
+            logger.warning(f"Throttled by {host} on {url} ({status}), attempt {attempt + 1}")
+
+        return status, body
+
+    async def _read_scanning(self, response, scanner: ListingScanner) -> bytes:
+        """Read a body in chunks, feeding them to a scanner until it has seen enough"""
+        chunks = []
+        scanning = True
+        async for chunk in response.content.iter_chunked(settings.LISTING_SCAN_CHUNK_SIZE):
+            chunks.append(chunk)
+            if scanning:
+                scanning = not scanner.feed(chunk)
+        # The tail is still drained (not scanned): closing mid-body would drop the
+        # keep-alive connection, and the archive keeps complete pages
+        return b''.join(chunks)
+    
     @abstractmethod
     async def get_cities(self) -> List[CityData]:
         """Get list of all cities from the domain"""
         pass
     
+    async def discover_cities(self) -> Tuple[List[CityData], bool]:
+        """Cities of the domain, and whether they were read from the site rather than guessed"""
+        return await self.get_cities(), True
+    
     @abstractmethod
     async def get_business_listings(self, city_url: str, page: int = 1) -> Tuple[List[str], bool]:
         """Get business listing URLs from city page. Returns (urls, has_next_page)"""
@@ -52,6 +142,27 @@ class BaseScraper(ABC):
     async def scrape_business_details(self, business_url: str) -> Optional[BusinessData]:
         """Scrape detailed business information from business page"""
         pass
+    
+    async def get_listing_cards(self, city_url: str, page: int = 1) -> Tuple[List[Dict], bool]:
+        """Businesses as shown on a listing page. Returns (cards, has_next_page)
+
+        A card has the business's page_url and name plus whatever else the
+        listing shows; sites without cards give URLs only (empty names).
+        """
+        business_urls, has_next = await self.get_business_listings(city_url, page)
+        return [{"page_url": url, "name": ""} for url in business_urls], has_next
+    
+    async def get_city_categories(self, city_url: str) -> List[Tuple[str, str]]:
+        """Category listings of a city as (category, url); empty if the site has none"""
+        return []
+    
+    async def get_sitemaps(self) -> List[str]:
+        """Root sitemap URLs of the site; empty if it has none"""
+        return []
+    
+    async def read_sitemap(self, sitemap_url: str) -> Tuple[List[SitemapEntry], List[SitemapEntry]]:
+        """Read a sitemap. Returns (child sitemaps, page URLs) with their lastmod"""
+        return [], []
 
 class YelloScraper(BaseScraper):
     """Universal scraper for all Yello business directory websites"""
@@ -68,103 +179,106 @@ class YelloScraper(BaseScraper):
     
     async def get_cities(self) -> List[CityData]:
         """Get all cities by discovering them from the main navigation or using common city patterns"""
+        cities, _ = await self.discover_cities()
+        return cities
+    
+    async def discover_cities(self) -> Tuple[List[CityData], bool]:
+        """Cities from the browse page or homepage navigation; common cities are a guess"""
         try:
             # First try the browse-business-cities endpoint
             cities = await self._get_cities_from_browse_page()
             if cities:
-                return cities
+                return cities, True
             
             # Then try the homepage navigation
-            async with self.session.get(self.base_url, headers=self.get_headers()) as response:
-                if response.status != 200:
-                    logger.warning(f"Failed to fetch homepage from {self.base_url}: {response.status}")
-                    return await self._get_common_cities()
-                
-                html = await response.text()
-                soup = BeautifulSoup(html, 'html.parser')
-                
-                cities = []
-                
-                # Look for city links in various common patterns
-                city_selectors = [
-                    'a[href*="/location/"]',  # Most common pattern
-                    'a[href*="/city/"]',      # Alternative pattern
-                    'select[name="location"] option',  # Dropdown options
-                    '.location-link',         # Class-based
-                ]
-                
-                for selector in city_selectors:
-                    city_links = soup.select(selector)
-                    if city_links:
-                        for link in city_links[:50]:  # Limit to 50 cities to avoid overwhelming
-                            if link.name == 'option':
-                                city_name = link.get_text().strip()
-                                if city_name and city_name.lower() not in ['all', 'select', 'choose']:
-                                    href = f"/location/{city_name.lower().replace(' ', '-')}"
-                            else:
-                                href = link.get('href')
-                                city_name = link.get_text().strip()
-                            
-                            if href and '/location/' in href and city_name:
-                                cities.append(CityData(
-                                    name=city_name,
-                                    url=urljoin(self.base_url, href),
-                                    business_count=0,  # Will be determined when scraping
-                                    domain=self.domain_name
-                                ))
-                        break  # Stop after finding cities with first successful selector
-                
-                if cities:
-                    logger.info(f"Found {len(cities)} cities for {self.domain_name}")
-                    return cities
-                
-                # If no cities found, fall back to common cities
-                return await self._get_common_cities()
-                
+            status, html = await self.fetch_page(self.base_url)
+            if status != 200:
+                logger.warning(f"Failed to fetch homepage from {self.base_url}: {status}")
+                return await self._get_common_cities(), False
+            
+            soup = BeautifulSoup(html, 'html.parser')
+            
+            cities = []
+            
+            # Look for city links in various common patterns
+            city_selectors = [
+                'a[href*="/location/"]',  # Most common pattern
+                'a[href*="/city/"]',      # Alternative pattern
+                'select[name="location"] option',  # Dropdown options
+                '.location-link',         # Class-based
+            ]
+            
+            for selector in city_selectors:
+                city_links = soup.select(selector)
+                if city_links:
+                    for link in city_links[:50]:  # Limit to 50 cities to avoid overwhelming
+                        if link.name == 'option':
+                            city_name = link.get_text().strip()
+                            if city_name and city_name.lower() not in ['all', 'select', 'choose']:
+                                href = f"/location/{city_name.lower().replace(' ', '-')}"
+                        else:
+                            href = link.get('href')
+                            city_name = link.get_text().strip()
+                        
+                        if href and '/location/' in href and city_name:
+                            cities.append(CityData(
+                                name=city_name,
+                                url=urljoin(self.base_url, href),
+                                business_count=0,  # Will be determined when scraping
+                                domain=self.domain_name
+                            ))
+                    break  # Stop after finding cities with first successful selector
+            
+            if cities:
+                logger.info(f"Found {len(cities)} cities for {self.domain_name}")
+                return cities, True
+            
+            # If no cities found, fall back to common cities
+            return await self._get_common_cities(), False
+            
         except Exception as e:
             logger.error(f"Error fetching cities from {self.domain_name}: {e}")
-            return await self._get_common_cities()
+            return await self._get_common_cities(), False
 
     async def _get_cities_from_browse_page(self) -> List[CityData]:
         """Try to get cities from browse-business-cities endpoint"""
         try:
             browse_url = f"{self.base_url}/browse-business-cities"
-            async with self.session.get(browse_url, headers=self.get_headers()) as response:
-                if response.status != 200:
-                    logger.debug(f"Browse cities page not found for {self.domain_name}")
-                    return []
-                
-                html = await response.text()
-                soup = BeautifulSoup(html, 'html.parser')
-                
-                cities = []
-                # Look for city links on the browse page
-                city_links = soup.select('a[href*="/location/"]')
-                
-                for link in city_links:
-                    href = link.get('href')
-                    city_text = link.get_text().strip()
-                    
-                    # Extract city name and business count
-                    if city_text and href and '/location/' in href:
-                        # Parse city name and count (e.g., "Karachi 68,340")
-                        match = re.match(r'^([^0-9]+)\s*(\d[\d,]*)?$', city_text)
-                        if match:
-                            city_name = match.group(1).strip()
-                            business_count_str = match.group(2) or '0'
-                            business_count = int(business_count_str.replace(',', '')) if business_count_str else 0
-                            
-                            cities.append(CityData(
-                                name=city_name,
-                                url=urljoin(self.base_url, href),
-                                business_count=business_count,
-                                domain=self.domain_name
-                            ))
-                
-                if cities:
-                    logger.info(f"Found {len(cities)} cities from browse page for {self.domain_name}")
-                    return cities
-                
+            status, html = await self.fetch_page(browse_url)
+            if status != 200:
+                logger.debug(f"Browse cities page not found for {self.domain_name}")
+                return []
+            
+            soup = BeautifulSoup(html, 'html.parser')
+            
+            cities = []
+            # Look for city links on the browse page
+            city_links = soup.select('a[href*="/location/"]')
+            
+            for link in city_links:
+                href = link.get('href')
+                city_text = link.get_text().strip()
+                
+                # Extract city name and business count
+                if city_text and href and '/location/' in href:
+                    # Parse city name and count (e.g., "Karachi 68,340")
+                    match = re.match(r'^([^0-9]+)\s*(\d[\d,]*)?$', city_text)
+                    if match:
+                        city_name = match.group(1).strip()
+                        business_count_str = match.group(2) or '0'
+                        business_count = int(business_count_str.replace(',', '')) if business_count_str else 0
+                        
+                        cities.append(CityData(
+                            name=city_name,
+                            url=urljoin(self.base_url, href),
+                            business_count=business_count,
+                            domain=self.domain_name
+                        ))
+            
+            if cities:
+                logger.info(f"Found {len(cities)} cities from browse page for {self.domain_name}")
+                return cities
+            
         except Exception as e:
             logger.debug(f"Error fetching from browse cities page for {self.domain_name}: {e}")
         
@@ -231,277 +345,132 @@ class YelloScraper(BaseScraper):
         logger.info(f"Using {len(cities)} common cities for {self.domain_name}")
         return cities
     
+    async def get_city_categories(self, city_url: str) -> List[Tuple[str, str]]:
+        """Get the category listings of a city, from its page or the category directory.
+
+        Category links filtered by a city (/category/{slug}/city:{city}) are
+        taken as they are; plain category links get the city filter appended.
+        Their pages are numbered before the filter (see category_page_url).
+        """
+        city_slug = city_url.rstrip('/').rsplit('/', 1)[-1]
+        categories: Dict[str, str] = {}
+        for page_url in (city_url, urljoin(self.base_url, settings.CATEGORY_BROWSE_PATH)):
+            try:
+                status, html = await self.fetch_page(page_url)
+            except Exception as e:
+                logger.debug(f"Error fetching categories from {page_url}: {e}")
+                continue
+            if status != 200:
+                continue
+            
+            soup = BeautifulSoup(html, 'html.parser')
+            for link in soup.select('a[href*="/category/"]'):
+                href = link.get('href')
+                # Link text may carry a business count (e.g. "Restaurants 1,234")
+                name = re.sub(r'\s*\d[\d,]*$', '', link.get_text().strip())
+                if not href or not name:
+                    continue
+                url = urljoin(self.base_url, href).split('?')[0].rstrip('/')
+                if '/city:' in url:
+                    if not url.endswith(f'/city:{city_slug}'):
+                        continue
+                else:
+                    url = f"{url}/city:{city_slug}"
+                categories.setdefault(url, name)
+            if categories:
+                break
+        
+        logger.info(f"Found {len(categories)} categories for {city_url}")
+        return [(name, url) for url, name in categories.items()]
+    
+    async def get_sitemaps(self) -> List[str]:
+        """Get the root sitemaps declared in robots.txt, or /sitemap.xml if there is one"""
+        try:
+            status, body = await self.fetch_page(f"{self.base_url}/robots.txt", archive=False)
+            if status == 200 and body:
+                sitemaps = parse_robots_sitemaps(body.decode('utf-8', errors='replace'))
+                if sitemaps:
+                    logger.info(f"Found {len(sitemaps)} sitemaps in robots.txt for {self.domain_name}")
+                    return sitemaps
+            
+            sitemap_url = f"{self.base_url}/sitemap.xml"
+            status, body = await self.fetch_page(sitemap_url, archive=False)
+            if status == 200 and body and any(parse_sitemap(body)):
+                return [sitemap_url]
+        except Exception as e:
+            logger.debug(f"Error discovering sitemaps for {self.domain_name}: {e}")
+        
+        logger.info(f"No sitemaps found for {self.domain_name}")
+        return []
+    
+    async def read_sitemap(self, sitemap_url: str) -> Tuple[List[SitemapEntry], List[SitemapEntry]]:
+        """Read a sitemap index or urlset (gzipped or not)"""
+        try:
+            status, body = await self.fetch_page(sitemap_url, archive=False)
+            if status != 200 or not body:
+                logger.error(f"Failed to fetch sitemap {sitemap_url}: {status}")
+                return [], []
+            return await asyncio.to_thread(parse_sitemap, body)
+        except Exception as e:
+            logger.error(f"Error reading sitemap {sitemap_url}: {e}")
+            return [], []
+    
     async def get_business_listings(self, city_url: str, page: int = 1) -> Tuple[List[str], bool]:
         """Get business listing URLs from city page"""
         if page > 1:
-            city_url = f"{city_url}/{page}"
+            city_url = listing_page_url(city_url, page)
             
         try:
-            async with self.session.get(city_url, headers=self.get_headers()) as response:
-                if response.status != 200:
-                    logger.error(f"Failed to fetch page {page} from {city_url}: {response.status}")
-                    return [], False
-                
-                html = await response.text()
-                soup = BeautifulSoup(html, 'html.parser')
-                
-                business_urls = []
-                # Find business links in company divs - try multiple selectors in order of preference
-                
-                # Primary selector: header links (most common and reliable)
-                business_links = soup.select('div.company h3 a[href^="/company/"]')
-                
-                # If primary selector found links, use those
-                if business_links:
-                    logger.debug(f"Found {len(business_links)} business links using primary selector (h3)")
-                else:
-                    # Fallback 1: company header links without h3 requirement  
-                    business_links = soup.select('div.company .company_header a[href^="/company/"]')
-                    if business_links:
-                        logger.debug(f"Found {len(business_links)} business links using header selector")
-                    else:
-                        # Fallback 2: any company link within a company div (includes logo links)
-                        business_links = soup.select('div.company a[href^="/company/"]')
-                        if business_links:
-                            logger.debug(f"Found {len(business_links)} business links using general selector")
-                        else:
-                            # Final fallback: any company link on the page
-                            business_links = soup.select('a[href^="/company/"]')
-                            logger.debug(f"Found {len(business_links)} business links using page-wide selector")
-                
-                # Extract unique URLs to avoid duplicates (in case there are multiple links to same company)
-                seen_urls = set()
-                for link in business_links:
-                    href = link.get('href')
-                    if href:
-                        full_url = urljoin(self.base_url, href)
-                        if full_url not in seen_urls:
-                            business_urls.append(full_url)
-                            seen_urls.add(full_url)
-                
-                # Check for next page
-                has_next = bool(soup.select('a.pages_arrow[rel="next"]'))
-                
-                logger.debug(f"Found {len(business_urls)} businesses on page {page} of {city_url}")
-                return business_urls, has_next
-                
+            scanner = ListingScanner(self.base_url) if settings.LISTING_FAST_SCAN else None
+            status, html = await self.fetch_page(city_url, scanner=scanner)
+            if status != 200:
+                logger.error(f"Failed to fetch page {page} from {city_url}: {status}")
+                return [], False
+            
+            if scanner is not None:
+                result = scanner.result()
+                if result is not None:
+                    return result
+                logger.debug(f"Fast scan found no company links on {city_url}, parsing the DOM")
+            
+            return await parse_pool.parse_listings(html, self.base_url)
+            
         except Exception as e:
             logger.error(f"Error fetching business listings from {city_url} page {page}: {e}")
             return [], False
     
+    async def get_listing_cards(self, city_url: str, page: int = 1) -> Tuple[List[Dict], bool]:
+        """Get the div.company cards of a listing page (name, address, phone, website, category)"""
+        if page > 1:
+            city_url = listing_page_url(city_url, page)
+        
+        try:
+            status, html = await self.fetch_page(city_url)
+            if status != 200:
+                logger.error(f"Failed to fetch page {page} from {city_url}: {status}")
+                return [], False
+            
+            return await parse_pool.parse_listing_cards(html, self.base_url)
+            
+        except Exception as e:
+            logger.error(f"Error fetching business cards from {city_url} page {page}: {e}")
+            return [], False
+    
     async def scrape_business_details(self, business_url: str) -> Optional[BusinessData]:
         """Scrape detailed business information"""
         try:
             logger.debug(f"Scraping business details from: {business_url}")
-            async with self.session.get(business_url, headers=self.get_headers()) as response:
-                if response.status != 200:
-                    logger.error(f"Failed to fetch business details from {business_url}: {response.status}")
-                    return None
-                
-                html = await response.text()
-                soup = BeautifulSoup(html, 'html.parser')
-                
-                # Extract title
-                title_tag = soup.select_one('h1')
-                title = title_tag.get_text().strip() if title_tag else ""
-                logger.debug(f"Extracted title: {title}")
-                
-                # Extract breadcrumb info (country, city, category)
-                breadcrumb = soup.select('ul[itemtype*="BreadcrumbList"] li span[itemprop="name"]')
-                country = breadcrumb[0].get_text().strip() if len(breadcrumb) > 0 else ""
-                city = breadcrumb[1].get_text().strip() if len(breadcrumb) > 1 else ""
-                category = breadcrumb[2].get_text().strip() if len(breadcrumb) > 2 else ""
-                logger.debug(f"Extracted location: {country}, {city}, {category}")
-                
-                # Extract business name
-                name_tag = soup.select_one('div.text#company_name, .company_header h3')
-                name = name_tag.get_text().strip() if name_tag else title.split(' - ')[0] if ' - ' in title else title
-                logger.debug(f"Extracted name: {name}")
-                
-                # Extract coordinates from directions link
-                coordinates = None
-                # Look for Google Maps directions link with coordinates
-                directions_link = soup.select_one('a[href*="maps.google.com"][href*="daddr="], a[href*="Get Directions"]')
-                if not directions_link:
-                    # Try alternative selectors for the directions link
-                    directions_link = soup.select_one('.location_links a[href*="maps.google.com"]')
-                
-                if directions_link:
-                    href = directions_link.get('href')
-                    if href:
-                        # Extract coordinates from the daddr parameter
-                        match = re.search(r'daddr=([0-9.-]+),([0-9.-]+)', href)
-                        if match:
-                            coordinates = {
-                                "lat": float(match.group(1)),
-                                "lng": float(match.group(2))
-                            }
-                            logger.debug(f"Extracted coordinates: {coordinates} from {href}")
-                        else:
-                            logger.debug(f"No coordinates found in directions link: {href}")
-                    else:
-                        logger.debug("Directions link found but no href attribute")
-                
-                # Extract contact information
-                phone = self._extract_contact_info(soup, 'tel:', 'Phone')
-                mobile = self._extract_contact_info(soup, 'tel:', 'Mobile phone')
-                fax = self._extract_text_by_label(soup, 'Fax')
-                
-                # Extract website
-                website_link = soup.select_one('div.weblinks a[href*="/redir/"]')
-                website = None
-                if website_link:
-                    website = website_link.get_text().strip()
-                
-                # Extract address
-                address = None
-                # Try multiple selectors for address in order of specificity
-                address_selectors = [
-                    '#company_address',  # Most specific - from your example
-                    'div.text.location #company_address',  # Full path
-                    'div.info div.text.location #company_address',  # Even more specific
-                    '.address',  # Generic class
-                    'div:contains("Address:") + div',  # Label-based
-                    '.location_links',  # Container
-                    'div[id*="address"]',  # Any div with "address" in ID
-                    'div.text.location div',  # Any div inside location
-                ]
-                
-                for selector in address_selectors:
-                    address_div = soup.select_one(selector)
-                    if address_div:
-                        address_text = address_div.get_text().strip()
-                        # Clean up the address and validate it
-                        if address_text and len(address_text) > 5 and not address_text.lower() in ['view map', 'get directions']:
-                            # Remove extra whitespace and newlines
-                            address = ' '.join(address_text.split())
-                            logger.debug(f"Extracted address using selector '{selector}': {address}")
-                            break
-                
-                if not address:
-                    # Fallback: look for any text that looks like an address
-                    all_text_divs = soup.find_all('div', string=re.compile(r'\w+\s+(St|Street|Rd|Road|Ave|Avenue|Blvd|Boulevard|Al\s+\w+)', re.I))
-                    if all_text_divs:
-                        address = all_text_divs[0].get_text().strip()
-                        logger.debug(f"Extracted address from fallback: {address}")
-                
-                # Extract working hours
-                working_hours = self._extract_working_hours(soup)
-                
-                # Extract description
-                description_div = soup.select_one('div.text.desc, .company_description')
-                description = description_div.get_text().strip() if description_div else None
-                
-                # Extract tags/categories
-                tags = []
-                tag_links = soup.select('div.tags a[href^="/category/"]')
-                for tag_link in tag_links:
-                    tag_text = tag_link.get_text().strip()
-                    if tag_text:
-                        tags.append(tag_text)
-                
-                # Extract reviews and rating
-                reviews_count = 0
-                rating = None
-                rating_div = soup.select_one('.company_reviews')
-                if rating_div:
-                    rating_text = rating_div.select_one('.rate')
-                    if rating_text:
-                        try:
-                            rating = float(rating_text.get_text().strip())
-                        except ValueError:
-                            pass
-                    
-                    reviews_text = rating_div.get_text()
-                    match = re.search(r'(\d+)\s+Reviews?', reviews_text)
-                    if match:
-                        reviews_count = int(match.group(1))
-                
-                # Extract establishment year
-                established_year = None
-                established_text = self._extract_text_by_label(soup, 'Established')
-                if established_text:
-                    match = re.search(r'(\d{4})', established_text)
-                    if match:
-                        established_year = int(match.group(1))
-                
-                # Extract employees
-                employees = self._extract_text_by_label(soup, 'Employees')
-                
-                business_data = BusinessData(
-                    title=title,
-                    name=name,
-                    country=country,
-                    city=city,
-                    category=category,
-                    coordinates=coordinates,
-                    phone=phone,
-                    mobile=mobile,
-                    fax=fax,
-                    website=website,
-                    address=address,
-                    working_hours=working_hours,
-                    description=description,
-                    tags=tags,
-                    reviews_count=reviews_count,
-                    rating=rating,
-                    established_year=established_year,
-                    employees=employees,
-                    page_url=business_url,
-                    domain=self.domain
-                )
-                
-                logger.debug(f"Successfully scraped business: {name} with coordinates: {coordinates}")
-                return business_data
-                
+            status, html = await self.fetch_page(business_url)
+            if status != 200:
+                logger.error(f"Failed to fetch business details from {business_url}: {status}")
+                return None
+            
+            return await parse_pool.parse_details(html, business_url, self.domain)
+            
         except Exception as e:
             logger.error(f"Error scraping business details from {business_url}: {e}")
             return None
-    
-    def _extract_contact_info(self, soup: BeautifulSoup, href_prefix: str, label: str) -> Optional[str]:
-        """Extract contact information by href prefix and label"""
-        # Try to find by label first
-        contact_div = soup.find('div', class_='label', string=label)
-        if contact_div:
-            text_div = contact_div.find_next_sibling('div', class_='text')
-            if text_div:
-                link = text_div.find('a', href=lambda x: x and x.startswith(href_prefix))
-                if link:
-                    return link.get_text().strip()
-        
-        # Fallback: search for any link with the prefix
-        link = soup.find('a', href=lambda x: x and x.startswith(href_prefix))
-        if link:
-            return link.get_text().strip()
-        
-        return None
-    
-    def _extract_text_by_label(self, soup: BeautifulSoup, label: str) -> Optional[str]:
-        """Extract text content by label"""
-        label_div = soup.find('div', class_='label', string=label)
-        if label_div:
-            text_div = label_div.find_next_sibling('div', class_='text')
-            if text_div:
-                return text_div.get_text().strip()
-        return None
-    
-    def _extract_working_hours(self, soup: BeautifulSoup) -> Optional[Dict[str, str]]:
-        """Extract working hours information"""
-        hours_div = soup.select_one('#open_hours ul')
-        if not hours_div:
-            return None
-        
-        working_hours = {}
-        for li in hours_div.find_all('li'):
-            text = li.get_text().strip()
-            if ':' in text:
-                parts = text.split(':', 1)
-                if len(parts) == 2:
-                    day = parts[0].strip()
-                    hours = parts[1].strip()
-                    working_hours[day] = hours
-        
-        return working_hours if working_hours else None
+
 
 def get_scraper(domain: str, session: aiohttp.ClientSession) -> BaseScraper:
     """Factory function to get appropriate scraper for domain"""
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, Iterable, Optional, Tuple
+from scrapers.rate_controller import rate_controller, worker_processes
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Flow (job id) of the requests made by the current task; set once per job and
+# inherited by every task the job creates
+crawl_flow: ContextVar[Optional[str]] = ContextVar("crawl_flow", default=None)
+
+DEFAULT_FLOW = "default"
+
+class FlowState:
+    """Requests of one job to one host, waiting in arrival order"""
+
+    def __init__(self, job: str, host: str):
+        self.job = job
+        self.host = host
+        # (virtual finish tag, future) per waiting request
+        self.waiting: Deque[Tuple[float, asyncio.Future]] = deque()
+        self.last_finish = 0.0
+        self.in_flight = 0
+        self.granted = 0
+
+class CrawlScheduler:
+    """Process-wide request budget shared by all jobs with weighted fair queueing.
+
+    Every fetch asks for a slot. At most MAX_CONCURRENT_REQUESTS requests are in
+    flight overall and MAX_REQUESTS_PER_HOST per host, and a slot is only granted
+    when the host's rate bucket has a token, so a slow or throttled host never
+    holds budget other hosts could use. Waiting requests are served in order of
+    their virtual finish time (self-clocked fair queueing) across (job, host)
+    flows; a job's weight scales its share, and an idle flow's share goes to the
+    busy ones. In worker mode both caps are split between the worker processes.
+    """
+
+    def __init__(self):
+        self.flows: Dict[Tuple[str, str], FlowState] = {}
+        self.weights: Dict[str, float] = {}
+        self.host_in_flight: Dict[str, int] = defaultdict(int)
+        self.in_flight = 0
+        self.virtual_time = 0.0
+        self.wakeup: Optional[asyncio.TimerHandle] = None
+
+    def set_weight(self, job: str, weight: float):
+        """Set a job's share of the budget relative to other jobs (default 1)"""
+        self.weights[job] = max(weight, 0.1)
+
+    def forget(self, job: str):
+        """Drop a finished job's weight and idle flows"""
+        self.weights.pop(job, None)
+        for key, flow in list(self.flows.items()):
+            if flow.job == job and not flow.waiting and flow.in_flight == 0:
+                del self.flows[key]
+
+    def budget(self) -> int:
+        """Requests this process may have in flight overall"""
+        return max(1, settings.MAX_CONCURRENT_REQUESTS // worker_processes())
+
+    def host_budget(self) -> int:
+        """Requests this process may have in flight per host"""
+        return max(1, settings.MAX_REQUESTS_PER_HOST // worker_processes())
+
+    def _flow(self, job: str, host: str) -> FlowState:
+        flow = self.flows.get((job, host))
+        if flow is None:
+            flow = self.flows[(job, host)] = FlowState(job, host)
+        return flow
+
+    async def acquire(self, host: str) -> FlowState:
+        """Wait for a request slot on a host for the current task's job"""
+        job = crawl_flow.get() or DEFAULT_FLOW
+        flow = self._flow(job, host)
+        # Self-clocked tag: a flow returning from idle starts at the current virtual time
+        tag = max(self.virtual_time, flow.last_finish) + 1.0 / self.weights.get(job, 1.0)
+        flow.last_finish = tag
+        future = asyncio.get_running_loop().create_future()
+        flow.waiting.append((tag, future))
+        self._dispatch()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just before the cancellation: give the slot back
+                self.release(flow)
+            else:
+                flow.waiting = deque(entry for entry in flow.waiting if entry[1] is not future)
+                self._discard_if_idle(flow)
+                self._dispatch()
+            raise
+        return flow
+
+    def release(self, flow: FlowState):
+        """Return a request slot once the response has been read"""
+        flow.in_flight -= 1
+        self.in_flight -= 1
+        self.host_in_flight[flow.host] -= 1
+        self._discard_if_idle(flow)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def request(self, host: str):
+        flow = await self.acquire(host)
+        try:
+            yield
+        finally:
+            self.release(flow)
+
+    def _discard_if_idle(self, flow: FlowState):
+        if not flow.waiting and flow.in_flight == 0 and flow.last_finish <= self.virtual_time:
+            self.flows.pop((flow.job, flow.host), None)
+
+    def _dispatch(self):
+        """Grant free slots to the waiting requests with the smallest finish tags"""
+        if self.wakeup is not None:
+            self.wakeup.cancel()
+            self.wakeup = None
+
+        retry_in: Optional[float] = None
+        budget, host_budget = self.budget(), self.host_budget()
+        while self.in_flight < budget:
+            candidates = sorted(
+                (flow for flow in self.flows.values() if flow.waiting),
+                key=lambda flow: flow.waiting[0][0]
+            )
+            granted = False
+            for flow in candidates:
+                # Requests cancelled while waiting are dropped by their own task
+                while flow.waiting and flow.waiting[0][1].done():
+                    flow.waiting.popleft()
+                if not flow.waiting:
+                    continue
+                if self.host_in_flight[flow.host] >= host_budget:
+                    continue
+                wait = rate_controller.try_acquire(flow.host)
+                if wait > 0:
+                    retry_in = wait if retry_in is None else min(retry_in, wait)
+                    continue
+                tag, future = flow.waiting.popleft()
+                self.virtual_time = max(self.virtual_time, tag)
+                flow.in_flight += 1
+                flow.granted += 1
+                self.in_flight += 1
+                self.host_in_flight[flow.host] += 1
+                future.set_result(None)
+                granted = True
+                break
+            if not granted:
+                break
+
+        if retry_in is not None and any(flow.waiting for flow in self.flows.values()):
+            self.wakeup = asyncio.get_running_loop().call_later(retry_in, self._dispatch)
+
+    def get_stats(self, hosts: Optional[Iterable[str]] = None) -> Dict:
+        """Budget usage overall and per host"""
+        hosts = set(hosts) if hosts is not None else {flow.host for flow in self.flows.values()}
+        per_host = {}
+        for host in hosts:
+            flows = [flow for flow in self.flows.values() if flow.host == host]
+            per_host[host] = {
+                "in_flight": self.host_in_flight.get(host, 0),
+                "waiting": sum(len(flow.waiting) for flow in flows),
+                "jobs": len({flow.job for flow in flows}),
+            }
+        return {
+            "budget": self.budget(),
+            "in_flight": self.in_flight,
+            "waiting": sum(len(flow.waiting) for flow in self.flows.values()),
+            "hosts": per_host,
+        }
+
+# Global crawl scheduler instance
+crawl_scheduler = CrawlScheduler()
@@ -0,0 +1,109 @@
+"""
+Per-domain extraction plans with selector hit-rate learning.
+
+Each field that can be found by several selectors is declared once as an
+ordered candidate chain. A plan per (domain, field) counts which candidate
+actually produces the value; after a warm-up sample the winning candidate is
+tried first, and every EXTRACTION_PLAN_REVALIDATE pages the full chain runs in
+declared order again to catch template drift.
+
+Plans live in the process that parses, so every parse-pool worker learns its
+own (the warm-up is a handful of pages).
+"""
+
+import logging
+from typing import Dict, List, Optional
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+class FieldPlan:
+    """Candidate order and hit counts for one field of one domain"""
+
+    def __init__(self, domain: str, field: str, candidates: List[str]):
+        self.domain = domain
+        self.field = field
+        self.candidates = list(candidates)
+        self.reset()
+
+    def reset(self):
+        self.hits: Dict[str, int] = {candidate: 0 for candidate in self.candidates}
+        self.misses = 0
+        self.pages = 0
+        self.winner: Optional[str] = None
+
+    def order(self) -> List[str]:
+        """Candidates to try for the next page, winner first once learned"""
+        self.pages += 1
+        if self.validating:
+            return self.candidates
+        return [self.winner] + [c for c in self.candidates if c != self.winner]
+
+    @property
+    def validating(self) -> bool:
+        """Whether the current page runs the full chain in declared order"""
+        return self.winner is None or self.pages % settings.EXTRACTION_PLAN_REVALIDATE == 0
+
+    def record(self, candidate: Optional[str]):
+        """Record which candidate produced the value (None if none did)"""
+        if candidate is None:
+            self.misses += 1
+            return
+
+        if (
+            self.winner is not None
+            and self.validating
+            and self.candidates.index(candidate) < self.candidates.index(self.winner)
+        ):
+            # A selector declared before the winner matched, so winner-first order
+            # could now return a different value than the declared chain: relearn
+            logger.info(
+                f"Template drift on {self.domain} for '{self.field}': "
+                f"'{self.winner}' no longer wins, '{candidate}' does"
+            )
+            self.reset()
+
+        self.hits[candidate] += 1
+        if self.winner is None and sum(self.hits.values()) >= settings.EXTRACTION_PLAN_WARMUP:
+            self.winner = max(self.candidates, key=lambda c: self.hits[c])
+            logger.debug(f"Extraction plan for {self.domain} '{self.field}' settled on '{self.winner}'")
+
+    def stats(self) -> Dict:
+        return {
+            "winner": self.winner,
+            "pages": self.pages,
+            "misses": self.misses,
+            "hits": {c: n for c, n in self.hits.items() if n},
+        }
+
+class ExtractionPlans:
+    """Registry of compiled field plans keyed by domain"""
+
+    def __init__(self, specs: Dict[str, List[str]]):
+        self.specs = specs
+        self.plans: Dict[str, Dict[str, FieldPlan]] = {}
+
+    def get(self, domain: str, field: str) -> FieldPlan:
+        domain_plans = self.plans.get(domain)
+        if domain_plans is None:
+            domain_plans = self.plans[domain] = {
+                name: FieldPlan(domain, name, candidates) for name, candidates in self.specs.items()
+            }
+        return domain_plans[field]
+
+    def first_hit(self, domain: str, field: str, extract):
+        """Run extract(candidate) over the plan's order and return the first non-None result"""
+        plan = self.get(domain, field)
+        for candidate in plan.order():
+            value = extract(candidate)
+            if value is not None:
+                plan.record(candidate)
+                return value
+        plan.record(None)
+        return None
+
+    def get_stats(self) -> Dict[str, Dict[str, Dict]]:
+        return {
+            domain: {name: plan.stats() for name, plan in domain_plans.items()}
+            for domain, domain_plans in self.plans.items()
+        }
@@ -0,0 +1,339 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
+from urllib.parse import urlparse
+from pymongo import DESCENDING
+from pymongo.errors import BulkWriteError
+from models.database import database
+from config import settings
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+class DomainArchive:
+    """Segment writer and zstd dictionary state for a single host"""
+
+    def __init__(self, root: str, host: str):
+        self.host = host
+        self.directory = os.path.join(root, host)
+        self.dictionary_directory = os.path.join(self.directory, "dictionaries")
+        self.buffer: List[Dict] = []
+        self.buffer_bytes = 0
+        self.samples: List[bytes] = []
+        # Pages not archived because their segment could not be written twice
+        self.lost = 0
+        self.dictionary = None
+        self.compressor = None
+        self.lock = asyncio.Lock()
+        self._load_latest_dictionary()
+
+    def _load_latest_dictionary(self):
+        if not os.path.isdir(self.dictionary_directory):
+            return
+        names = sorted(os.listdir(self.dictionary_directory))
+        if names:
+            with open(os.path.join(self.dictionary_directory, names[-1]), "rb") as f:
+                self._use_dictionary(zstandard.ZstdCompressionDict(f.read()))
+
+    def _use_dictionary(self, dictionary):
+        self.dictionary = dictionary
+        self.compressor = zstandard.ZstdCompressor(level=settings.HTML_ARCHIVE_LEVEL, dict_data=dictionary)
+
+    @property
+    def dict_id(self) -> int:
+        return self.dictionary.dict_id() if self.dictionary else 0
+
+    def take_samples(self) -> List[bytes]:
+        """Hand over the sample pages once there are enough to train on (on the event loop)"""
+        if self.dictionary is not None or len(self.samples) < settings.HTML_ARCHIVE_DICT_SAMPLES:
+            return []
+        samples, self.samples = self.samples, []
+        return samples
+
+    def train_dictionary(self, samples: List[bytes]):
+        """Train the domain dictionary from taken samples (runs in a thread)"""
+        try:
+            dictionary = zstandard.train_dictionary(settings.HTML_ARCHIVE_DICT_SIZE, samples)
+        except zstandard.ZstdError as e:
+            # store() collects a new set of samples for the next attempt
+            logger.warning(f"Failed to train archive dictionary for {self.host}: {e}")
+            return
+        os.makedirs(self.dictionary_directory, exist_ok=True)
+        path = os.path.join(self.dictionary_directory, f"{dictionary.dict_id()}.zdict")
+        with open(path, "wb") as f:
+            f.write(dictionary.as_bytes())
+        self._use_dictionary(dictionary)
+        logger.info(f"Trained archive dictionary {dictionary.dict_id()} for {self.host}")
+
+    def compress(self, data: bytes) -> bytes:
+        if self.compressor is None:
+            return zstandard.ZstdCompressor(level=settings.HTML_ARCHIVE_LEVEL).compress(data)
+        return self.compressor.compress(data)
+
+class HtmlArchive:
+    """Content-addressed archive of every fetched page.
+
+    Pages are written as WARC response records, each compressed as its own zstd
+    frame so it can be read back by offset. Records are appended to per-host
+    segment files (one per writing process and day), and once enough pages of
+    a host were seen a zstd dictionary is trained for it; Yello templates are
+    near-identical, so dictionary frames are a small fraction of the raw page.
+    Identical bodies are stored once and shared by every index entry with the
+    same SHA-256 digest.
+
+    The index lives in the ``html_archive`` collection, one entry per fetch
+    (url, fetched_at, digest, segment, offset, length, dict_id).
+    """
+
+    def __init__(self):
+        self.root = settings.HTML_ARCHIVE_DIR
+        self.domains: Dict[str, DomainArchive] = {}
+        self.decompressors: Dict[tuple, object] = {}
+        self.enabled = settings.HTML_ARCHIVE_ENABLED and zstandard is not None
+        self._flush_tasks: set = set()
+        if settings.HTML_ARCHIVE_ENABLED and zstandard is None:
+            logger.warning("zstandard is not installed, HTML archive is disabled")
+
+    def _get_domain(self, host: str) -> DomainArchive:
+        if host not in self.domains:
+            self.domains[host] = DomainArchive(self.root, host)
+        return self.domains[host]
+
+    def store(self, url: str, body: bytes, status: int = 200):
+        """Queue a fetched page for archiving; segments are flushed in the background"""
+        if not self.enabled or body is None:
+            return
+        host = urlparse(url).netloc
+        archive = self._get_domain(host)
+        archive.buffer.append({
+            "url": url,
+            "host": host,
+            "status": status,
+            "fetched_at": datetime.utcnow(),
+            "body": body,
+            "digest": hashlib.sha256(body).hexdigest(),
+        })
+        archive.buffer_bytes += len(body)
+        if archive.dictionary is None and len(archive.samples) < settings.HTML_ARCHIVE_DICT_SAMPLES:
+            archive.samples.append(body)
+
+        if len(archive.buffer) >= settings.HTML_ARCHIVE_FLUSH_RECORDS or archive.buffer_bytes >= settings.HTML_ARCHIVE_FLUSH_BYTES:
+            task = asyncio.create_task(self.flush(host))
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+
+    async def flush(self, host: str):
+        """Write buffered pages of a host to its current segment and index them"""
+        archive = self.domains.get(host)
+        if archive is None:
+            return
+        async with archive.lock:
+            records, archive.buffer, archive.buffer_bytes = archive.buffer, [], 0
+            if not records:
+                return
+
+            collection = database.get_database().html_archive
+            # Content addressing: bodies already archived are only indexed again
+            digests = list({record["digest"] for record in records})
+            known = {}
+            async for entry in collection.find(
+                {"host": host, "digest": {"$in": digests}},
+                {"digest": 1, "segment": 1, "offset": 1, "length": 1, "dict_id": 1}
+            ):
+                known[entry["digest"]] = entry
+
+            # Samples are swapped out here: store() appends to them on the event loop
+            samples = archive.take_samples()
+            try:
+                entries = await asyncio.to_thread(self._write_segment, archive, records, known, samples)
+            except Exception as e:
+                if archive.dictionary is None:
+                    archive.samples = (samples + archive.samples)[:settings.HTML_ARCHIVE_DICT_SAMPLES]
+                # Pages get one more try with the next segment write, then count as lost
+                retry = [record for record in records if not record.get("retried")]
+                for record in retry:
+                    record["retried"] = True
+                archive.buffer[:0] = retry
+                archive.buffer_bytes += sum(len(record["body"]) for record in retry)
+                lost = len(records) - len(retry)
+                archive.lost += lost
+                logger.error(
+                    f"Failed to write HTML archive segment for {host}: {e} "
+                    f"({len(retry)} pages kept for the next segment, {lost} lost, {archive.lost} in total)"
+                )
+                return
+            if archive.dictionary is not None:
+                archive.samples = []
+            try:
+                await collection.insert_many(entries, ordered=False)
+            except BulkWriteError as e:
+                # Entries that were inserted stay indexed; the others are only in the segment
+                logger.error(f"Failed to index {len(e.details.get('writeErrors', []))}/{len(entries)} archived pages for {host}")
+                return
+            except Exception as e:
+                logger.error(f"Failed to index {len(entries)} archived pages for {host}: {e}")
+                return
+            logger.debug(f"Archived {len(entries)} pages for {host}")
+
+    def _write_segment(
+        self,
+        archive: DomainArchive,
+        records: List[Dict],
+        known: Dict[str, Dict],
+        samples: List[bytes]
+    ) -> List[Dict]:
+        """Compress new bodies into the day's segment file (runs in a thread)"""
+        if samples:
+            archive.train_dictionary(samples)
+        os.makedirs(archive.directory, exist_ok=True)
+        # One segment per process and day: offsets are taken with tell(), so two
+        # scraper worker processes must never append to the same file
+        segment = f"{datetime.utcnow():%Y%m%d}-{os.getpid()}.warc.zst"
+        path = os.path.join(archive.directory, segment)
+
+        entries = []
+        with open(path, "ab") as f:
+            for record in records:
+                location = known.get(record["digest"])
+                if location is None:
+                    frame = archive.compress(self._warc_record(record))
+                    location = {
+                        "segment": segment,
+                        "offset": f.tell(),
+                        "length": len(frame),
+                        "dict_id": archive.dict_id,
+                    }
+                    f.write(frame)
+                    known[record["digest"]] = location
+                entries.append({
+                    "url": record["url"],
+                    "host": record["host"],
+                    "status": record["status"],
+                    "fetched_at": record["fetched_at"],
+                    "digest": record["digest"],
+                    "size": len(record["body"]),
+                    "segment": location["segment"],
+                    "offset": location["offset"],
+                    "length": location["length"],
+                    "dict_id": location["dict_id"],
+                })
+        return entries
+
+    def _warc_record(self, record: Dict) -> bytes:
+        header = (
+            "WARC/1.1\r\n"
+            "WARC-Type: response\r\n"
+            f"WARC-Target-URI: {record['url']}\r\n"
+            f"WARC-Date: {record['fetched_at'].strftime('%Y-%m-%dT%H:%M:%SZ')}\r\n"
+            f"WARC-Payload-Digest: sha256:{record['digest']}\r\n"
+            f"X-HTTP-Status: {record['status']}\r\n"
+            "Content-Type: text/html\r\n"
+            f"Content-Length: {len(record['body'])}\r\n"
+            "\r\n"
+        ).encode("utf-8")
+        return header + record["body"] + b"\r\n\r\n"
+
+    def _read_record(self, entry: Dict) -> str:
+        """Read and decompress one archived page (runs in a thread)"""
+        host = entry["host"]
+        path = os.path.join(self.root, host, entry["segment"])
+        with open(path, "rb") as f:
+            f.seek(entry["offset"])
+            frame = f.read(entry["length"])
+
+        key = (host, entry["dict_id"])
+        decompressor = self.decompressors.get(key)
+        if decompressor is None:
+            if entry["dict_id"]:
+                dictionary_path = os.path.join(self.root, host, "dictionaries", f"{entry['dict_id']}.zdict")
+                with open(dictionary_path, "rb") as f:
+                    dictionary = zstandard.ZstdCompressionDict(f.read())
+                decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+            else:
+                decompressor = zstandard.ZstdDecompressor()
+            self.decompressors[key] = decompressor
+
+        record = decompressor.decompress(frame)
+        _, body = record.split(b"\r\n\r\n", 1)
+        return body[:-4].decode("utf-8", errors="replace")
+
+    async def get_page(self, url: str, at: Optional[datetime] = None) -> Optional[Dict]:
+        """Get the archived page for a URL as it was at a crawl time (latest by default)"""
+        if zstandard is None:
+            return None
+        query: Dict = {"url": url}
+        if at is not None:
+            query["fetched_at"] = {"$lte": at}
+        collection = database.get_database().html_archive
+        entry = await collection.find_one(query, sort=[("fetched_at", DESCENDING)])
+        if not entry:
+            return None
+        html = await asyncio.to_thread(self._read_record, entry)
+        return {"url": url, "fetched_at": entry["fetched_at"], "status": entry["status"], "html": html}
+
+    async def iter_pages(self, host: str, url_pattern: Optional[str] = None) -> AsyncIterator[Dict]:
+        """Iterate the latest archived version of every page of a host whose URL contains url_pattern"""
+        if zstandard is None:
+            return
+        collection = database.get_database().html_archive
+        match: Dict = {"host": host}
+        if url_pattern:
+            match["url"] = {"$regex": re.escape(url_pattern)}
+        pipeline = [
+            {"$match": match},
+            {"$sort": {"url": 1, "fetched_at": -1}},
+            {"$group": {"_id": "$url", "entry": {"$first": "$$ROOT"}}},
+        ]
+        async for group in collection.aggregate(pipeline, allowDiskUse=True):
+            entry = group["entry"]
+            html = await asyncio.to_thread(self._read_record, entry)
+            yield {"url": entry["url"], "fetched_at": entry["fetched_at"], "status": entry["status"], "html": html}
+
+    async def get_stats(self) -> List[Dict]:
+        """Raw vs stored bytes per host"""
+        collection = database.get_database().html_archive
+        pipeline = [
+            {"$group": {
+                "_id": "$host",
+                "pages": {"$sum": 1},
+                "raw_bytes": {"$sum": "$size"},
+            }},
+        ]
+        stats = []
+        async for row in collection.aggregate(pipeline, allowDiskUse=True):
+            directory = os.path.join(self.root, row["_id"])
+            stored = 0
+            if os.path.isdir(directory):
+                stored = sum(
+                    os.path.getsize(os.path.join(directory, name))
+                    for name in os.listdir(directory) if name.endswith(".warc.zst")
+                )
+            stats.append({
+                "host": row["_id"],
+                "pages": row["pages"],
+                "raw_bytes": row["raw_bytes"],
+                "stored_bytes": stored,
+                "compression_ratio": round(row["raw_bytes"] / stored, 1) if stored else None,
+            })
+        return stats
+
+    async def close(self):
+        """Flush every buffered page"""
+        if self._flush_tasks:
+            await asyncio.gather(*self._flush_tasks, return_exceptions=True)
+        for host, archive in list(self.domains.items()):
+            await self.flush(host)
+            if archive.buffer:
+                # The pages kept after a failed segment write get their retry
+                await self.flush(host)
+
+# Global HTML archive instance
+html_archive = HtmlArchive()
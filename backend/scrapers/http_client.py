@@ -0,0 +1,203 @@
+import importlib.util
+import logging
+import time
+from types import SimpleNamespace
+from typing import Dict, Iterable, Optional
+import aiohttp
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+def _new_host_metrics() -> Dict:
+    return {
+        "requests": 0,
+        "connections_created": 0,
+        "connections_reused": 0,
+        "handshake_time": 0.0,
+        "dns_cache_hits": 0,
+        "dns_cache_misses": 0,
+        "http2_responses": 0,
+    }
+
+class Http2Content:
+    """aiohttp-style body stream over an already-read httpx response"""
+
+    def __init__(self, body: bytes):
+        self.body = body
+
+    async def iter_chunked(self, size: int):
+        for start in range(0, len(self.body), size):
+            yield self.body[start:start + size]
+
+class Http2Response:
+    """The subset of aiohttp's ClientResponse used by the scrapers"""
+
+    def __init__(self, response):
+        self._response = response
+        self.status = response.status_code
+        self.headers = response.headers
+        self.http_version = response.http_version
+        self.content = Http2Content(response.content)
+
+    async def read(self) -> bytes:
+        return self._response.content
+
+    async def text(self) -> str:
+        return self._response.text
+
+class Http2RequestContext:
+    """Async context manager returned by Http2Session.get"""
+
+    def __init__(self, session: "Http2Session", url: str, headers: Optional[Dict[str, str]]):
+        self.session = session
+        self.url = url
+        # Connection-specific headers are not allowed over HTTP/2
+        self.headers = {k: v for k, v in (headers or {}).items() if k.lower() != 'connection'}
+
+    async def __aenter__(self) -> Http2Response:
+        response = await self.session.client.get(self.url, headers=self.headers)
+        metrics = self.session.metrics
+        metrics["requests"] += 1
+        if response.http_version == "HTTP/2":
+            metrics["http2_responses"] += 1
+        return Http2Response(response)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+class Http2Session:
+    """Minimal aiohttp-style facade over an HTTP/2-capable httpx client"""
+
+    def __init__(self, metrics: Dict):
+        import httpx
+        self.metrics = metrics
+        self.client = httpx.AsyncClient(
+            http2=True,
+            timeout=settings.HTTP_REQUEST_TIMEOUT,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_LIMIT_PER_HOST,
+                max_keepalive_connections=settings.HTTP_LIMIT_PER_HOST,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_TIMEOUT,
+            ),
+        )
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> Http2RequestContext:
+        return Http2RequestContext(self, url, headers)
+
+    @property
+    def closed(self) -> bool:
+        return self.client.is_closed
+
+    async def close(self):
+        await self.client.aclose()
+
+class HttpClientManager:
+    """Process-wide pool of long-lived HTTP sessions, one per host.
+
+    Sessions are shared by every job that crawls the same host, so keep-alive
+    connections, DNS results and TLS sessions survive across jobs and resumes.
+    The app lifespan owns the pool: it is closed on shutdown.
+    """
+
+    def __init__(self):
+        self.sessions: Dict[str, object] = {}
+        self.metrics: Dict[str, Dict] = {}
+        self.http2_available = importlib.util.find_spec("h2") is not None
+
+    def get_session(self, host: str):
+        """Get (or create) the shared session for a host"""
+        session = self.sessions.get(host)
+        if session is not None and not session.closed:
+            return session
+
+        metrics = self.metrics.setdefault(host, _new_host_metrics())
+        if host in settings.HTTP2_HOSTS and self.http2_available:
+            session = Http2Session(metrics)
+            logger.info(f"Created HTTP/2 client for {host}")
+        else:
+            if host in settings.HTTP2_HOSTS:
+                logger.warning(f"HTTP/2 requested for {host} but the h2 package is not installed, using HTTP/1.1")
+            session = self._create_aiohttp_session(metrics)
+            logger.info(f"Created HTTP client for {host}")
+
+        self.sessions[host] = session
+        return session
+
+    def _create_aiohttp_session(self, metrics: Dict) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=settings.HTTP_LIMIT_PER_HOST,
+            limit_per_host=settings.HTTP_LIMIT_PER_HOST,
+            ttl_dns_cache=settings.HTTP_DNS_CACHE_TTL,
+            keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+            enable_cleanup_closed=True,
+        )
+        timeout = aiohttp.ClientTimeout(total=settings.HTTP_REQUEST_TIMEOUT)
+        return aiohttp.ClientSession(
+            timeout=timeout,
+            connector=connector,
+            trace_configs=[self._create_trace_config(metrics)],
+        )
+
+    def _create_trace_config(self, metrics: Dict) -> aiohttp.TraceConfig:
+        """Count requests, new vs reused connections, handshake time and DNS cache use"""
+        trace_config = aiohttp.TraceConfig(trace_config_ctx_factory=lambda trace_request_ctx: SimpleNamespace())
+
+        async def on_request_start(session, ctx, params):
+            metrics["requests"] += 1
+
+        async def on_connection_create_start(session, ctx, params):
+            ctx.connection_started = time.monotonic()
+
+        async def on_connection_create_end(session, ctx, params):
+            metrics["connections_created"] += 1
+            started = getattr(ctx, "connection_started", None)
+            if started is not None:
+                metrics["handshake_time"] += time.monotonic() - started
+
+        async def on_connection_reuseconn(session, ctx, params):
+            metrics["connections_reused"] += 1
+
+        async def on_dns_cache_hit(session, ctx, params):
+            metrics["dns_cache_hits"] += 1
+
+        async def on_dns_cache_miss(session, ctx, params):
+            metrics["dns_cache_misses"] += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_start.append(on_connection_create_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace_config.on_dns_cache_hit.append(on_dns_cache_hit)
+        trace_config.on_dns_cache_miss.append(on_dns_cache_miss)
+        return trace_config
+
+    def get_stats(self, hosts: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+        """Connection reuse and handshake metrics per host"""
+        hosts = self.metrics.keys() if hosts is None else hosts
+        stats = {}
+        for host in hosts:
+            metrics = self.metrics.get(host)
+            if not metrics:
+                continue
+            acquired = metrics["connections_created"] + metrics["connections_reused"]
+            created = metrics["connections_created"]
+            stats[host] = {
+                **metrics,
+                "handshake_time": round(metrics["handshake_time"], 3),
+                "avg_handshake_time": round(metrics["handshake_time"] / created, 3) if created else None,
+                "connection_reuse_ratio": round(metrics["connections_reused"] / acquired, 3) if acquired else None,
+                "http2": isinstance(self.sessions.get(host), Http2Session),
+            }
+        return stats
+
+    async def close(self):
+        """Close every pooled session"""
+        for host, session in self.sessions.items():
+            if not session.closed:
+                await session.close()
+        self.sessions.clear()
+        logger.info("Closed shared HTTP clients")
+
+# Global HTTP client pool
+http_client_manager = HttpClientManager()
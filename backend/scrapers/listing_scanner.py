@@ -0,0 +1,160 @@
+"""
+Incremental link extraction for Yello listing pages without building a DOM.
+
+The scanner is fed raw response chunks as they arrive and tokenizes only the
+tags that matter (div, h3, a, script), keeping a stack of open div/h3 classes
+so it can reproduce the listing selector chain of the DOM parser:
+
+    div.company h3 a[href^="/company/"]
+    div.company .company_header a[href^="/company/"]
+    div.company a[href^="/company/"]
+    a[href^="/company/"]
+
+Scanning stops once the element holding the pagination arrows closes after the
+company cards, since nothing after it can change the result.
+"""
+
+import re
+import html
+from typing import List, Optional, Tuple
+from urllib.parse import urljoin
+
+TAG_PATTERN = re.compile(rb'<(/?)(a|div|h3|script)(?=[\s>/])([^>]*)>', re.I)
+CLASS_ATTR = re.compile(rb'\bclass\s*=\s*["\']([^"\']*)["\']', re.I)
+HREF_ATTR = re.compile(rb'\bhref\s*=\s*["\']([^"\']*)["\']', re.I)
+REL_ATTR = re.compile(rb'\brel\s*=\s*["\']([^"\']*)["\']', re.I)
+SCRIPT_END = re.compile(rb'</script\s*>', re.I)
+
+# Longest tag we expect to be split across chunks
+MAX_TAG_LENGTH = 4096
+
+def _attr(pattern, attrs: bytes) -> Optional[bytes]:
+    match = pattern.search(attrs)
+    return match.group(1) if match else None
+
+class ListingScanner:
+    """Streaming extractor of company links and the next-page marker"""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.buffer = bytearray()
+        self.pos = 0
+        self.in_script = False
+        # Open div/h3 elements as (tag, class tokens)
+        self.stack: List[Tuple[bytes, List[bytes]]] = []
+        self.div_depth = 0
+        # Candidate link lists, one per selector in the DOM chain
+        self.h3_links: List[bytes] = []
+        self.header_links: List[bytes] = []
+        self.company_links: List[bytes] = []
+        self.page_links: List[bytes] = []
+        self.has_next = False
+        self.pagination_depth: Optional[int] = None
+        self.done = False
+
+    def feed(self, chunk: bytes) -> bool:
+        """Scan a chunk of the response; returns True once the rest of the page is irrelevant"""
+        if self.done:
+            return True
+        # Drop what has been scanned already so only a partial tag is carried over
+        del self.buffer[:self.pos]
+        self.pos = 0
+        self.buffer.extend(chunk)
+
+        while not self.done:
+            if self.in_script:
+                match = SCRIPT_END.search(self.buffer, self.pos)
+                if match is None:
+                    self.pos = max(self.pos, len(self.buffer) - 16)
+                    return False
+                self.pos = match.end()
+                self.in_script = False
+
+            match = TAG_PATTERN.search(self.buffer, self.pos)
+            if match is None:
+                self.pos = max(self.pos, len(self.buffer) - MAX_TAG_LENGTH)
+                return False
+            self.pos = match.end()
+            self._handle_tag(match.group(1) == b'/', match.group(2).lower(), match.group(3))
+
+        return True
+
+    def _handle_tag(self, closing: bool, tag: bytes, attrs: bytes):
+        if tag == b'script':
+            self.in_script = not closing and not attrs.rstrip().endswith(b'/')
+        elif closing:
+            self._close(tag)
+        elif tag == b'a':
+            self._handle_link(attrs)
+        elif not attrs.rstrip().endswith(b'/'):
+            classes = (_attr(CLASS_ATTR, attrs) or b'').split()
+            self.stack.append((tag, classes))
+            if tag == b'div':
+                self.div_depth += 1
+
+    def _close(self, tag: bytes):
+        # Like html.parser, ignore end tags with no matching open element
+        if not any(open_tag == tag for open_tag, _ in self.stack):
+            return
+        while self.stack:
+            open_tag, _ = self.stack.pop()
+            if open_tag == b'div':
+                self.div_depth -= 1
+            if open_tag == tag:
+                break
+
+        if (
+            self.pagination_depth is not None
+            and self.div_depth < self.pagination_depth
+            and self.company_links
+        ):
+            self.done = True
+
+    def _inside(self, class_name: bytes, tag: Optional[bytes] = None) -> bool:
+        return any(
+            class_name in classes and (tag is None or open_tag == tag)
+            for open_tag, classes in self.stack
+        )
+
+    def _handle_link(self, attrs: bytes):
+        classes = (_attr(CLASS_ATTR, attrs) or b'').split()
+        if b'pages_arrow' in classes:
+            if _attr(REL_ATTR, attrs) == b'next':
+                self.has_next = True
+            # Only the pagination after the company cards marks the end of the list
+            if self.pagination_depth is None and self.company_links:
+                self.pagination_depth = self.div_depth
+
+        href = _attr(HREF_ATTR, attrs)
+        if not href or not href.startswith(b'/company/'):
+            return
+
+        self.page_links.append(href)
+        if not self._inside(b'company', b'div'):
+            return
+        self.company_links.append(href)
+        if any(open_tag == b'h3' for open_tag, _ in self.stack):
+            self.h3_links.append(href)
+        if self._inside(b'company_header'):
+            self.header_links.append(href)
+
+    def result(self) -> Optional[Tuple[List[str], bool]]:
+        """Business URLs and the next-page flag, or None if no company links were found"""
+        hrefs = self.h3_links or self.header_links or self.company_links or self.page_links
+        if not hrefs:
+            return None
+
+        business_urls = []
+        seen_urls = set()
+        for href in hrefs:
+            full_url = urljoin(self.base_url, html.unescape(href.decode('utf-8', errors='replace')))
+            if full_url not in seen_urls:
+                business_urls.append(full_url)
+                seen_urls.add(full_url)
+        return business_urls, self.has_next
+
+def scan_listing_page(body: bytes, base_url: str) -> Optional[Tuple[List[str], bool]]:
+    """Scan a complete listing page"""
+    scanner = ListingScanner(base_url)
+    scanner.feed(body)
+    return scanner.result()
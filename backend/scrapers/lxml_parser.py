@@ -0,0 +1,338 @@
+"""
+Fast-path parsing of Yello pages with lxml.
+
+Mirrors the BeautifulSoup implementation in yello_parser field by field, with
+CSS selectors compiled to XPath once at import and selector chains ordered by
+per-domain extraction plans. Returns None when a required field cannot be
+found so the caller can fall back to BeautifulSoup.
+"""
+
+import re
+from typing import List, Dict, Optional, Tuple
+from urllib.parse import urljoin
+from models.schemas import BusinessData
+from scrapers.extraction_plan import ExtractionPlans
+from utils.helpers import domain_host
+
+try:
+    import lxml.html
+    from lxml.etree import XPath
+    from lxml.cssselect import CSSSelector
+except ImportError:
+    lxml = None
+
+AVAILABLE = lxml is not None
+
+ADDRESS_SELECTORS = [
+    '#company_address',
+    'div.text.location #company_address',
+    'div.info div.text.location #company_address',
+    '.address',
+    'div:contains("Address:") + div',
+    '.location_links',
+    'div[id*="address"]',
+    'div.text.location div',
+]
+
+ADDRESS_FALLBACK_PATTERN = re.compile(r'\w+\s+(St|Street|Rd|Road|Ave|Avenue|Blvd|Boulevard|Al\s+\w+)', re.I)
+
+LISTING_SELECTORS = [
+    'div.company h3 a[href^="/company/"]',
+    'div.company .company_header a[href^="/company/"]',
+    'div.company a[href^="/company/"]',
+    'a[href^="/company/"]',
+]
+
+# Business link of a div.company listing card, in fallback order
+CARD_LINK_SELECTORS = [
+    'h3 a[href^="/company/"]',
+    '.company_header a[href^="/company/"]',
+    'a[href^="/company/"]',
+]
+
+# Fields a listing card shows besides the name
+CARD_FIELDS = {
+    "address": '.address',
+    "phone": 'a[href^="tel:"]',
+    "website": 'a[href*="/redir/"]',
+    "category": 'a[href^="/category/"]',
+}
+
+DIRECTIONS_SELECTORS = [
+    'a[href*="maps.google.com"][href*="daddr="], a[href*="Get Directions"]',
+    '.location_links a[href*="maps.google.com"]',
+]
+
+# Fields found through a selector chain, in declared (fallback) order
+EXTRACTION_SPECS = {
+    "listing_links": LISTING_SELECTORS,
+    "address": ADDRESS_SELECTORS,
+    "directions": DIRECTIONS_SELECTORS,
+}
+
+extraction_plans = ExtractionPlans(EXTRACTION_SPECS)
+
+# Selectors cssselect cannot compile faithfully, written as XPath by hand
+XPATH_SELECTORS = {
+    'div:contains("Address:") + div':
+        '//div[contains(string(.), "Address:")]/following-sibling::*[1][self::div]',
+}
+
+if AVAILABLE:
+    _selectors = {
+        css: XPath(XPATH_SELECTORS[css]) if css in XPATH_SELECTORS else CSSSelector(css, translator='html')
+        for css in ADDRESS_SELECTORS + LISTING_SELECTORS + DIRECTIONS_SELECTORS + CARD_LINK_SELECTORS + list(CARD_FIELDS.values()) + [
+            'div.company',
+            'a.pages_arrow[rel="next"]',
+            'h1',
+            'ul[itemtype*="BreadcrumbList"] li span[itemprop="name"]',
+            'div.text#company_name, .company_header h3',
+            'div.weblinks a[href*="/redir/"]',
+            '#open_hours ul',
+            'div.text.desc, .company_description',
+            'div.tags a[href^="/category/"]',
+            '.company_reviews',
+            '.rate',
+        ]
+    }
+
+def _select(node, css: str) -> List:
+    return _selectors[css](node)
+
+def _select_one(node, css: str):
+    matches = _selectors[css](node)
+    return matches[0] if matches else None
+
+def _text(node) -> str:
+    return node.text_content()
+
+def _has_class(node, class_name: str) -> bool:
+    return class_name in (node.get('class') or '').split()
+
+def _node_string(node) -> Optional[str]:
+    """Equivalent of BeautifulSoup's Tag.string: the text of a node with a single child"""
+    children = list(node)
+    if not children:
+        return node.text
+    if len(children) == 1 and not node.text and not children[0].tail and isinstance(children[0].tag, str):
+        return _node_string(children[0])
+    return None
+
+def _index_labels(root) -> Dict[str, object]:
+    """Map each div.label's text to the first such div, in one pass over the page"""
+    labels = {}
+    for div in root.iter('div'):
+        if _has_class(div, 'label'):
+            string = _node_string(div)
+            if string is not None:
+                labels.setdefault(string, div)
+    return labels
+
+def _next_text_sibling(node):
+    for sibling in node.itersiblings('div'):
+        if _has_class(sibling, 'text'):
+            return sibling
+    return None
+
+def _find_link(node, href_prefix: str):
+    for link in node.iter('a'):
+        href = link.get('href')
+        if href and href.startswith(href_prefix):
+            return link
+    return None
+
+def _extract_contact_info(root, labels: Dict, href_prefix: str, label: str) -> Optional[str]:
+    contact_div = labels.get(label)
+    if contact_div is not None:
+        text_div = _next_text_sibling(contact_div)
+        if text_div is not None:
+            link = _find_link(text_div, href_prefix)
+            if link is not None:
+                return _text(link).strip()
+
+    link = _find_link(root, href_prefix)
+    if link is not None:
+        return _text(link).strip()
+    return None
+
+def _extract_text_by_label(labels: Dict, label: str) -> Optional[str]:
+    label_div = labels.get(label)
+    if label_div is not None:
+        text_div = _next_text_sibling(label_div)
+        if text_div is not None:
+            return _text(text_div).strip()
+    return None
+
+def _extract_working_hours(root) -> Optional[Dict[str, str]]:
+    hours_list = _select_one(root, '#open_hours ul')
+    if hours_list is None:
+        return None
+
+    working_hours = {}
+    for li in hours_list.iter('li'):
+        text = _text(li).strip()
+        if ':' in text:
+            day, hours = text.split(':', 1)
+            working_hours[day.strip()] = hours.strip()
+    return working_hours if working_hours else None
+
+def parse_business_listings(html: str, base_url: str) -> Optional[Tuple[List[str], bool]]:
+    """Extract business URLs and the next-page flag, or None if no company links were found"""
+    root = lxml.html.document_fromstring(html)
+
+    business_links = extraction_plans.first_hit(
+        domain_host(base_url), "listing_links", lambda css: _select(root, css) or None
+    )
+    if not business_links:
+        return None
+
+    business_urls = []
+    seen_urls = set()
+    for link in business_links:
+        href = link.get('href')
+        if href:
+            full_url = urljoin(base_url, href)
+            if full_url not in seen_urls:
+                business_urls.append(full_url)
+                seen_urls.add(full_url)
+
+    has_next = bool(_select(root, 'a.pages_arrow[rel="next"]'))
+    return business_urls, has_next
+
+def _clean_text(node) -> Optional[str]:
+    if node is None:
+        return None
+    return ' '.join(_text(node).split()) or None
+
+def parse_listing_cards(html: str, base_url: str) -> Optional[Tuple[List[Dict], bool]]:
+    """Extract businesses from the div.company cards of a listing page, or None if there are none"""
+    root = lxml.html.document_fromstring(html)
+
+    cards = []
+    seen_urls = set()
+    for card in _select(root, 'div.company'):
+        link = next((match for css in CARD_LINK_SELECTORS for match in _select(card, css)), None)
+        if link is None:
+            continue
+        page_url = urljoin(base_url, link.get('href'))
+        if page_url in seen_urls:
+            continue
+        seen_urls.add(page_url)
+        fields = {field: _clean_text(_select_one(card, css)) for field, css in CARD_FIELDS.items()}
+        cards.append({"page_url": page_url, "name": _clean_text(link) or "", **fields})
+    if not cards:
+        return None
+
+    has_next = bool(_select(root, 'a.pages_arrow[rel="next"]'))
+    return cards, has_next
+
+def parse_business_details(html: str, business_url: str, domain: str) -> Optional[BusinessData]:
+    """Extract a business from its detail page, or None if required fields are missing"""
+    root = lxml.html.document_fromstring(html)
+    host = domain_host(domain)
+
+    title_tag = _select_one(root, 'h1')
+    title = _text(title_tag).strip() if title_tag is not None else ""
+
+    breadcrumb = _select(root, 'ul[itemtype*="BreadcrumbList"] li span[itemprop="name"]')
+    country = _text(breadcrumb[0]).strip() if len(breadcrumb) > 0 else ""
+    city = _text(breadcrumb[1]).strip() if len(breadcrumb) > 1 else ""
+    category = _text(breadcrumb[2]).strip() if len(breadcrumb) > 2 else ""
+
+    name_tag = _select_one(root, 'div.text#company_name, .company_header h3')
+    name = _text(name_tag).strip() if name_tag is not None else title.split(' - ')[0] if ' - ' in title else title
+
+    # Required fields: without them the page is not on the known template
+    if not name or not country:
+        return None
+
+    coordinates = None
+    directions_link = extraction_plans.first_hit(host, "directions", lambda css: _select_one(root, css))
+    if directions_link is not None:
+        href = directions_link.get('href')
+        if href:
+            match = re.search(r'daddr=([0-9.-]+),([0-9.-]+)', href)
+            if match:
+                coordinates = {"lat": float(match.group(1)), "lng": float(match.group(2))}
+
+    labels = _index_labels(root)
+    phone = _extract_contact_info(root, labels, 'tel:', 'Phone')
+    mobile = _extract_contact_info(root, labels, 'tel:', 'Mobile phone')
+    fax = _extract_text_by_label(labels, 'Fax')
+
+    website_link = _select_one(root, 'div.weblinks a[href*="/redir/"]')
+    website = _text(website_link).strip() if website_link is not None else None
+
+    def extract_address(css: str) -> Optional[str]:
+        address_div = _select_one(root, css)
+        if address_div is not None:
+            address_text = _text(address_div).strip()
+            if address_text and len(address_text) > 5 and not address_text.lower() in ['view map', 'get directions']:
+                return ' '.join(address_text.split())
+        return None
+
+    address = extraction_plans.first_hit(host, "address", extract_address)
+
+    if not address:
+        for div in root.iter('div'):
+            string = _node_string(div)
+            if string and ADDRESS_FALLBACK_PATTERN.search(string):
+                address = _text(div).strip()
+                break
+
+    working_hours = _extract_working_hours(root)
+
+    description_div = _select_one(root, 'div.text.desc, .company_description')
+    description = _text(description_div).strip() if description_div is not None else None
+
+    tags = []
+    for tag_link in _select(root, 'div.tags a[href^="/category/"]'):
+        tag_text = _text(tag_link).strip()
+        if tag_text:
+            tags.append(tag_text)
+
+    reviews_count = 0
+    rating = None
+    rating_div = _select_one(root, '.company_reviews')
+    if rating_div is not None:
+        rating_text = _select_one(rating_div, '.rate')
+        if rating_text is not None:
+            try:
+                rating = float(_text(rating_text).strip())
+            except ValueError:
+                pass
+        match = re.search(r'(\d+)\s+Reviews?', _text(rating_div))
+        if match:
+            reviews_count = int(match.group(1))
+
+    established_year = None
+    established_text = _extract_text_by_label(labels, 'Established')
+    if established_text:
+        match = re.search(r'(\d{4})', established_text)
+        if match:
+            established_year = int(match.group(1))
+
+    employees = _extract_text_by_label(labels, 'Employees')
+
+    return BusinessData(
+        title=title,
+        name=name,
+        country=country,
+        city=city,
+        category=category,
+        coordinates=coordinates,
+        phone=phone,
+        mobile=mobile,
+        fax=fax,
+        website=website,
+        address=address,
+        working_hours=working_hours,
+        description=description,
+        tags=tags,
+        reviews_count=reviews_count,
+        rating=rating,
+        established_year=established_year,
+        employees=employees,
+        page_url=business_url,
+        domain=domain
+    )
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Tuple
+from models.schemas import BusinessData
+from scrapers.yello_parser import parse_business_listings, parse_business_details, parse_listing_cards
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+def decode_html(body: bytes) -> str:
+    """Decode a raw response body; Yello sites serve UTF-8"""
+    return body.decode("utf-8", errors="replace")
+
+def parse_listings_worker(body: bytes, base_url: str) -> Tuple[List[str], bool]:
+    """Parse a listing page (runs in a worker process)"""
+    return parse_business_listings(decode_html(body), base_url)
+
+def parse_cards_worker(body: bytes, base_url: str) -> Tuple[List[Dict], bool]:
+    """Parse the business cards of a listing page (runs in a worker process)"""
+    return parse_listing_cards(decode_html(body), base_url)
+
+def parse_details_worker(body: bytes, business_url: str, domain: str) -> Dict:
+    """Parse a business page into a plain dict (runs in a worker process)"""
+    business = parse_business_details(decode_html(body), business_url, domain)
+    # exclude_unset keeps the dict round-trippable into an identical BusinessData
+    return business.model_dump(exclude_unset=True)
+
+class ParsePool:
+    """Persistent process pool that keeps HTML parsing off the event loop.
+
+    Raw response bytes go in and plain Python data comes out, so the only work
+    left on the loop is pickling. With PARSE_IN_PROCESS_POOL disabled pages are
+    parsed inline, which is useful to compare event-loop blocking before/after.
+    """
+
+    def __init__(self):
+        self.executor: ProcessPoolExecutor = None
+        self.stats = {
+            "pages_parsed": 0,
+            "offloaded": 0,
+            "inline": 0,
+            "inline_parse_time": 0.0,
+            "offloaded_wait_time": 0.0,
+            "pool_restarts": 0,
+        }
+
+    @property
+    def workers(self) -> int:
+        return settings.PARSE_POOL_WORKERS or os.cpu_count() or 1
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            logger.info(f"Started HTML parse pool with {self.workers} processes")
+        return self.executor
+
+    async def _run(self, func, *args):
+        self.stats["pages_parsed"] += 1
+        if not settings.PARSE_IN_PROCESS_POOL:
+            start = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                self.stats["inline"] += 1
+                self.stats["inline_parse_time"] += time.perf_counter() - start
+
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM): replace the pool and retry once
+            logger.warning("HTML parse pool broke, restarting it")
+            self.stats["pool_restarts"] += 1
+            self.executor = None
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.stats["offloaded"] += 1
+            self.stats["offloaded_wait_time"] += time.perf_counter() - start
+
+    async def parse_listings(self, body: bytes, base_url: str) -> Tuple[List[str], bool]:
+        """Extract business URLs and the next-page flag from a listing page"""
+        return await self._run(parse_listings_worker, body, base_url)
+
+    async def parse_listing_cards(self, body: bytes, base_url: str) -> Tuple[List[Dict], bool]:
+        """Extract business cards and the next-page flag from a listing page"""
+        return await self._run(parse_cards_worker, body, base_url)
+
+    async def parse_details(self, body: bytes, business_url: str, domain: str) -> BusinessData:
+        """Extract a business from its detail page"""
+        return BusinessData(**await self._run(parse_details_worker, body, business_url, domain))
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            "inline_parse_time": round(self.stats["inline_parse_time"], 3),
+            "offloaded_wait_time": round(self.stats["offloaded_wait_time"], 3),
+            "workers": self.workers,
+            "enabled": settings.PARSE_IN_PROCESS_POOL,
+        }
+
+    def shutdown(self):
+        """Stop the worker processes; parses that have not started are dropped"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+# Global parse pool instance
+parse_pool = ParsePool()
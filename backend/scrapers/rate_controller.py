@@ -0,0 +1,234 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Deque, Dict, Iterable, Optional
+from config import settings
+from utils.redis_client import shared_rates
+
+logger = logging.getLogger(__name__)
+
+# Markers of anti-bot interstitials served with a 200 status
+CAPTCHA_MARKERS = [
+    b'g-recaptcha',
+    b'h-captcha',
+    b'cf-challenge',
+    b'cf_chl_',
+    b'captcha-form',
+    b'are you a robot',
+    b'unusual traffic',
+]
+
+# Status codes that mean the host wants us to slow down
+THROTTLE_STATUS_CODES = {429, 503}
+
+def is_captcha_page(body: Optional[bytes]) -> bool:
+    """Check whether a page looks like a captcha / bot challenge"""
+    if not body:
+        return False
+    # Challenge pages are small; only scan the head of large documents
+    sample = body[:20000].lower()
+    return any(marker in sample for marker in CAPTCHA_MARKERS)
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+def worker_processes() -> int:
+    """Processes the request limits are split between: all scraper workers in worker mode, else 1"""
+    if settings.SCRAPER_MODE != "worker":
+        return 1
+    return max(1, settings.WORKER_PROCESS_COUNT)
+
+def local_rate_share() -> float:
+    """Share of a host's rate this process may use; all of it when tokens come from Redis"""
+    return 1.0 if shared_rates() else 1.0 / worker_processes()
+
+class HostRateState:
+    """Token bucket with AIMD rate adjustment for a single host"""
+
+    def __init__(self, host: str, initial_rate: float):
+        self.host = host
+        self.rate = min(max(initial_rate, settings.RATE_MIN_PER_HOST), settings.RATE_MAX_PER_HOST)
+        self.tokens = 1.0
+        self.last_refill = time.monotonic()
+        self.blocked_until = 0.0
+        self.last_decrease = 0.0
+        self.latency_ewma: Optional[float] = None
+        self.latency_baseline: Optional[float] = None
+        self.outcomes: Deque[bool] = deque(maxlen=settings.RATE_ERROR_WINDOW)
+        self.requests = 0
+        self.throttle_events = 0
+
+    def _refill(self, now: float):
+        elapsed = now - self.last_refill
+        self.last_refill = now
+        self.tokens = min(settings.RATE_BURST, self.tokens + elapsed * self.rate * local_rate_share())
+
+    def reserve(self) -> float:
+        """Take a token if available, otherwise return how long to wait for one"""
+        now = time.monotonic()
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self._refill(now)
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / (self.rate * local_rate_share())
+
+    def increase(self):
+        """Additive increase after a healthy response"""
+        self.rate = min(settings.RATE_MAX_PER_HOST, self.rate + settings.RATE_ADDITIVE_INCREASE)
+
+    def decrease(self, reason: str):
+        """Multiplicative decrease, at most once per cooldown window"""
+        now = time.monotonic()
+        self.throttle_events += 1
+        if now - self.last_decrease < settings.RATE_DECREASE_COOLDOWN:
+            return
+        self.last_decrease = now
+        old_rate = self.rate
+        self.rate = max(settings.RATE_MIN_PER_HOST, self.rate * settings.RATE_DECREASE_FACTOR)
+        self.tokens = min(self.tokens, 0.0)
+        logger.info(f"🐢 Backing off {self.host} ({reason}): {old_rate:.2f} -> {self.rate:.2f} req/s")
+
+    def observe_latency(self, latency: float) -> bool:
+        """Update latency averages and report whether this sample is a spike"""
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+            self.latency_baseline = latency
+            return False
+
+        self.latency_ewma = 0.8 * self.latency_ewma + 0.2 * latency
+        # Baseline follows improvements immediately and degradations slowly
+        if self.latency_ewma < self.latency_baseline:
+            self.latency_baseline = self.latency_ewma
+        else:
+            self.latency_baseline = 0.99 * self.latency_baseline + 0.01 * self.latency_ewma
+
+        return (
+            latency > settings.RATE_LATENCY_SPIKE_MIN
+            and latency > self.latency_baseline * settings.RATE_LATENCY_SPIKE_FACTOR
+        )
+
+    def stats(self) -> Dict:
+        """Snapshot of the live rate for status reporting"""
+        errors = sum(1 for ok in self.outcomes if not ok)
+        blocked_for = max(0.0, self.blocked_until - time.monotonic())
+        return {
+            "rate": round(self.rate, 3),
+            "delay": round(1.0 / self.rate, 3),
+            "error_rate": round(errors / len(self.outcomes), 3) if self.outcomes else 0.0,
+            "latency": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            "requests": self.requests,
+            "throttle_events": self.throttle_events,
+            "blocked_for": round(blocked_for, 1),
+        }
+
+class RateController:
+    """Process-wide adaptive rate limiter keyed by host.
+
+    Every request waits for a token from its host's bucket. Healthy responses
+    raise the refill rate additively; 429/503 responses, captcha pages, timeouts
+    and latency spikes cut it multiplicatively, and Retry-After blocks the host
+    until the requested time.
+    """
+
+    def __init__(self):
+        self.hosts: Dict[str, HostRateState] = {}
+
+    def configure(self, host: str, initial_delay: float):
+        """Seed a host's rate from a job's request_delay if the host is not tracked yet"""
+        if host not in self.hosts:
+            initial_rate = 1.0 / max(initial_delay, 1.0 / settings.RATE_MAX_PER_HOST)
+            self.hosts[host] = HostRateState(host, initial_rate)
+
+    def set_delay(self, host: str, delay: float):
+        """Reset a host's rate to an explicit delay (e.g. a job settings change)"""
+        rate = 1.0 / max(delay, 1.0 / settings.RATE_MAX_PER_HOST)
+        state = self._get_state(host)
+        state.rate = min(max(rate, settings.RATE_MIN_PER_HOST), settings.RATE_MAX_PER_HOST)
+        logger.info(f"Rate for {host} set to {state.rate:.2f} req/s")
+
+    def _get_state(self, host: str) -> HostRateState:
+        if host not in self.hosts:
+            self.configure(host, settings.REQUEST_DELAY)
+        return self.hosts[host]
+
+    def try_acquire(self, host: str) -> float:
+        """Take a token from the host's bucket if one is ready, otherwise return the wait"""
+        state = self._get_state(host)
+        wait = state.reserve()
+        if wait <= 0:
+            state.requests += 1
+        return wait
+
+    async def acquire(self, host: str):
+        """Wait until the host's bucket allows another request"""
+        state = self._get_state(host)
+        while True:
+            wait = state.reserve()
+            if wait <= 0:
+                state.requests += 1
+                return
+            await asyncio.sleep(wait)
+
+    def record_response(
+        self,
+        host: str,
+        status: int,
+        latency: float,
+        retry_after: Optional[str] = None,
+        captcha: bool = False
+    ):
+        """Feed a completed response back into the host's rate"""
+        state = self._get_state(host)
+        spike = state.observe_latency(latency)
+
+        retry_seconds = parse_retry_after(retry_after)
+        if retry_seconds:
+            retry_seconds = min(retry_seconds, settings.RATE_MAX_RETRY_AFTER)
+            state.blocked_until = max(state.blocked_until, time.monotonic() + retry_seconds)
+            logger.warning(f"⏸️  {host} asked us to retry after {retry_seconds:.0f}s")
+
+        if status in THROTTLE_STATUS_CODES or captcha:
+            state.outcomes.append(False)
+            state.decrease("captcha" if captcha else f"HTTP {status}")
+        elif status >= 500:
+            state.outcomes.append(False)
+        elif spike:
+            state.outcomes.append(True)
+            state.decrease(f"latency spike {latency:.1f}s")
+        else:
+            state.outcomes.append(True)
+            state.increase()
+
+    def record_failure(self, host: str, latency: float):
+        """Feed a timeout or connection failure back into the host's rate"""
+        state = self._get_state(host)
+        state.outcomes.append(False)
+        state.decrease(f"request failed after {latency:.1f}s")
+
+    def current_rate(self, host: str) -> float:
+        """Requests per second currently allowed for a host"""
+        return self._get_state(host).rate
+
+    def get_stats(self, hosts: Iterable[str]) -> Dict[str, Dict]:
+        """Live rate, delay and error rate for the given hosts"""
+        return {host: self.hosts[host].stats() for host in hosts if host in self.hosts}
+
+# Global rate controller instance
+rate_controller = RateController()
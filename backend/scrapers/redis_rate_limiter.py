@@ -0,0 +1,53 @@
+import asyncio
+import logging
+from config import settings
+from utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Token bucket per host, refilled at the rate the caller passes in. Runs inside
+# Redis so every node of the cluster draws from the same bucket; returns the
+# seconds to wait (as a string, Lua numbers would be truncated to integers).
+TOKEN_BUCKET_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], 3600)
+return tostring(wait)
+"""
+
+class RedisRateLimiter:
+    """Per-host request tokens shared by all scraper nodes through Redis.
+
+    The local AIMD controller still decides how fast a host may be crawled;
+    this bucket makes that rate hold for the cluster as a whole instead of per
+    node.
+    """
+
+    def __init__(self):
+        self.script = None
+
+    async def acquire(self, host: str, rate: float):
+        """Wait until the cluster-wide bucket of a host allows another request"""
+        if self.script is None:
+            self.script = get_redis().register_script(TOKEN_BUCKET_SCRIPT)
+        while True:
+            wait = float(await self.script(keys=[f"rate:{host}"], args=[rate, settings.RATE_BURST]))
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+# Global Redis rate limiter instance
+redis_rate_limiter = RedisRateLimiter()
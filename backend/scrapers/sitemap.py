@@ -0,0 +1,74 @@
+"""
+Sitemap discovery for Yello sites: robots.txt, sitemap indexes and urlsets.
+
+Sitemaps are parsed incrementally with ElementTree's iterparse, straight from
+the (possibly gzipped) response body, so a 50,000-URL company sitemap never
+becomes a full tree in memory. Namespaces are ignored: only local tag names
+(sitemap, url, loc, lastmod) matter.
+"""
+
+import gzip
+import io
+import re
+import xml.etree.ElementTree as ElementTree
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+SITEMAP_LINE = re.compile(r'^\s*sitemap\s*:\s*(\S+)', re.I | re.M)
+
+# (loc, lastmod) of a child sitemap or a page
+SitemapEntry = Tuple[str, Optional[datetime]]
+
+def parse_robots_sitemaps(robots_txt: str) -> List[str]:
+    """Sitemap URLs declared in a robots.txt, in order"""
+    sitemaps = []
+    for url in SITEMAP_LINE.findall(robots_txt):
+        if url not in sitemaps:
+            sitemaps.append(url)
+    return sitemaps
+
+def parse_lastmod(value: Optional[str]) -> Optional[datetime]:
+    """Parse a W3C datetime (2024-05-01, 2024-05-01T10:00:00+04:00) into naive UTC"""
+    if not value:
+        return None
+    value = value.strip().replace('Z', '+00:00')
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def _local(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1]
+
+def parse_sitemap(body: bytes) -> Tuple[List[SitemapEntry], List[SitemapEntry]]:
+    """Parse a sitemap index or urlset. Returns (child sitemaps, page URLs)"""
+    if body[:2] == b'\x1f\x8b':
+        stream = gzip.GzipFile(fileobj=io.BytesIO(body))
+    else:
+        stream = io.BytesIO(body)
+
+    sitemaps: List[SitemapEntry] = []
+    urls: List[SitemapEntry] = []
+    loc = lastmod = None
+    try:
+        for _, element in ElementTree.iterparse(stream, events=("end",)):
+            tag = _local(element.tag)
+            if tag == "loc":
+                loc = (element.text or "").strip()
+            elif tag == "lastmod":
+                lastmod = parse_lastmod(element.text)
+            elif tag in ("sitemap", "url"):
+                if loc:
+                    (sitemaps if tag == "sitemap" else urls).append((loc, lastmod))
+                loc = lastmod = None
+                element.clear()
+    except (ElementTree.ParseError, OSError, EOFError):
+        # Truncated or not a sitemap: keep what was read
+        pass
+    return sitemaps, urls
+
+def is_company_url(url: str) -> bool:
+    return "/company/" in url
@@ -0,0 +1,326 @@
+"""
+HTML parsing for Yello business directory pages.
+
+These functions are pure (HTML in, data out) so pages can be parsed without a
+network session, e.g. when replaying the raw HTML archive.
+"""
+
+from bs4 import BeautifulSoup
+import re
+import logging
+from typing import List, Dict, Optional, Tuple
+from urllib.parse import urljoin
+from models.schemas import BusinessData
+from scrapers import lxml_parser
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+def parse_business_listings_bs4(html: str, base_url: str) -> Tuple[List[str], bool]:
+    """Extract business URLs and the next-page flag from a city listing page (BeautifulSoup)"""
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    business_urls = []
+    # Find business links in company divs - try multiple selectors in order of preference
+    
+    # Primary selector: header links (most common and reliable)
+    business_links = soup.select('div.company h3 a[href^="/company/"]')
+    
+    # If primary selector found links, use those
+    if business_links:
+        logger.debug(f"Found {len(business_links)} business links using primary selector (h3)")
+    else:
+        # Fallback 1: company header links without h3 requirement  
+        business_links = soup.select('div.company .company_header a[href^="/company/"]')
+        if business_links:
+            logger.debug(f"Found {len(business_links)} business links using header selector")
+        else:
+            # Fallback 2: any company link within a company div (includes logo links)
+            business_links = soup.select('div.company a[href^="/company/"]')
+            if business_links:
+                logger.debug(f"Found {len(business_links)} business links using general selector")
+            else:
+                # Final fallback: any company link on the page
+                business_links = soup.select('a[href^="/company/"]')
+                logger.debug(f"Found {len(business_links)} business links using page-wide selector")
+    
+    # Extract unique URLs to avoid duplicates (in case there are multiple links to same company)
+    seen_urls = set()
+    for link in business_links:
+        href = link.get('href')
+        if href:
+            full_url = urljoin(base_url, href)
+            if full_url not in seen_urls:
+                business_urls.append(full_url)
+                seen_urls.add(full_url)
+    
+    # Check for next page
+    has_next = bool(soup.select('a.pages_arrow[rel="next"]'))
+    
+    logger.debug(f"Found {len(business_urls)} businesses on listing page")
+    return business_urls, has_next
+
+def parse_listing_cards_bs4(html: str, base_url: str) -> Tuple[List[Dict], bool]:
+    """Extract businesses from the div.company cards of a listing page (BeautifulSoup)"""
+    soup = BeautifulSoup(html, 'html.parser')
+
+    def clean_text(tag) -> Optional[str]:
+        if tag is None:
+            return None
+        return ' '.join(tag.get_text().split()) or None
+
+    cards = []
+    seen_urls = set()
+    for card in soup.select('div.company'):
+        link = next((match for css in lxml_parser.CARD_LINK_SELECTORS for match in card.select(css)), None)
+        if link is None:
+            continue
+        page_url = urljoin(base_url, link.get('href'))
+        if page_url in seen_urls:
+            continue
+        seen_urls.add(page_url)
+        fields = {field: clean_text(card.select_one(css)) for field, css in lxml_parser.CARD_FIELDS.items()}
+        cards.append({"page_url": page_url, "name": clean_text(link) or "", **fields})
+
+    has_next = bool(soup.select('a.pages_arrow[rel="next"]'))
+    logger.debug(f"Found {len(cards)} business cards on listing page")
+    return cards, has_next
+
+def parse_business_details_bs4(html: str, business_url: str, domain: str) -> BusinessData:
+    """Extract detailed business information from a business page"""
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # Extract title
+    title_tag = soup.select_one('h1')
+    title = title_tag.get_text().strip() if title_tag else ""
+    logger.debug(f"Extracted title: {title}")
+    
+    # Extract breadcrumb info (country, city, category)
+    breadcrumb = soup.select('ul[itemtype*="BreadcrumbList"] li span[itemprop="name"]')
+    country = breadcrumb[0].get_text().strip() if len(breadcrumb) > 0 else ""
+    city = breadcrumb[1].get_text().strip() if len(breadcrumb) > 1 else ""
+    category = breadcrumb[2].get_text().strip() if len(breadcrumb) > 2 else ""
+    logger.debug(f"Extracted location: {country}, {city}, {category}")
+    
+    # Extract business name
+    name_tag = soup.select_one('div.text#company_name, .company_header h3')
+    name = name_tag.get_text().strip() if name_tag else title.split(' - ')[0] if ' - ' in title else title
+    logger.debug(f"Extracted name: {name}")
+    
+    # Extract coordinates from directions link
+    coordinates = None
+    # Look for Google Maps directions link with coordinates
+    directions_link = soup.select_one('a[href*="maps.google.com"][href*="daddr="], a[href*="Get Directions"]')
+    if not directions_link:
+        # Try alternative selectors for the directions link
+        directions_link = soup.select_one('.location_links a[href*="maps.google.com"]')
+    
+    if directions_link:
+        href = directions_link.get('href')
+        if href:
+            # Extract coordinates from the daddr parameter
+            match = re.search(r'daddr=([0-9.-]+),([0-9.-]+)', href)
+            if match:
+                coordinates = {
+                    "lat": float(match.group(1)),
+                    "lng": float(match.group(2))
+                }
+                logger.debug(f"Extracted coordinates: {coordinates} from {href}")
+            else:
+                logger.debug(f"No coordinates found in directions link: {href}")
+        else:
+            logger.debug("Directions link found but no href attribute")
+    
+    # Extract contact information
+    phone = _extract_contact_info(soup, 'tel:', 'Phone')
+    mobile = _extract_contact_info(soup, 'tel:', 'Mobile phone')
+    fax = _extract_text_by_label(soup, 'Fax')
+    
+    # Extract website
+    website_link = soup.select_one('div.weblinks a[href*="/redir/"]')
+    website = None
+    if website_link:
+        website = website_link.get_text().strip()
+    
+    # Extract address
+    address = None
+    # Try multiple selectors for address in order of specificity
+    address_selectors = [
+        '#company_address',  # Most specific - from your example
+        'div.text.location #company_address',  # Full path
+        'div.info div.text.location #company_address',  # Even more specific
+        '.address',  # Generic class
+        'div:contains("Address:") + div',  # Label-based
+        '.location_links',  # Container
+        'div[id*="address"]',  # Any div with "address" in ID
+        'div.text.location div',  # Any div inside location
+    ]
+    
+    for selector in address_selectors:
+        address_div = soup.select_one(selector)
+        if address_div:
+            address_text = address_div.get_text().strip()
+            # Clean up the address and validate it
+            if address_text and len(address_text) > 5 and not address_text.lower() in ['view map', 'get directions']:
+                # Remove extra whitespace and newlines
+                address = ' '.join(address_text.split())
+                logger.debug(f"Extracted address using selector '{selector}': {address}")
+                break
+    
+    if not address:
+        # Fallback: look for any text that looks like an address
+        all_text_divs = soup.find_all('div', string=re.compile(r'\w+\s+(St|Street|Rd|Road|Ave|Avenue|Blvd|Boulevard|Al\s+\w+)', re.I))
+        if all_text_divs:
+            address = all_text_divs[0].get_text().strip()
+            logger.debug(f"Extracted address from fallback: {address}")
+    
+    # Extract working hours
+    working_hours = _extract_working_hours(soup)
+    
+    # Extract description
+    description_div = soup.select_one('div.text.desc, .company_description')
+    description = description_div.get_text().strip() if description_div else None
+    
+    # Extract tags/categories
+    tags = []
+    tag_links = soup.select('div.tags a[href^="/category/"]')
+    for tag_link in tag_links:
+        tag_text = tag_link.get_text().strip()
+        if tag_text:
+            tags.append(tag_text)
+    
+    # Extract reviews and rating
+    reviews_count = 0
+    rating = None
+    rating_div = soup.select_one('.company_reviews')
+    if rating_div:
+        rating_text = rating_div.select_one('.rate')
+        if rating_text:
+            try:
+                rating = float(rating_text.get_text().strip())
+            except ValueError:
+                pass
+        
+        reviews_text = rating_div.get_text()
+        match = re.search(r'(\d+)\s+Reviews?', reviews_text)
+        if match:
+            reviews_count = int(match.group(1))
+    
+    # Extract establishment year
+    established_year = None
+    established_text = _extract_text_by_label(soup, 'Established')
+    if established_text:
+        match = re.search(r'(\d{4})', established_text)
+        if match:
+            established_year = int(match.group(1))
+    
+    # Extract employees
+    employees = _extract_text_by_label(soup, 'Employees')
+    
+    business_data = BusinessData(
+        title=title,
+        name=name,
+        country=country,
+        city=city,
+        category=category,
+        coordinates=coordinates,
+        phone=phone,
+        mobile=mobile,
+        fax=fax,
+        website=website,
+        address=address,
+        working_hours=working_hours,
+        description=description,
+        tags=tags,
+        reviews_count=reviews_count,
+        rating=rating,
+        established_year=established_year,
+        employees=employees,
+        page_url=business_url,
+        domain=domain
+    )
+    
+    logger.debug(f"Successfully scraped business: {name} with coordinates: {coordinates}")
+    return business_data
+
+
+def _extract_contact_info(soup: BeautifulSoup, href_prefix: str, label: str) -> Optional[str]:
+    """Extract contact information by href prefix and label"""
+    # Try to find by label first
+    contact_div = soup.find('div', class_='label', string=label)
+    if contact_div:
+        text_div = contact_div.find_next_sibling('div', class_='text')
+        if text_div:
+            link = text_div.find('a', href=lambda x: x and x.startswith(href_prefix))
+            if link:
+                return link.get_text().strip()
+    
+    # Fallback: search for any link with the prefix
+    link = soup.find('a', href=lambda x: x and x.startswith(href_prefix))
+    if link:
+        return link.get_text().strip()
+    
+    return None
+
+def _extract_text_by_label(soup: BeautifulSoup, label: str) -> Optional[str]:
+    """Extract text content by label"""
+    label_div = soup.find('div', class_='label', string=label)
+    if label_div:
+        text_div = label_div.find_next_sibling('div', class_='text')
+        if text_div:
+            return text_div.get_text().strip()
+    return None
+
+def _extract_working_hours(soup: BeautifulSoup) -> Optional[Dict[str, str]]:
+    """Extract working hours information"""
+    hours_div = soup.select_one('#open_hours ul')
+    if not hours_div:
+        return None
+    
+    working_hours = {}
+    for li in hours_div.find_all('li'):
+        text = li.get_text().strip()
+        if ':' in text:
+            parts = text.split(':', 1)
+            if len(parts) == 2:
+                day = parts[0].strip()
+                hours = parts[1].strip()
+                working_hours[day] = hours
+    
+    return working_hours if working_hours else None
+
+def _use_fast_path() -> bool:
+    return settings.PARSER_BACKEND == "lxml" and lxml_parser.AVAILABLE
+
+def parse_business_listings(html: str, base_url: str) -> Tuple[List[str], bool]:
+    """Extract business URLs and the next-page flag, falling back to BeautifulSoup"""
+    if _use_fast_path():
+        try:
+            result = lxml_parser.parse_business_listings(html, base_url)
+            if result is not None:
+                return result
+        except Exception as e:
+            logger.debug(f"lxml listing parse failed, falling back to BeautifulSoup: {e}")
+    return parse_business_listings_bs4(html, base_url)
+
+def parse_business_details(html: str, business_url: str, domain: str) -> BusinessData:
+    """Extract a business from its detail page, falling back to BeautifulSoup"""
+    if _use_fast_path():
+        try:
+            business = lxml_parser.parse_business_details(html, business_url, domain)
+            if business is not None:
+                return business
+        except Exception as e:
+            logger.debug(f"lxml detail parse failed for {business_url}, falling back to BeautifulSoup: {e}")
+    return parse_business_details_bs4(html, business_url, domain)
+
+def parse_listing_cards(html: str, base_url: str) -> Tuple[List[Dict], bool]:
+    """Extract businesses from listing cards, falling back to BeautifulSoup"""
+    if _use_fast_path():
+        try:
+            result = lxml_parser.parse_listing_cards(html, base_url)
+            if result is not None:
+                return result
+        except Exception as e:
+            logger.debug(f"lxml card parse failed, falling back to BeautifulSoup: {e}")
+    return parse_listing_cards_bs4(html, base_url)
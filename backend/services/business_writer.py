@@ -0,0 +1,124 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from models.database import database
+from models.schemas import BusinessData
+from utils.helpers import business_key
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
+
+# Outcome of a buffered business after a flush
+INSERTED = "inserted"
+EXISTING = "existing"
+FAILED = "failed"
+
+class BusinessWriter:
+    """Write-behind buffer that saves scraped businesses in bulk upserts.
+
+    Businesses are keyed by domain + Yello company id, and each flush is one
+    unordered bulk_write of $setOnInsert upserts, so replays and concurrent
+    writers never create duplicates. Callers pass an opaque context with each
+    business; after every flush on_flush receives (context, outcome) pairs,
+    where the outcome is INSERTED, EXISTING (already saved) or FAILED (not
+    persisted, to be retried by the caller).
+    """
+
+    def __init__(self, on_flush: Optional[Callable[[List[Tuple[Any, str]]], Awaitable[None]]] = None):
+        self.on_flush = on_flush
+        self.buffer: List[Tuple[Dict, Any]] = []
+        self.lock = asyncio.Lock()
+        self.task: Optional[asyncio.Task] = None
+        self.closing = False
+        self.stats = {"flushes": 0, "inserted": 0, "existing": 0, "failed": 0}
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._flush_periodically())
+
+    async def _flush_periodically(self):
+        # The flag also ends the loop if a cancellation is lost inside a flush
+        while not self.closing:
+            await asyncio.sleep(settings.BUSINESS_WRITE_FLUSH_INTERVAL)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Periodic business flush failed: {e}")
+
+    async def add(self, business: BusinessData, context: Any = None):
+        """Buffer a business; flushes inline once the batch is full"""
+        # exclude_unset keeps the insert shape identical to the old insert_one path
+        doc = business.model_dump(by_alias=True, exclude_unset=True)
+        if doc.get('_id') is None:
+            doc.pop('_id', None)
+        doc["business_key"] = business_key(business.domain, business.page_url)
+        self.buffer.append((doc, context))
+
+        if len(self.buffer) >= settings.BUSINESS_WRITE_BATCH_SIZE:
+            await self.flush()
+
+    async def flush(self):
+        """Write everything buffered so far"""
+        async with self.lock:
+            if not self.buffer:
+                return
+            batch, self.buffer = self.buffer, []
+            results = await self._write(batch)
+
+        if self.on_flush:
+            await self.on_flush(results)
+
+    async def _write(self, batch: List[Tuple[Dict, Any]]) -> List[Tuple[Any, str]]:
+        collection = database.get_database().businesses
+        operations = [
+            UpdateOne({"business_key": doc["business_key"]}, {"$setOnInsert": doc}, upsert=True)
+            for doc, _ in batch
+        ]
+
+        inserted = set()
+        failed = set()
+        try:
+            result = await collection.bulk_write(operations, ordered=False)
+            inserted.update(result.upserted_ids.keys())
+        except BulkWriteError as e:
+            inserted.update(upsert["index"] for upsert in e.details.get("upserted", []))
+            for error in e.details.get("writeErrors", []):
+                if error.get("code") == DUPLICATE_KEY_ERROR:
+                    # Lost a race with another writer, or an older document without
+                    # a business_key has the same (domain, page_url): already saved
+                    logger.debug(f"Business already exists: {batch[error['index']][0]['page_url']}")
+                else:
+                    failed.add(error["index"])
+                    logger.error(f"❌ Database save failed for {batch[error['index']][0]['page_url']}: {error.get('errmsg')}")
+        except Exception as e:
+            logger.error(f"❌ Bulk save of {len(batch)} businesses failed: {e}")
+            failed.update(range(len(batch)))
+
+        self.stats["flushes"] += 1
+        self.stats["inserted"] += len(inserted)
+        self.stats["failed"] += len(failed)
+        self.stats["existing"] += len(batch) - len(inserted) - len(failed)
+        logger.info(f"💾 Saved {len(inserted)}/{len(batch)} new businesses in one bulk write")
+
+        def outcome(index: int) -> str:
+            if index in inserted:
+                return INSERTED
+            return FAILED if index in failed else EXISTING
+
+        return [(context, outcome(index)) for index, (_, context) in enumerate(batch)]
+
+    async def close(self):
+        """Stop the periodic flusher and write whatever is left"""
+        self.closing = True
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        await self.flush()
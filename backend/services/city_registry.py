@@ -0,0 +1,109 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from models.database import database
+from models.schemas import CityData
+from scrapers.base_scraper import get_scraper
+from scrapers.crawl_scheduler import crawl_flow
+from scrapers.http_client import http_client_manager
+from utils.helpers import domain_host
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Scheduler flow of census requests
+CENSUS_FLOW = "census"
+
+def registry_key(domain: str) -> str:
+    """Registry key of a domain: its host without www., so bare hosts and URLs of a site match"""
+    host = domain_host(domain).lower()
+    return host[4:] if host.startswith("www.") else host
+
+class CityRegistry:
+    """Persisted cities of each domain, with the business counts their sites show.
+
+    One city_registry document per domain (keyed by registry_key) holds its
+    discovered cities and when they were discovered. Jobs take their cities
+    from here while the entry is younger than CITY_REGISTRY_TTL_DAYS, so
+    starting or resuming a job costs no discovery request. Only cities read
+    from the site are registered: when discovery falls back to a domain's
+    guessed common cities, an existing entry (however old) is used instead,
+    and the guess is not kept.
+    """
+
+    async def get_entry(self, domain: str) -> Optional[Dict]:
+        """Registry entry of a domain, if it was ever discovered"""
+        return await database.get_database().city_registry.find_one({"domain": registry_key(domain)}, {"_id": 0})
+
+    def is_fresh(self, entry: Optional[Dict]) -> bool:
+        if entry is None:
+            return False
+        return datetime.utcnow() - entry["discovered_at"] < timedelta(days=settings.CITY_REGISTRY_TTL_DAYS)
+
+    def _cities(self, entry: Dict) -> List[CityData]:
+        return [CityData(domain=entry["city_domain"], **city) for city in entry["cities"]]
+
+    async def get_cities(self, domain: str, scraper) -> List[CityData]:
+        """Cities of a domain from the registry, rediscovered once the entry is stale"""
+        entry = await self.get_entry(domain)
+        if self.is_fresh(entry):
+            logger.info(f"🗺️  {len(entry['cities'])} cities of {domain} from the city registry")
+            return self._cities(entry)
+
+        cities, discovered = await self.discover(domain, scraper)
+        if not discovered and entry is not None:
+            logger.warning(f"City discovery failed for {domain}, using its registry entry of {entry['discovered_at']}")
+            return self._cities(entry)
+        return cities
+
+    async def discover(self, domain: str, scraper) -> Tuple[List[CityData], bool]:
+        """Discover a domain's cities and register them if they were read from the site"""
+        cities, discovered = await scraper.discover_cities()
+        if discovered and cities:
+            await database.get_database().city_registry.update_one(
+                {"domain": registry_key(domain)},
+                {"$set": {
+                    "city_domain": cities[0].domain,
+                    "cities": [{"name": city.name, "url": city.url, "business_count": city.business_count} for city in cities],
+                    "city_count": len(cities),
+                    "business_count": sum(city.business_count for city in cities),
+                    "discovered_at": datetime.utcnow(),
+                }},
+                upsert=True
+            )
+        return cities, discovered
+
+    async def census(self, domains: List[str], force: bool = False) -> Dict[str, Dict]:
+        """Discover cities and counts of many domains concurrently; fresh entries are kept unless forced"""
+        semaphore = asyncio.Semaphore(max(1, settings.CITY_CENSUS_CONCURRENCY))
+        crawl_flow.set(CENSUS_FLOW)
+
+        async def take(domain: str) -> Tuple[str, Dict]:
+            async with semaphore:
+                entry = await self.get_entry(domain)
+                if not force and self.is_fresh(entry):
+                    return domain, {"status": "fresh", "cities": entry["city_count"], "businesses": entry["business_count"]}
+                try:
+                    scraper = get_scraper(domain, http_client_manager.get_session(domain_host(domain)))
+                    cities, discovered = await self.discover(domain, scraper)
+                except Exception as e:
+                    logger.error(f"Census of {domain} failed: {e}")
+                    return domain, {"status": "failed", "error": str(e)}
+                if not discovered:
+                    return domain, {"status": "not_found"}
+                return domain, {
+                    "status": "discovered",
+                    "cities": len(cities),
+                    "businesses": sum(city.business_count for city in cities),
+                }
+
+        results = dict(await asyncio.gather(*[take(domain) for domain in domains]))
+        counts = {}
+        for result in results.values():
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+        logger.info(f"🗺️  City census of {len(domains)} domains: {counts}")
+        return results
+
+# Global city registry instance
+city_registry = CityRegistry()
@@ -0,0 +1,364 @@
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+from models.database import database
+from utils.helpers import listing_page_url
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Work unit kinds and states
+LISTING = "listing"
+DETAIL = "detail"
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+
+def next_listing_pages(unit: Dict, has_next: bool, last_page: Optional[int] = None) -> List[int]:
+    """Listing pages a completed listing unit leads to.
+
+    A city whose last page is known (estimated or probed) is sharded into one
+    unit per page up front; pages inside that range lead nowhere, and only the
+    last one continues page by page if the site has more than expected.
+    """
+    page = unit["page"]
+    if last_page is not None and last_page > page:
+        return list(range(page + 1, last_page + 1))
+    if has_next and page >= unit.get("last_page", page):
+        return [page + 1]
+    return []
+
+class CrawlFrontier:
+    """Persisted work units of one job on one domain.
+
+    Listing units are city listing pages, detail units are business URLs; both
+    live in the crawl_frontier collection with a state of pending, leased or
+    done. Work is claimed by leasing units atomically, and a unit is only done
+    once its result is persisted (the next pages and detail units for a listing,
+    the saved business for a detail), so a restart resumes exactly: leases of
+    the previous run are released and completed units are never fetched again.
+    A city's listing units are its own pages or, for deep cities, the pages of
+    its category listings; it is listed once none of them is left open.
+    """
+
+    def __init__(self, job_id: str, domain: str):
+        self.job_id = job_id
+        self.domain = domain
+        # Detail units created by this run carry its id, so page progress is only
+        # tracked for them and not for units carried over from an earlier run
+        self.run_id = uuid.uuid4().hex
+
+    @property
+    def collection(self):
+        return database.get_database().crawl_frontier
+
+    def _claimable(self, kind: str, now: datetime) -> Dict:
+        return {
+            "job_id": self.job_id,
+            "domain": self.domain,
+            "kind": kind,
+            "$or": [
+                {"state": PENDING},
+                {"state": LEASED, "lease_expires_at": {"$lt": now}},
+            ],
+        }
+
+    def _new_unit(self, kind: str, url: str, city_index: int, city: str, page: int, **extra) -> Dict:
+        return {
+            "job_id": self.job_id,
+            "domain": self.domain,
+            "kind": kind,
+            "url": url,
+            "city_index": city_index,
+            "city": city,
+            "page": page,
+            "state": PENDING,
+            "attempts": 0,
+            "lease_expires_at": None,
+            "created_at": datetime.utcnow(),
+            **extra,
+        }
+
+    async def _insert_units(self, units: List[Dict]) -> int:
+        """Insert units, ignoring ones that already exist; returns the number inserted"""
+        if not units:
+            return 0
+        try:
+            result = await self.collection.insert_many(units, ordered=False)
+            return len(result.inserted_ids)
+        except BulkWriteError as e:
+            return e.details.get("nInserted", 0)
+
+    async def has_units(self) -> bool:
+        return await self.collection.find_one(
+            {"job_id": self.job_id, "domain": self.domain}, {"_id": 1}
+        ) is not None
+
+    async def seed(self, cities: List, start_city_index: int = 0, start_page: int = 1, **extra):
+        """Create the first listing unit of every city (from a legacy resume point if given)"""
+        units = []
+        for city_index, city in enumerate(cities[start_city_index:], start=start_city_index):
+            page = start_page if city_index == start_city_index else 1
+            units.append(self._new_unit(
+                LISTING, listing_page_url(city.url, page), city_index, city.name, page,
+                city_url=city.url, city_count=len(cities), business_count=city.business_count, **extra
+            ))
+        inserted = await self._insert_units(units)
+        logger.info(f"🗺️  Seeded frontier for {self.domain} with {inserted} city listing units")
+
+    async def reset(self):
+        """Drop all units, so the job's next run crawls the domain from scratch"""
+        result = await self.collection.delete_many({"job_id": self.job_id, "domain": self.domain})
+        logger.info(f"🧹 Cleared {result.deleted_count} frontier units of {self.domain}")
+
+    async def expire(self):
+        """Let the units of a completed job expire after FRONTIER_RETENTION_DAYS"""
+        expire_at = datetime.utcnow() + timedelta(days=settings.FRONTIER_RETENTION_DAYS)
+        await self.collection.update_many(
+            {"job_id": self.job_id, "domain": self.domain},
+            {"$set": {"expire_at": expire_at}}
+        )
+
+    async def release_leases(self) -> int:
+        """Return units leased by a previous run of this job to pending"""
+        result = await self.collection.update_many(
+            {"job_id": self.job_id, "domain": self.domain, "state": LEASED},
+            {"$set": {"state": PENDING, "lease_expires_at": None}}
+        )
+        if result.modified_count:
+            logger.info(f"🔄 Released {result.modified_count} leased frontier units for job {self.job_id}")
+        return result.modified_count
+
+    async def claim_listing(self) -> Optional[Dict]:
+        """Lease the next listing page in crawl order (city by city, page by page)"""
+        now = datetime.utcnow()
+        return await self.collection.find_one_and_update(
+            self._claimable(LISTING, now),
+            {
+                "$set": {
+                    "state": LEASED,
+                    "lease_expires_at": now + timedelta(seconds=settings.FRONTIER_LEASE_SECONDS),
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("city_index", 1), ("page", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def renew_lease(self, unit: Dict) -> bool:
+        """Extend the lease of a claimed unit; False if it expired and was claimed again"""
+        # Every claim counts an attempt, so an unchanged count means the lease is still ours
+        result = await self.collection.update_one(
+            {"_id": unit["_id"], "state": LEASED, "attempts": unit["attempts"]},
+            {"$set": {"lease_expires_at": datetime.utcnow() + timedelta(seconds=settings.FRONTIER_LEASE_SECONDS)}}
+        )
+        return result.modified_count > 0
+
+    async def listings_in_flight(self) -> int:
+        """Listing pages leased and not yet completed"""
+        return await self.collection.count_documents({
+            "job_id": self.job_id,
+            "domain": self.domain,
+            "kind": LISTING,
+            "state": LEASED,
+        })
+
+    async def complete_listing(
+        self,
+        unit: Dict,
+        detail_urls: List[str],
+        has_next: bool,
+        last_page: Optional[int] = None,
+        partitions: Optional[List[Tuple[str, str]]] = None,
+        carry: Optional[Dict] = None
+    ) -> int:
+        """Persist a listing page's results, then mark it done; returns new detail units.
+
+        With a last_page, the listing's following pages up to it are added at
+        once. With partitions (category, url), the city continues as the first
+        pages of those listings instead of its own next page. Fields in carry
+        are set on the following pages (or partitions).
+        """
+        inserted = await self.add_details(unit, detail_urls)
+        await self._insert_units(self._next_listings(unit, has_next, last_page, partitions, carry or {}))
+        await self.collection.update_one(
+            {"_id": unit["_id"]},
+            {"$set": {
+                "state": DONE,
+                "lease_expires_at": None,
+                "completed_at": datetime.utcnow(),
+                "new_businesses": len(detail_urls),
+                "has_next": has_next,
+            }}
+        )
+        return inserted
+
+    async def add_details(self, unit: Dict, detail_urls: List[str]) -> int:
+        """Add detail units for business URLs of a listing unit's page; returns the number added"""
+        return await self._insert_units([
+            self._new_unit(
+                DETAIL, url, unit["city_index"], unit["city"], unit["page"],
+                run_id=self.run_id, listing_url=unit["url"]
+            )
+            for url in detail_urls
+        ])
+
+    async def end_listing(self, unit: Dict, page: int) -> int:
+        """Drop the pending pages of a unit's listing (city or category) after its real last page"""
+        result = await self.collection.update_many(
+            {
+                "job_id": self.job_id,
+                "domain": self.domain,
+                "kind": LISTING,
+                "state": PENDING,
+                "city_index": unit["city_index"],
+                "city_url": unit["city_url"],
+                "page": {"$gt": page},
+            },
+            {"$set": {"state": DONE, "has_next": False, "skipped": True, "completed_at": datetime.utcnow()}}
+        )
+        return result.modified_count
+
+    async def city_listed(self, city_index: int) -> bool:
+        """Whether all listing pages of a city are done"""
+        return await self.collection.find_one(
+            {
+                "job_id": self.job_id,
+                "domain": self.domain,
+                "kind": LISTING,
+                "state": {"$in": [PENDING, LEASED]},
+                "city_index": city_index,
+            },
+            {"_id": 1}
+        ) is None
+
+    def _next_listings(
+        self,
+        unit: Dict,
+        has_next: bool,
+        last_page: Optional[int],
+        partitions: Optional[List[Tuple[str, str]]],
+        carry: Dict
+    ) -> List[Dict]:
+        """Listing units that follow a completed listing unit"""
+        if partitions:
+            return [
+                self._new_unit(
+                    LISTING, url, unit["city_index"], unit["city"], 1,
+                    city_url=url, city_count=unit.get("city_count"), partition=category,
+                    **({"sitemap": True} if unit.get("sitemap") else {}), **carry
+                )
+                for category, url in partitions
+            ]
+        pages = next_listing_pages(unit, has_next, last_page)
+        shard_end = {"last_page": pages[-1]} if pages and (last_page is not None or "last_page" in unit) else {}
+        partition = {"partition": unit["partition"]} if "partition" in unit else {}
+        return [
+            self._new_unit(
+                LISTING, listing_page_url(unit["city_url"], page),
+                unit["city_index"], unit["city"], page,
+                city_url=unit["city_url"], city_count=unit.get("city_count"), **shard_end, **partition, **carry
+            )
+            for page in pages
+        ]
+
+    async def uncounted_cities(self) -> List[Dict]:
+        """Cities whose listing pages are all done but whose completion was never checkpointed"""
+        cursor = self.collection.aggregate([
+            {"$match": {"job_id": self.job_id, "domain": self.domain, "kind": LISTING}},
+            {"$group": {
+                "_id": "$city_index",
+                "city": {"$first": "$city"},
+                "open": {"$sum": {"$cond": [{"$eq": ["$state", DONE]}, 0, 1]}},
+                "counted": {"$sum": {"$cond": [{"$eq": ["$city_completed", True]}, 1, 0]}},
+            }},
+            {"$match": {"open": 0, "counted": 0}},
+            {"$sort": {"_id": 1}},
+        ])
+        return [{"city_index": doc["_id"], "city": doc["city"]} async for doc in cursor]
+
+    async def mark_city_completed(self, city_index: int, city: str) -> bool:
+        """Record a checkpointed city; False if it was already recorded"""
+        # The flag lives on the city's first listing unit, so recording it is atomic
+        first = await self.collection.find_one(
+            {"job_id": self.job_id, "domain": self.domain, "kind": LISTING, "city_index": city_index},
+            {"_id": 1},
+            sort=[("page", 1)]
+        )
+        if first is None:
+            return False
+        result = await self.collection.update_one(
+            {"_id": first["_id"], "city_completed": {"$ne": True}},
+            {"$set": {"city_completed": True}}
+        )
+        return result.modified_count > 0
+
+    async def claim_details(self, limit: int) -> List[Dict]:
+        """Atomically lease up to `limit` detail units.
+
+        Candidate ids are leased with a unique token in one update_many that
+        re-checks their state, so concurrent claimers never get the same unit.
+        """
+        now = datetime.utcnow()
+        candidates = [
+            doc["_id"] async for doc in self.collection.find(
+                self._claimable(DETAIL, now), {"_id": 1}
+            ).sort([("city_index", 1), ("page", 1)]).limit(limit)
+        ]
+        if not candidates:
+            return []
+
+        token = uuid.uuid4().hex
+        await self.collection.update_many(
+            {"_id": {"$in": candidates}, **self._claimable(DETAIL, now)},
+            {
+                "$set": {
+                    "state": LEASED,
+                    "lease_token": token,
+                    "lease_expires_at": now + timedelta(seconds=settings.FRONTIER_LEASE_SECONDS),
+                },
+                "$inc": {"attempts": 1},
+            }
+        )
+        return [doc async for doc in self.collection.find({"lease_token": token, "state": LEASED})]
+
+    async def complete_details(self, unit_ids: List):
+        """Mark detail units done once their businesses are persisted"""
+        if unit_ids:
+            await self.collection.update_many(
+                {"_id": {"$in": unit_ids}},
+                {"$set": {"state": DONE, "lease_expires_at": None, "completed_at": datetime.utcnow()}}
+            )
+
+    async def fail_detail(self, unit: Dict) -> bool:
+        """Return a failed detail unit for retry; gives up (returns True) after FRONTIER_MAX_ATTEMPTS"""
+        final = unit.get("attempts", 0) >= settings.FRONTIER_MAX_ATTEMPTS
+        if final:
+            update = {"state": DONE, "failed": True, "lease_expires_at": None, "completed_at": datetime.utcnow()}
+        else:
+            update = {"state": PENDING, "lease_expires_at": None}
+        await self.collection.update_one({"_id": unit["_id"]}, {"$set": update})
+        return final
+
+    async def remaining_details(self) -> int:
+        """Detail units that are not done yet (pending or leased)"""
+        return await self.collection.count_documents({
+            "job_id": self.job_id,
+            "domain": self.domain,
+            "kind": DETAIL,
+            "state": {"$in": [PENDING, LEASED]},
+        })
+
+async def get_frontier_stats(job_id: str) -> Dict[str, Dict[str, int]]:
+    """Unit counts per kind and state for a job"""
+    stats: Dict[str, Dict[str, int]] = {}
+    cursor = database.get_database().crawl_frontier.aggregate([
+        {"$match": {"job_id": job_id}},
+        {"$group": {"_id": {"kind": "$kind", "state": "$state"}, "count": {"$sum": 1}}},
+    ])
+    async for row in cursor:
+        stats.setdefault(row["_id"]["kind"], {})[row["_id"]["state"]] = row["count"]
+    return stats
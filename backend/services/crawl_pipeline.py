@@ -0,0 +1,230 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+from models.database import database
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+class JobControl:
+    """In-process control channel for a running job.
+
+    pause_job, cancel_job and update_job_settings post messages here instead of
+    the crawl polling the job document: ("stop", status) ends the crawl after a
+    final checkpoint, ("settings", {...}) is applied to the live pipeline. Every
+    domain pipeline of the job subscribes its own message queue.
+    """
+
+    def __init__(self):
+        self.subscribers: List[asyncio.Queue] = []
+        self.stopping = False
+        # Status the job was stopped with (None when the process is shutting down)
+        self.stop_status: Optional[str] = None
+
+    def subscribe(self) -> asyncio.Queue:
+        messages: asyncio.Queue = asyncio.Queue()
+        if self.stopping:
+            messages.put_nowait(("stop", self.stop_status))
+        self.subscribers.append(messages)
+        return messages
+
+    def unsubscribe(self, messages: asyncio.Queue):
+        if messages in self.subscribers:
+            self.subscribers.remove(messages)
+
+    def _publish(self, message: Tuple[str, Any]):
+        for messages in self.subscribers:
+            messages.put_nowait(message)
+
+    def request_stop(self, status: Optional[str] = None):
+        if not self.stopping:
+            self.stopping = True
+            self.stop_status = status
+            self._publish(("stop", status))
+
+    def update_settings(self, job_settings: Dict[str, Any]):
+        self._publish(("settings", job_settings))
+
+def minute_bucket(timestamp: datetime) -> datetime:
+    """Start of the minute a timestamp falls in"""
+    return timestamp.replace(second=0, microsecond=0)
+
+class ProgressCheckpointer:
+    """Coalesce job progress into one job-document update per interval.
+
+    Counters are accumulated as $inc and the resume checkpoint as $set on the
+    job document. Throughput is pre-aggregated into per-minute buckets in the
+    job_throughput collection (one upsert per minute touched), which expire
+    after PROGRESS_RETENTION_DAYS. A flush happens every
+    PROGRESS_CHECKPOINT_INTERVAL seconds or PROGRESS_CHECKPOINT_PAGES pages,
+    and on close.
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.increments: Dict[str, int] = defaultdict(int)
+        self.fields: Dict[str, Any] = {}
+        # (domain, minute) -> throughput counters
+        self.buckets: Dict[Tuple[str, datetime], Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.pages = 0
+        self.last_flush = time.monotonic()
+        self.lock = asyncio.Lock()
+        self.task: Optional[asyncio.Task] = None
+        self.closing = False
+        self.flushes = 0
+
+    def inc(self, field: str, amount: int = 1):
+        self.increments[field] += amount
+
+    def set(self, fields: Dict[str, Any]):
+        self.fields.update(fields)
+
+    def record(self, domain: str, timestamp: Optional[datetime] = None, **counts: int):
+        """Add throughput counts to the minute bucket of a domain"""
+        bucket = self.buckets[(domain, minute_bucket(timestamp or datetime.utcnow()))]
+        for field, amount in counts.items():
+            bucket[field] += amount
+        self.pages += counts.get("pages", 0)
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._flush_periodically())
+
+    async def _flush_periodically(self):
+        # The flag also ends the loop if a cancellation is lost inside a flush
+        while not self.closing:
+            await asyncio.sleep(settings.PROGRESS_CHECKPOINT_INTERVAL)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Progress checkpoint for job {self.job_id} failed: {e}")
+
+    async def maybe_flush(self):
+        """Flush if the time or page interval has elapsed"""
+        if (
+            self.pages >= settings.PROGRESS_CHECKPOINT_PAGES
+            or time.monotonic() - self.last_flush >= settings.PROGRESS_CHECKPOINT_INTERVAL
+        ):
+            await self.flush()
+
+    async def flush(self):
+        """Write the accumulated progress as one job update plus one bucket upsert batch"""
+        async with self.lock:
+            self.last_flush = time.monotonic()
+            if not (self.increments or self.fields or self.buckets):
+                return
+            increments, fields, buckets = dict(self.increments), self.fields, self.buckets
+            self.increments, self.fields = defaultdict(int), {}
+            self.buckets, self.pages = defaultdict(lambda: defaultdict(int)), 0
+
+            db = database.get_database()
+            update = {}
+            if increments:
+                update["$inc"] = increments
+            if fields:
+                update["$set"] = fields
+            if update:
+                await db.scraping_jobs.update_one({"_id": ObjectId(self.job_id)}, update)
+            if buckets:
+                await db.job_throughput.bulk_write([
+                    UpdateOne(
+                        {"job_id": self.job_id, "domain": domain, "minute": minute},
+                        {"$inc": dict(counts)},
+                        upsert=True
+                    )
+                    for (domain, minute), counts in buckets.items()
+                ], ordered=False)
+            self.flushes += 1
+
+    async def close(self):
+        """Stop the periodic flush and write the final checkpoint"""
+        self.closing = True
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        await self.flush()
+
+class PageProgressTracker:
+    """Track completion of listing pages whose businesses are scraped out of order.
+
+    The listing producer registers each page (keyed by its URL, as a city's
+    category listings have pages of their own) with the number of business URLs
+    it queued, and detail workers report every finished URL. A page is complete
+    once all of its URLs are done, but checkpoints are only released in the
+    order pages were registered so that a restart never skips unfinished work.
+    """
+
+    def __init__(self):
+        # listing page URL -> page state
+        self.pages: Dict[str, Dict] = {}
+        # Crawl-ordered events: page states and end-of-city markers
+        self.order: Deque[Dict] = deque()
+
+    def register_page(
+        self,
+        listing_url: str,
+        city_index: int,
+        city_name: str,
+        page: int,
+        businesses_found: int,
+        new_businesses: int,
+        has_next: bool
+    ):
+        """Record a listing page and the number of detail URLs queued for it"""
+        state = {
+            "type": "page",
+            "listing_url": listing_url,
+            "city_index": city_index,
+            "city": city_name,
+            "page": page,
+            "businesses_found": businesses_found,
+            "new_businesses": new_businesses,
+            "pending": new_businesses,
+            "businesses_scraped": 0,
+            "has_next": has_next,
+        }
+        self.pages[listing_url] = state
+        self.order.append(state)
+
+    def finish_city(self, city_index: int, city_name: str):
+        """Mark that the producer will not register any more pages for a city"""
+        self.order.append({
+            "type": "city",
+            "city_index": city_index,
+            "city": city_name,
+            "pending": 0,
+        })
+
+    def complete_item(self, listing_url: str, saved: bool):
+        """Record a finished detail URL for a page"""
+        state = self.pages.get(listing_url)
+        if state is None:
+            logger.warning(f"Completed item for unregistered page {listing_url}")
+            return
+        state["pending"] -= 1
+        if saved:
+            state["businesses_scraped"] += 1
+
+    def pop_completed(self) -> List[Dict]:
+        """Return the leading run of completed events in crawl order"""
+        completed = []
+        while self.order and self.order[0]["pending"] <= 0:
+            event = self.order.popleft()
+            if event["type"] == "page":
+                self.pages.pop(event["listing_url"], None)
+            completed.append(event)
+        return completed
+
+    @property
+    def pages_in_flight(self) -> int:
+        """Number of registered pages that have not been checkpointed yet"""
+        return len(self.pages)
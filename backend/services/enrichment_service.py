@@ -0,0 +1,166 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from models.database import database
+from models.schemas import BusinessData, Completeness
+from scrapers.base_scraper import get_scraper
+from scrapers.crawl_scheduler import crawl_scheduler, crawl_flow
+from scrapers.http_client import http_client_manager
+from services.reextraction_service import NON_EXTRACTED_FIELDS
+from utils.helpers import domain_host
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Scheduler flow of all enrichment requests
+ENRICHMENT_FLOW = "enrichment"
+
+class EnrichmentService:
+    """Fill in businesses saved from listing cards with their detail pages.
+
+    Businesses with completeness "listing" are the queue: a run leases them a
+    batch at a time (enrich_after), fetches their detail pages in the
+    scheduler's enrichment flow, whose weight ENRICHMENT_WEIGHT keeps it
+    behind crawl jobs, and sets the extracted fields with completeness
+    "detail". Leases expire, so a stopped run's businesses are picked up by
+    the next one, and a business is given up after FRONTIER_MAX_ATTEMPTS.
+    """
+
+    def __init__(self):
+        # domain -> (run_id, task)
+        self.active_runs: Dict[str, tuple] = {}
+
+    async def start_run(self, domain: str) -> str:
+        """Start enriching a domain in the background, unless it is already running here"""
+        if domain in self.active_runs:
+            return self.active_runs[domain][0]
+
+        db = database.get_database()
+        run = {
+            "domain": domain,
+            "status": "running",
+            "businesses_enriched": 0,
+            "businesses_failed": 0,
+            "started_at": datetime.utcnow(),
+            "completed_at": None,
+            "error": None,
+        }
+        result = await db.enrichment_runs.insert_one(run)
+        run_id = str(result.inserted_id)
+
+        task = asyncio.create_task(self._execute_run(run_id, domain))
+        self.active_runs[domain] = (run_id, task)
+        logger.info(f"🧩 Started enrichment run {run_id} for {domain}")
+        return run_id
+
+    async def get_run(self, run_id: str) -> Optional[Dict]:
+        """Get the status and counters of an enrichment run, with the businesses still to enrich"""
+        db = database.get_database()
+        run = await db.enrichment_runs.find_one({"_id": ObjectId(run_id)})
+        if run:
+            run["businesses_remaining"] = await db.businesses.count_documents(
+                {"domain": run["domain"], "completeness": Completeness.LISTING}
+            )
+        return run
+
+    async def shutdown(self):
+        """Stop all runs; their leased businesses are retried once the leases expire"""
+        for _, task in list(self.active_runs.values()):
+            task.cancel()
+        await asyncio.gather(*[task for _, task in self.active_runs.values()], return_exceptions=True)
+
+    async def _execute_run(self, run_id: str, domain: str):
+        """Lease and enrich batches until no listing-only business is left"""
+        runs_collection = database.get_database().enrichment_runs
+        # Requests of this run (and its tasks) go through the low-weight flow
+        crawl_flow.set(ENRICHMENT_FLOW)
+        crawl_scheduler.set_weight(ENRICHMENT_FLOW, settings.ENRICHMENT_WEIGHT)
+        scraper = get_scraper(domain, http_client_manager.get_session(domain_host(domain)))
+        semaphore = asyncio.Semaphore(max(1, settings.ENRICHMENT_CONCURRENCY))
+
+        async def enrich(business: Dict) -> Optional[BusinessData]:
+            async with semaphore:
+                try:
+                    return await scraper.scrape_business_details(business["page_url"])
+                except Exception as e:
+                    logger.warning(f"Enrichment of {business['page_url']} failed: {e}")
+                    return None
+
+        status = "completed"
+        try:
+            while True:
+                batch = await self._lease_batch(domain)
+                if not batch:
+                    break
+                results = await asyncio.gather(*[enrich(business) for business in batch])
+                await self._apply(run_id, batch, results)
+            logger.info(f"🧩 Enrichment run {run_id} for {domain} completed")
+        except asyncio.CancelledError:
+            status = "stopped"
+            raise
+        except Exception as e:
+            status = "failed"
+            logger.error(f"Error in enrichment run {run_id}: {e}")
+            await runs_collection.update_one({"_id": ObjectId(run_id)}, {"$set": {"error": str(e)}})
+        finally:
+            self.active_runs.pop(domain, None)
+            await runs_collection.update_one(
+                {"_id": ObjectId(run_id)},
+                {"$set": {"status": status, "completed_at": datetime.utcnow()}}
+            )
+
+    async def _lease_batch(self, domain: str) -> List[Dict]:
+        """Lease up to ENRICHMENT_BATCH_SIZE listing-only businesses of a domain"""
+        businesses_collection = database.get_database().businesses
+        now = datetime.utcnow()
+        batch = []
+        for _ in range(settings.ENRICHMENT_BATCH_SIZE):
+            business = await businesses_collection.find_one_and_update(
+                {
+                    "domain": domain,
+                    "completeness": Completeness.LISTING,
+                    "enrich_after": {"$not": {"$gt": now}},
+                    "enrich_attempts": {"$not": {"$gte": settings.FRONTIER_MAX_ATTEMPTS}},
+                },
+                {
+                    "$set": {"enrich_after": now + timedelta(seconds=settings.FRONTIER_LEASE_SECONDS)},
+                    "$inc": {"enrich_attempts": 1},
+                },
+                projection={"_id": 1, "page_url": 1},
+                return_document=ReturnDocument.AFTER
+            )
+            if business is None:
+                break
+            batch.append(business)
+        return batch
+
+    async def _apply(self, run_id: str, batch: List[Dict], results: List[Optional[BusinessData]]):
+        """Write the detail fields of enriched businesses; failures stay leased until they expire"""
+        db = database.get_database()
+        now = datetime.utcnow()
+        operations = []
+        for business, result in zip(batch, results):
+            if result is None:
+                continue
+            fields = result.model_dump(exclude=NON_EXTRACTED_FIELDS)
+            fields.update({"completeness": Completeness.DETAIL, "enriched_at": now})
+            operations.append(UpdateOne(
+                {"_id": business["_id"], "completeness": Completeness.LISTING},
+                {"$set": fields, "$unset": {"enrich_after": "", "enrich_attempts": ""}}
+            ))
+
+        if operations:
+            await db.businesses.bulk_write(operations, ordered=False)
+        await db.enrichment_runs.update_one(
+            {"_id": ObjectId(run_id)},
+            {"$inc": {
+                "businesses_enriched": len(operations),
+                "businesses_failed": len(batch) - len(operations),
+            }}
+        )
+
+# Global enrichment service instance
+enrichment_service = EnrichmentService()
@@ -0,0 +1,308 @@
+import asyncio
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from models.database import database
+from models.schemas import Completeness
+from scrapers.base_scraper import get_scraper
+from scrapers.crawl_scheduler import crawl_scheduler, crawl_flow
+from scrapers.http_client import http_client_manager
+from scrapers.parse_pool import parse_pool
+from services.reextraction_service import NON_EXTRACTED_FIELDS
+from utils.helpers import domain_host
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Scheduler flow of all revisit requests
+FRESHNESS_FLOW = "freshness"
+
+# Change rate assumed for a domain never revisited, and the weight of each
+# batch's observed rate in the running average
+DEFAULT_CHANGE_RATE = 0.5
+CHANGE_RATE_SMOOTHING = 0.2
+
+# Fields compared between a stored business and its re-extracted page
+COMPARED_EXCLUDE = NON_EXTRACTED_FIELDS | {"completeness"}
+
+def content_hash(fields: Dict) -> str:
+    """Stable digest of a business's extracted fields"""
+    return hashlib.sha256(json.dumps(fields, sort_keys=True, default=str).encode()).hexdigest()
+
+def revisit_age(change_rate: float) -> timedelta:
+    """How old a domain's businesses may get before a revisit, given its change rate"""
+    days = settings.FRESHNESS_MIN_AGE_DAYS / max(change_rate, 1e-6)
+    return timedelta(days=min(max(days, settings.FRESHNESS_MIN_AGE_DAYS), settings.FRESHNESS_MAX_AGE_DAYS))
+
+class FreshnessService:
+    """Revisit scraped businesses and write back only the ones that changed.
+
+    A domain's businesses are due once not (re)visited for revisit_age() of the
+    domain's change rate: the running share of revisits that found a change,
+    kept in freshness_domains. Runs lease due businesses a batch at a time
+    (revisit_after), least recently visited first, and fetch them in the
+    scheduler's freshness flow, whose low FRESHNESS_WEIGHT and per-host cap of
+    FRESHNESS_MAX_RATE_PER_HOST leave crawl jobs the bulk of every host.
+
+    Requests are conditional on the stored ETag / Last-Modified, so an
+    unchanged page is a bodiless 304. A 200 whose body hashes the same as last
+    time is not parsed, and a parsed page whose fields hash the same
+    (content_hash) is not written: all of them only get revisited_at, in one
+    update per batch. Changed businesses get their changed fields and
+    last_changed_at.
+    """
+
+    def __init__(self):
+        # domain -> (run_id, task)
+        self.active_runs: Dict[str, tuple] = {}
+        # host -> loop time of its next revisit request
+        self.next_request: Dict[str, float] = {}
+        self.scheduler_task: Optional[asyncio.Task] = None
+
+    def start_scheduler(self):
+        """Start revisiting due domains every FRESHNESS_SCHEDULE_INTERVAL seconds, if set"""
+        if settings.FRESHNESS_SCHEDULE_INTERVAL > 0 and self.scheduler_task is None:
+            self.scheduler_task = asyncio.create_task(self._schedule_periodically())
+
+    async def _schedule_periodically(self):
+        while True:
+            try:
+                db = database.get_database()
+                for domain in await db.businesses.distinct("domain"):
+                    if domain not in self.active_runs and await self._has_due(domain):
+                        await self.start_run(domain)
+            except Exception as e:
+                logger.error(f"Freshness scheduling failed: {e}")
+            await asyncio.sleep(settings.FRESHNESS_SCHEDULE_INTERVAL)
+
+    async def start_run(self, domain: str) -> str:
+        """Start revisiting a domain's due businesses in the background, unless it is already running here"""
+        if domain in self.active_runs:
+            return self.active_runs[domain][0]
+
+        db = database.get_database()
+        run = {
+            "domain": domain,
+            "status": "running",
+            "businesses_checked": 0,
+            "businesses_not_modified": 0,
+            "businesses_unchanged": 0,
+            "businesses_changed": 0,
+            "businesses_failed": 0,
+            "started_at": datetime.utcnow(),
+            "completed_at": None,
+            "error": None,
+        }
+        result = await db.freshness_runs.insert_one(run)
+        run_id = str(result.inserted_id)
+
+        task = asyncio.create_task(self._execute_run(run_id, domain))
+        self.active_runs[domain] = (run_id, task)
+        logger.info(f"🔁 Started freshness run {run_id} for {domain}")
+        return run_id
+
+    async def get_run(self, run_id: str) -> Optional[Dict]:
+        """Get the status and counters of a freshness run, with the domain's change rate"""
+        db = database.get_database()
+        run = await db.freshness_runs.find_one({"_id": ObjectId(run_id)})
+        if run:
+            run["change_rate"] = await self._change_rate(run["domain"])
+        return run
+
+    async def shutdown(self):
+        """Stop the scheduler and all runs; their leased businesses are retried once the leases expire"""
+        tasks = [task for _, task in self.active_runs.values()]
+        if self.scheduler_task is not None:
+            tasks.append(self.scheduler_task)
+            self.scheduler_task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _change_rate(self, domain: str) -> float:
+        state = await database.get_database().freshness_domains.find_one({"domain": domain})
+        return state["change_rate"] if state else DEFAULT_CHANGE_RATE
+
+    async def _due_query(self, domain: str) -> Dict:
+        """Businesses of a domain due for a revisit at its current change rate"""
+        now = datetime.utcnow()
+        cutoff = now - revisit_age(await self._change_rate(domain))
+        return {
+            "domain": domain,
+            # Listing-only businesses are enrichment's
+            "completeness": {"$ne": Completeness.LISTING},
+            "scraped_at": {"$lt": cutoff},
+            "revisited_at": {"$not": {"$gte": cutoff}},
+            "revisit_after": {"$not": {"$gt": now}},
+        }
+
+    async def _has_due(self, domain: str) -> bool:
+        query = await self._due_query(domain)
+        return await database.get_database().businesses.find_one(query, projection={"_id": 1}) is not None
+
+    async def _execute_run(self, run_id: str, domain: str):
+        """Lease and revisit batches until no business of the domain is due"""
+        runs_collection = database.get_database().freshness_runs
+        # Requests of this run (and its tasks) go through the low-weight flow
+        crawl_flow.set(FRESHNESS_FLOW)
+        crawl_scheduler.set_weight(FRESHNESS_FLOW, settings.FRESHNESS_WEIGHT)
+        host = domain_host(domain)
+        scraper = get_scraper(domain, http_client_manager.get_session(host))
+        semaphore = asyncio.Semaphore(max(1, settings.FRESHNESS_CONCURRENCY))
+
+        async def revisit(business: Dict) -> Tuple[str, Dict]:
+            async with semaphore:
+                await self._pace(host)
+                try:
+                    return await self._revisit(scraper, domain, business)
+                except Exception as e:
+                    logger.warning(f"Revisit of {business['page_url']} failed: {e}")
+                    return "failed", {}
+
+        status = "completed"
+        try:
+            while True:
+                batch = await self._lease_batch(domain)
+                if not batch:
+                    break
+                outcomes = await asyncio.gather(*[revisit(business) for business in batch])
+                await self._apply(run_id, domain, batch, outcomes)
+            logger.info(f"🔁 Freshness run {run_id} for {domain} completed")
+        except asyncio.CancelledError:
+            status = "stopped"
+            raise
+        except Exception as e:
+            status = "failed"
+            logger.error(f"Error in freshness run {run_id}: {e}")
+            await runs_collection.update_one({"_id": ObjectId(run_id)}, {"$set": {"error": str(e)}})
+        finally:
+            self.active_runs.pop(domain, None)
+            await runs_collection.update_one(
+                {"_id": ObjectId(run_id)},
+                {"$set": {"status": status, "completed_at": datetime.utcnow()}}
+            )
+
+    async def _pace(self, host: str):
+        """Space revisit requests to a host at least 1 / FRESHNESS_MAX_RATE_PER_HOST apart"""
+        if settings.FRESHNESS_MAX_RATE_PER_HOST <= 0:
+            return
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self.next_request.get(host, 0.0))
+        self.next_request[host] = slot + 1.0 / settings.FRESHNESS_MAX_RATE_PER_HOST
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def _lease_batch(self, domain: str) -> List[Dict]:
+        """Lease up to FRESHNESS_BATCH_SIZE due businesses, least recently visited first"""
+        businesses_collection = database.get_database().businesses
+        query = await self._due_query(domain)
+        lease_until = datetime.utcnow() + timedelta(seconds=settings.FRONTIER_LEASE_SECONDS)
+        batch = []
+        for _ in range(settings.FRESHNESS_BATCH_SIZE):
+            business = await businesses_collection.find_one_and_update(
+                query,
+                {"$set": {"revisit_after": lease_until}},
+                sort=[("revisited_at", 1), ("scraped_at", 1)],
+                return_document=ReturnDocument.AFTER
+            )
+            if business is None:
+                break
+            batch.append(business)
+        return batch
+
+    async def _revisit(self, scraper, domain: str, business: Dict) -> Tuple[str, Dict]:
+        """Fetch a business page again. Returns (outcome, fields to set besides revisited_at)"""
+        validators = {
+            "etag": business.get("http_etag"),
+            "last_modified": business.get("http_last_modified"),
+        }
+        status, body = await scraper.fetch_page(business["page_url"], validators=validators)
+        if status == 304:
+            return "not_modified", {}
+        if status != 200 or body is None:
+            logger.warning(f"Revisit of {business['page_url']} returned {status}")
+            return "failed", {}
+
+        updates = {}
+        if validators["etag"] != business.get("http_etag"):
+            updates["http_etag"] = validators["etag"]
+        if validators["last_modified"] != business.get("http_last_modified"):
+            updates["http_last_modified"] = validators["last_modified"]
+
+        body_hash = hashlib.sha256(body).hexdigest()
+        if body_hash == business.get("body_hash"):
+            return "unchanged", updates
+        updates["body_hash"] = body_hash
+
+        result = await parse_pool.parse_details(body, business["page_url"], domain)
+        fields = result.model_dump(exclude=COMPARED_EXCLUDE)
+        new_hash = content_hash(fields)
+        stored_hash = business.get("content_hash") or content_hash({k: business.get(k) for k in fields})
+        if business.get("content_hash") != new_hash:
+            updates["content_hash"] = new_hash
+        if new_hash == stored_hash:
+            return "unchanged", updates
+
+        updates.update({k: v for k, v in fields.items() if business.get(k) != v})
+        updates["last_changed_at"] = datetime.utcnow()
+        return "changed", updates
+
+    async def _apply(self, run_id: str, domain: str, batch: List[Dict], outcomes: List[Tuple[str, Dict]]):
+        """Write changed businesses, mark the rest revisited and update the domain's change rate"""
+        db = database.get_database()
+        now = datetime.utcnow()
+        counts = {"not_modified": 0, "unchanged": 0, "changed": 0, "failed": 0}
+        operations = []
+        # Businesses whose only change is the visit itself (failures included, so
+        # a gone page waits a full revisit age too): one update for all of them
+        visited_only = []
+        for business, (outcome, updates) in zip(batch, outcomes):
+            counts[outcome] += 1
+            if updates:
+                operations.append(UpdateOne(
+                    {"_id": business["_id"]},
+                    {"$set": {**updates, "revisited_at": now}, "$unset": {"revisit_after": ""}}
+                ))
+            else:
+                visited_only.append(business["_id"])
+
+        if operations:
+            await db.businesses.bulk_write(operations, ordered=False)
+        if visited_only:
+            await db.businesses.update_many(
+                {"_id": {"$in": visited_only}},
+                {"$set": {"revisited_at": now}, "$unset": {"revisit_after": ""}}
+            )
+
+        checked = len(batch) - counts["failed"]
+        if checked:
+            rate = await self._change_rate(domain)
+            rate += CHANGE_RATE_SMOOTHING * (counts["changed"] / checked - rate)
+            await db.freshness_domains.update_one(
+                {"domain": domain},
+                {
+                    "$set": {"change_rate": rate, "updated_at": now},
+                    "$inc": {"businesses_checked": checked, "businesses_changed": counts["changed"]},
+                },
+                upsert=True
+            )
+
+        await db.freshness_runs.update_one(
+            {"_id": ObjectId(run_id)},
+            {"$inc": {
+                "businesses_checked": checked,
+                **{f"businesses_{outcome}": count for outcome, count in counts.items()},
+            }}
+        )
+        logger.info(
+            f"🔁 Revisited {len(batch)} businesses of {domain}: {counts['changed']} changed, "
+            f"{counts['unchanged'] + counts['not_modified']} unchanged ({counts['not_modified']} not modified), "
+            f"{counts['failed']} failed"
+        )
+
+# Global freshness service instance
+freshness_service = FreshnessService()
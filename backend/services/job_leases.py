@@ -0,0 +1,89 @@
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument
+from models.database import database
+from models.schemas import ScrapingStatus
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+class JobLeases:
+    """Leases on RUNNING jobs held by the process executing them.
+
+    The owner is recorded as worker_id on the job together with
+    lease_expires_at, which the owner pushes forward on every heartbeat. A
+    RUNNING job without an owner, or whose lease has expired because its
+    process crashed or was redeployed, can be claimed by any process.
+    """
+
+    def __init__(self):
+        self.owner_id = f"{socket.gethostname()}-{os.getpid()}"
+
+    @property
+    def jobs_collection(self):
+        return database.get_database().scraping_jobs
+
+    def lease_fields(self, now: datetime) -> Dict:
+        """Job fields that give this process the lease"""
+        return {
+            "worker_id": self.owner_id,
+            "heartbeat_at": now,
+            "lease_expires_at": now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+        }
+
+    async def claim_next(self) -> Optional[Dict]:
+        """Claim the oldest RUNNING job that is unowned or whose lease has expired"""
+        now = datetime.utcnow()
+        job = await self.jobs_collection.find_one_and_update(
+            {
+                "status": ScrapingStatus.RUNNING,
+                "$or": [
+                    {"worker_id": None},
+                    {"lease_expires_at": {"$lt": now}},
+                ],
+            },
+            {"$set": {**self.lease_fields(now), "claimed_at": now}},
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.BEFORE
+        )
+        if job is not None and job.get("worker_id"):
+            logger.warning(f"⏰ Taking over job {job['_id']} from {job['worker_id']} (lease expired)")
+        return job
+
+    async def acquire(self, job_id: str):
+        """Take the lease of a job this process was told to run"""
+        now = datetime.utcnow()
+        await self.jobs_collection.update_one({"_id": ObjectId(job_id)}, {"$set": self.lease_fields(now)})
+
+    async def renew(self, job_ids: List[str]) -> Set[str]:
+        """Heartbeat the leases of running jobs; returns the jobs now owned by someone else"""
+        if not job_ids:
+            return set()
+        object_ids = [ObjectId(job_id) for job_id in job_ids]
+        now = datetime.utcnow()
+        result = await self.jobs_collection.update_many(
+            {"_id": {"$in": object_ids}, "worker_id": self.owner_id},
+            {"$set": {"heartbeat_at": now, "lease_expires_at": now + timedelta(seconds=settings.JOB_LEASE_SECONDS)}}
+        )
+        if result.matched_count == len(job_ids):
+            return set()
+        owned = {
+            str(doc["_id"]) async for doc in self.jobs_collection.find(
+                {"_id": {"$in": object_ids}, "worker_id": self.owner_id}, {"_id": 1}
+            )
+        }
+        return set(job_ids) - owned
+
+    async def release(self, job_id: str):
+        """Give up a job's lease if this process still holds it"""
+        await self.jobs_collection.update_one(
+            {"_id": ObjectId(job_id), "worker_id": self.owner_id},
+            {"$unset": {"worker_id": "", "lease_expires_at": "", "claimed_at": ""}}
+        )
+
+# Global job lease instance
+job_leases = JobLeases()
@@ -5,6 +5,7 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime
 from models.database import database
 from models.schemas import ScrapingJob, ScrapingStatus
+from services.city_registry import registry_key
 
 logger = logging.getLogger(__name__)
 
@@ -154,15 +155,23 @@ class JobSeedingService:
         logger.info(f"Created job for {country_name} ({domain}) with ID {result.inserted_id}")
     
     async def get_countries_summary(self) -> Dict[str, Any]:
-        """Get a summary of all countries in the configuration"""
+        """Get a summary of all countries in the configuration, with their city census counts"""
         if not self.countries_data:
             return {"regions": [], "total_countries": 0}
         
         summary = {
             "regions": [],
-            "total_countries": 0
+            "total_countries": 0,
+            "total_listed_businesses": 0
         }
         
+        # Cities and listed businesses per domain from the city registry (census)
+        census = {}
+        async for entry in database.get_database().city_registry.find(
+            {}, {"_id": 0, "domain": 1, "city_count": 1, "business_count": 1, "discovered_at": 1}
+        ):
+            census[entry["domain"]] = entry
+        
         for region_data in self.countries_data.get('countries', []):
             region_name = region_data.get('region', 'Unknown')
             countries = region_data.get('countries', [])
@@ -170,18 +179,22 @@ class JobSeedingService:
             region_summary = {
                 "name": region_name,
                 "country_count": len(countries),
-                "countries": [
-                    {
-                        "name": c.get('name', 'Unknown'),
-                        "domain": c.get('domain', ''),
-                        "url": c.get('url', ''),
-                    }
-                    for c in countries
-                ]
+                "countries": []
             }
+            for c in countries:
+                entry = census.get(registry_key(c.get('domain') or ''), {})
+                region_summary["countries"].append({
+                    "name": c.get('name', 'Unknown'),
+                    "domain": c.get('domain', ''),
+                    "url": c.get('url', ''),
+                    "cities": entry.get("city_count"),
+                    "listed_businesses": entry.get("business_count"),
+                    "census_at": entry.get("discovered_at"),
+                })
             
             summary["regions"].append(region_summary)
             summary["total_countries"] += len(countries)
+            summary["total_listed_businesses"] += sum(c["listed_businesses"] or 0 for c in region_summary["countries"])
         
         return summary
     
@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Dict
+from bson.objectid import ObjectId
+from models.database import database
+from models.schemas import ScrapingStatus
+from services.scraping_service import scraping_service
+from services.job_leases import job_leases
+from utils.redis_client import distributed
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+class JobWorker:
+    """Run scraping jobs claimed from MongoDB in a scraper worker process.
+
+    The API only writes intents on the job document: status RUNNING to start or
+    resume, PAUSED / CANCELLED to stop, restart_requested_at to force a restart
+    and settings_updated_at for new settings. Every WORKER_POLL_INTERVAL the
+    worker applies the intents of its jobs with one query, then claims a RUNNING
+    job that is unowned or whose lease expired, up to its capacity and at most
+    one per JOB_TAKEOVER_STAGGER seconds. Leases are heartbeated by the
+    scraping service's lease keeper. With FRONTIER_BACKEND=redis, spare
+    capacity is used to help with RUNNING jobs other workers own.
+    """
+
+    def __init__(self, max_jobs: int):
+        self.max_jobs = max_jobs
+        self.worker_id = job_leases.owner_id
+        # job_id -> intent timestamps seen when the job was started / last updated
+        self.jobs: Dict[str, Dict] = {}
+        self.next_claim_at = 0.0
+
+    @property
+    def jobs_collection(self):
+        return database.get_database().scraping_jobs
+
+    async def run(self, stop: asyncio.Event):
+        """Poll for intents and jobs until stop is set, then checkpoint and release all jobs"""
+        logger.info(f"👷 Worker {self.worker_id} running up to {self.max_jobs} jobs")
+        scraping_service.start_lease_keeper(takeover=False)
+        try:
+            while not stop.is_set():
+                try:
+                    await self.poll()
+                except Exception as e:
+                    logger.error(f"Worker {self.worker_id} poll failed: {e}")
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=settings.WORKER_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            await self.shutdown()
+
+    async def poll(self):
+        await self._apply_intents()
+        self._forget_finished()
+        await self._claim_jobs()
+
+    def _start(self, job: Dict, helper: bool = False):
+        job_id = str(job["_id"])
+        self.jobs[job_id] = {
+            "restart_requested_at": job.get("restart_requested_at"),
+            "settings_updated_at": job.get("settings_updated_at"),
+        }
+        scraping_service._start_task(job_id, helper=helper)
+
+    async def _claim_jobs(self):
+        """Claim the oldest claimable job if there is capacity, staggering job starts"""
+        if len(scraping_service.active_jobs) >= self.max_jobs or time.monotonic() < self.next_claim_at:
+            return
+        job = await job_leases.claim_next()
+        helper = False
+        if job is None and distributed():
+            job = await self._find_job_to_help()
+            helper = True
+        if job is None:
+            return
+        if helper:
+            logger.info(f"🤝 Worker {self.worker_id} helping with job {job['_id']} of {job.get('worker_id')}")
+        else:
+            logger.info(f"👷 Worker {self.worker_id} claimed job {job['_id']}")
+        self._start(job, helper=helper)
+        self.next_claim_at = time.monotonic() + settings.JOB_TAKEOVER_STAGGER
+
+    async def _find_job_to_help(self):
+        """Oldest RUNNING job leased by another worker and not running here"""
+        return await self.jobs_collection.find_one(
+            {
+                "status": ScrapingStatus.RUNNING,
+                "worker_id": {"$nin": [None, self.worker_id]},
+                "lease_expires_at": {"$gte": datetime.utcnow()},
+                "_id": {"$nin": [ObjectId(job_id) for job_id in scraping_service.active_jobs]},
+            },
+            sort=[("created_at", 1)]
+        )
+
+    async def _apply_intents(self):
+        """Stop, restart or reconfigure running jobs from their job documents"""
+        job_ids = list(scraping_service.active_jobs)
+        if not job_ids:
+            return
+        cursor = self.jobs_collection.find(
+            {"_id": {"$in": [ObjectId(job_id) for job_id in job_ids]}},
+            {
+                "status": 1, "worker_id": 1, "restart_requested_at": 1, "settings_updated_at": 1,
+                "concurrent_requests": 1, "request_delay": 1,
+            }
+        )
+        docs = {str(doc["_id"]): doc async for doc in cursor}
+
+        for job_id in job_ids:
+            doc = docs.get(job_id)
+            seen = self.jobs.get(job_id, {})
+            if doc is None or doc.get("status") != ScrapingStatus.RUNNING:
+                status = doc.get("status") if doc else ScrapingStatus.CANCELLED
+                logger.info(f"👷 Stopping job {job_id} ({status})")
+                await scraping_service._stop_task(job_id, status)
+            elif job_id in scraping_service.helper_jobs:
+                if doc.get("restart_requested_at") != seen.get("restart_requested_at"):
+                    # The owner restarts the crawl; help again once it is running
+                    await scraping_service._stop_task(job_id)
+                elif doc.get("settings_updated_at") != seen.get("settings_updated_at"):
+                    seen["settings_updated_at"] = doc.get("settings_updated_at")
+                    scraping_service.update_job_settings(job_id, {
+                        "concurrent_requests": doc["concurrent_requests"],
+                        "request_delay": doc["request_delay"],
+                    })
+            elif doc.get("worker_id") != self.worker_id:
+                logger.warning(f"👷 Job {job_id} is now claimed by {doc.get('worker_id')}, stopping it here")
+                await scraping_service._stop_task(job_id)
+                self.jobs.pop(job_id, None)
+            elif doc.get("restart_requested_at") != seen.get("restart_requested_at"):
+                logger.info(f"👷 Force restarting job {job_id}")
+                await scraping_service._stop_task(job_id)
+                self._start(doc)
+            elif doc.get("settings_updated_at") != seen.get("settings_updated_at"):
+                seen["settings_updated_at"] = doc.get("settings_updated_at")
+                scraping_service.update_job_settings(job_id, {
+                    "concurrent_requests": doc["concurrent_requests"],
+                    "request_delay": doc["request_delay"],
+                })
+
+    def _forget_finished(self):
+        """Drop intent tracking of jobs that ended (they released their lease on exit)"""
+        for job_id in [job_id for job_id in self.jobs if job_id not in scraping_service.active_jobs]:
+            self.jobs.pop(job_id)
+
+    async def shutdown(self):
+        """Checkpoint all jobs and release them; RUNNING jobs are picked up by other workers"""
+        await scraping_service.shutdown()
+        self._forget_finished()
+        logger.info(f"👷 Worker {self.worker_id} stopped")
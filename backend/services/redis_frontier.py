@@ -0,0 +1,420 @@
+import json
+import logging
+import uuid
+from typing import Dict, List, Optional, Tuple
+from config import settings
+from utils.helpers import domain_host
+from utils.redis_client import get_redis
+from services.crawl_frontier import LISTING, DETAIL, listing_page_url, next_listing_pages
+from services.job_leases import job_leases
+
+logger = logging.getLogger(__name__)
+
+GROUP = "crawlers"
+
+# Integer fields of a unit (stream fields are strings)
+INT_FIELDS = ("city_index", "page", "city_count", "business_count", "last_page", "attempts", "watermark", "quiet_pages", "newest_id")
+
+# Append a unit to a stream unless its URL was ever added for this job; listing
+# units also count as open for their city until they are completed
+ADD_UNIT = """
+local function add_unit(stream, urls, open_cities, city_names, unit)
+    if redis.call('SADD', urls, unit['url']) == 0 then
+        return 0
+    end
+    local fields = {}
+    for key, value in pairs(unit) do
+        table.insert(fields, key)
+        table.insert(fields, tostring(value))
+    end
+    redis.call('XADD', stream, '*', unpack(fields))
+    if unit['kind'] == 'listing' then
+        redis.call('HINCRBY', open_cities, unit['city_index'], 1)
+        redis.call('HSET', city_names, unit['city_index'], unit['city'])
+    end
+    return 1
+end
+"""
+
+# KEYS: stream, url set, open cities hash, city names hash; ARGV: JSON list of
+# units. Returns the number added.
+ADD_UNITS = ADD_UNIT + """
+local added = 0
+for _, unit in ipairs(cjson.decode(ARGV[1])) do
+    added = added + add_unit(KEYS[1], KEYS[2], KEYS[3], KEYS[4], unit)
+end
+return added
+"""
+
+# Persist a listing page's results and retire it in one step. A page completed
+# twice (its lease expired while it was being fetched) only closes once.
+# KEYS: listing stream, detail stream, url set, open cities hash, city names hash
+# ARGV: group, listing entry id, JSON detail units, JSON next listing units,
+#       city index. Returns the number of detail units added.
+COMPLETE_LISTING = ADD_UNIT + """
+local added = 0
+for _, unit in ipairs(cjson.decode(ARGV[3])) do
+    added = added + add_unit(KEYS[2], KEYS[3], KEYS[4], KEYS[5], unit)
+end
+for _, unit in ipairs(cjson.decode(ARGV[4])) do
+    add_unit(KEYS[1], KEYS[3], KEYS[4], KEYS[5], unit)
+end
+if redis.call('XACK', KEYS[1], ARGV[1], ARGV[2]) == 1 then
+    redis.call('HINCRBY', KEYS[4], ARGV[5], -1)
+end
+redis.call('XDEL', KEYS[1], ARGV[2])
+return added
+"""
+
+# Put a failed detail unit back with one more attempt, or retire it.
+# KEYS: detail stream, stats hash; ARGV: group, entry id, JSON unit or "" to give up
+RETRY_DETAIL = """
+redis.call('XACK', KEYS[1], ARGV[1], ARGV[2])
+redis.call('XDEL', KEYS[1], ARGV[2])
+if ARGV[3] == '' then
+    redis.call('HINCRBY', KEYS[2], 'failed', 1)
+    return 0
+end
+local fields = {}
+for key, value in pairs(cjson.decode(ARGV[3])) do
+    table.insert(fields, key)
+    table.insert(fields, tostring(value))
+end
+redis.call('XADD', KEYS[1], '*', unpack(fields))
+return 1
+"""
+
+# Lower a listing's last page. KEYS: listing ends hash; ARGV: listing URL, page
+END_LISTING = """
+local current = redis.call('HGET', KEYS[1], ARGV[1])
+if not current or tonumber(ARGV[2]) < tonumber(current) then
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+end
+"""
+
+class RedisFrontier:
+    """Crawl frontier of one job on one domain kept in Redis streams.
+
+    Drop-in for CrawlFrontier when FRONTIER_BACKEND=redis, so scraper workers on
+    any number of nodes can share a job. Listing and detail units are entries of
+    two streams read through one consumer group: an entry delivered to a node is
+    leased to it (in the group's pending list) until it is acknowledged and
+    deleted, which only happens once its result is persisted. Entries idle for
+    FRONTIER_LEASE_SECONDS are claimed by other nodes, so delivery is
+    at-least-once; a URL is only ever added once per job (a set guards every
+    XADD inside a script) and businesses are saved with idempotent upserts.
+    Open listing units are counted per city, so a city is listed at zero.
+    """
+
+    def __init__(self, job_id: str, domain: str):
+        self.job_id = job_id
+        self.domain = domain
+        self.run_id = uuid.uuid4().hex
+        self.consumer = job_leases.owner_id
+        # Hash tag keeps every key of the frontier in one cluster slot
+        prefix = f"frontier:{{{job_id}:{domain_host(domain)}}}"
+        self.listing_stream = f"{prefix}:listing"
+        self.detail_stream = f"{prefix}:detail"
+        self.urls_key = f"{prefix}:urls"
+        self.open_cities_key = f"{prefix}:cities:open"
+        self.city_names_key = f"{prefix}:cities:names"
+        self.listing_ends_key = f"{prefix}:listing:end"
+        self.counted_cities_key = f"{prefix}:cities:counted"
+        self.seeded_key = f"{prefix}:seeded"
+        self.stats_key = f"{prefix}:stats"
+        # Units taken over from dead consumers, served before new deliveries
+        self.reclaimed: Dict[str, List[Dict]] = {LISTING: [], DETAIL: []}
+        self.scripts = None
+
+    @property
+    def redis(self):
+        return get_redis()
+
+    async def _prepare(self):
+        if self.scripts is not None:
+            return
+        for stream in (self.listing_stream, self.detail_stream):
+            try:
+                await self.redis.xgroup_create(stream, GROUP, id="0", mkstream=True)
+            except Exception as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+        self.scripts = {
+            "add": self.redis.register_script(ADD_UNITS),
+            "complete_listing": self.redis.register_script(COMPLETE_LISTING),
+            "retry_detail": self.redis.register_script(RETRY_DETAIL),
+            "end_listing": self.redis.register_script(END_LISTING),
+        }
+
+    def _stream(self, kind: str) -> str:
+        return self.listing_stream if kind == LISTING else self.detail_stream
+
+    def _new_unit(self, kind: str, url: str, city_index: int, city: str, page: int, **extra) -> Dict:
+        return {
+            "kind": kind,
+            "url": url,
+            "city_index": city_index,
+            "city": city,
+            "page": page,
+            "attempts": 0,
+            **extra,
+        }
+
+    def _decode(self, kind: str, entry_id: str, fields: Dict) -> Dict:
+        unit = dict(fields, _id=entry_id, kind=kind)
+        for field in INT_FIELDS:
+            if unit.get(field) not in (None, ""):
+                unit[field] = int(unit[field])
+        # Count this delivery like a Mongo claim does
+        unit["attempts"] = unit.get("attempts", 0) + 1
+        return unit
+
+    async def has_units(self) -> bool:
+        return bool(await self.redis.exists(self.seeded_key))
+
+    async def seed(self, cities: List, start_city_index: int = 0, start_page: int = 1, **extra):
+        """Create the first listing unit of every city (from a legacy resume point if given)"""
+        await self._prepare()
+        units = []
+        for city_index, city in enumerate(cities[start_city_index:], start=start_city_index):
+            page = start_page if city_index == start_city_index else 1
+            units.append(self._new_unit(
+                LISTING, listing_page_url(city.url, page), city_index, city.name, page,
+                city_url=city.url, city_count=len(cities), business_count=city.business_count, **extra
+            ))
+        inserted = await self.scripts["add"](
+            keys=[self.listing_stream, self.urls_key, self.open_cities_key, self.city_names_key],
+            args=[json.dumps(units)]
+        )
+        await self.redis.set(self.seeded_key, 1)
+        logger.info(f"🗺️  Seeded Redis frontier for {self.domain} with {inserted} city listing units")
+
+    @property
+    def keys(self) -> List[str]:
+        return [
+            self.listing_stream, self.detail_stream, self.urls_key, self.open_cities_key,
+            self.city_names_key, self.listing_ends_key, self.counted_cities_key,
+            self.seeded_key, self.stats_key,
+        ]
+
+    async def reset(self):
+        """Drop all units, so the job's next run crawls the domain from scratch"""
+        await self.redis.delete(*self.keys)
+        self.scripts = None
+        logger.info(f"🧹 Cleared the Redis frontier of {self.domain}")
+
+    async def expire(self):
+        """Let the keys of a completed job expire after FRONTIER_RETENTION_DAYS"""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key in self.keys:
+                pipe.expire(key, settings.FRONTIER_RETENTION_DAYS * 86400)
+            await pipe.execute()
+
+    async def release_leases(self) -> int:
+        """Take over units delivered to an earlier run in this process or to idle consumers.
+
+        A consumer idle for JOB_LEASE_SECONDS belongs to a process that died
+        (live ones read from the streams all the time); its entries would
+        otherwise wait for FRONTIER_LEASE_SECONDS to be claimed.
+        """
+        await self._prepare()
+        released = 0
+        for kind in (LISTING, DETAIL):
+            stream = self._stream(kind)
+            for consumer in await self.redis.xinfo_consumers(stream, GROUP):
+                name = consumer["name"]
+                earlier_run = name == self.consumer
+                if not earlier_run and consumer["idle"] < settings.JOB_LEASE_SECONDS * 1000:
+                    continue
+                if consumer["pending"]:
+                    pending = await self.redis.xpending_range(
+                        stream, GROUP, min="-", max="+", count=consumer["pending"], consumername=name
+                    )
+                    ids = [entry["message_id"] for entry in pending]
+                    for entry_id, fields in await self.redis.xclaim(stream, GROUP, self.consumer, 0, ids):
+                        if fields:
+                            self.reclaimed[kind].append(self._decode(kind, entry_id, fields))
+                            released += 1
+                if not earlier_run:
+                    await self.redis.xgroup_delconsumer(stream, GROUP, name)
+        if released:
+            logger.info(f"🔄 Took over {released} Redis frontier units for job {self.job_id}")
+        return released
+
+    async def _claim(self, kind: str, count: int) -> List[Dict]:
+        await self._prepare()
+        units = self.reclaimed[kind][:count]
+        del self.reclaimed[kind][:count]
+        stream = self._stream(kind)
+
+        if len(units) < count:
+            # Units idle past their lease were delivered to a node that died
+            result = await self.redis.xautoclaim(
+                stream, GROUP, self.consumer,
+                min_idle_time=settings.FRONTIER_LEASE_SECONDS * 1000,
+                start_id="0-0", count=count - len(units)
+            )
+            units.extend(self._decode(kind, entry_id, fields) for entry_id, fields in result[1] if fields)
+
+        if len(units) < count:
+            response = await self.redis.xreadgroup(GROUP, self.consumer, {stream: ">"}, count=count - len(units))
+            for _, entries in response or []:
+                units.extend(self._decode(kind, entry_id, fields) for entry_id, fields in entries if fields)
+        return units
+
+    async def claim_listing(self) -> Optional[Dict]:
+        """Lease the next listing page; pages past their listing's end are flagged beyond_end"""
+        units = await self._claim(LISTING, 1)
+        if not units:
+            return None
+        unit = units[0]
+        end = await self.redis.hget(self.listing_ends_key, unit["city_url"])
+        if end is not None and unit["page"] > int(end):
+            unit["beyond_end"] = True
+        return unit
+
+    async def claim_details(self, limit: int) -> List[Dict]:
+        return await self._claim(DETAIL, limit)
+
+    async def renew_lease(self, unit: Dict) -> bool:
+        """Reset the idle time of a unit delivered to this node; False if another node claimed it"""
+        stream = self._stream(unit["kind"])
+        pending = await self.redis.xpending_range(
+            stream, GROUP, min=unit["_id"], max=unit["_id"], count=1, consumername=self.consumer
+        )
+        if not pending:
+            return False
+        await self.redis.xclaim(stream, GROUP, self.consumer, 0, [unit["_id"]], justid=True)
+        return True
+
+    async def listings_in_flight(self) -> int:
+        """Listing pages delivered to some node and not yet completed"""
+        await self._prepare()
+        return (await self.redis.xpending(self.listing_stream, GROUP))["pending"]
+
+    def _detail_units(self, unit: Dict, detail_urls: List[str]) -> List[Dict]:
+        return [
+            self._new_unit(
+                DETAIL, url, unit["city_index"], unit["city"], unit["page"],
+                run_id=self.run_id, listing_url=unit["url"]
+            )
+            for url in detail_urls
+        ]
+
+    async def add_details(self, unit: Dict, detail_urls: List[str]) -> int:
+        """Add detail units for business URLs of a listing unit's page; returns the number added"""
+        if not detail_urls:
+            return 0
+        return await self.scripts["add"](
+            keys=[self.detail_stream, self.urls_key, self.open_cities_key, self.city_names_key],
+            args=[json.dumps(self._detail_units(unit, detail_urls))]
+        )
+
+    async def complete_listing(
+        self,
+        unit: Dict,
+        detail_urls: List[str],
+        has_next: bool,
+        last_page: Optional[int] = None,
+        partitions: Optional[List[Tuple[str, str]]] = None,
+        carry: Optional[Dict] = None
+    ) -> int:
+        """Persist a listing page's results and retire it atomically; returns new detail units"""
+        details = self._detail_units(unit, detail_urls)
+        if partitions:
+            listings = [
+                self._new_unit(
+                    LISTING, url, unit["city_index"], unit["city"], 1,
+                    city_url=url, city_count=unit.get("city_count", ""), partition=category,
+                    **({"sitemap": True} if unit.get("sitemap") else {}), **(carry or {})
+                )
+                for category, url in partitions
+            ]
+        else:
+            pages = next_listing_pages(unit, has_next, last_page)
+            shard_end = {"last_page": pages[-1]} if pages and (last_page is not None or "last_page" in unit) else {}
+            partition = {"partition": unit["partition"]} if "partition" in unit else {}
+            listings = [
+                self._new_unit(
+                    LISTING, listing_page_url(unit["city_url"], page),
+                    unit["city_index"], unit["city"], page,
+                    city_url=unit["city_url"], city_count=unit.get("city_count", ""), **shard_end, **partition,
+                    **(carry or {})
+                )
+                for page in pages
+            ]
+        return await self.scripts["complete_listing"](
+            keys=[
+                self.listing_stream, self.detail_stream, self.urls_key,
+                self.open_cities_key, self.city_names_key,
+            ],
+            args=[GROUP, unit["_id"], json.dumps(details), json.dumps(listings), unit["city_index"]]
+        )
+
+    async def end_listing(self, unit: Dict, page: int) -> int:
+        """Record the real last page of a unit's listing; later pages are flagged when claimed"""
+        await self.scripts["end_listing"](keys=[self.listing_ends_key], args=[unit["city_url"], page])
+        return 0
+
+    async def city_listed(self, city_index: int) -> bool:
+        """Whether all listing pages of a city are done"""
+        return int(await self.redis.hget(self.open_cities_key, city_index) or 0) <= 0
+
+    async def uncounted_cities(self) -> List[Dict]:
+        """Cities whose listing pages are all done but whose completion was never checkpointed"""
+        open_cities = await self.redis.hgetall(self.open_cities_key)
+        counted = await self.redis.smembers(self.counted_cities_key)
+        names = await self.redis.hgetall(self.city_names_key)
+        return [
+            {"city_index": int(city_index), "city": names.get(city_index)}
+            for city_index, count in sorted(open_cities.items(), key=lambda item: int(item[0]))
+            if int(count) <= 0 and city_index not in counted
+        ]
+
+    async def mark_city_completed(self, city_index: int, city: str) -> bool:
+        """Record a checkpointed city; False if another node already did"""
+        return bool(await self.redis.sadd(self.counted_cities_key, city_index))
+
+    async def complete_details(self, unit_ids: List):
+        """Retire detail units once their businesses are persisted"""
+        if unit_ids:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.xack(self.detail_stream, GROUP, *unit_ids)
+                pipe.xdel(self.detail_stream, *unit_ids)
+                await pipe.execute()
+
+    async def fail_detail(self, unit: Dict) -> bool:
+        """Return a failed detail unit for retry; gives up (returns True) after FRONTIER_MAX_ATTEMPTS"""
+        final = unit.get("attempts", 0) >= settings.FRONTIER_MAX_ATTEMPTS
+        retry = ""
+        if not final:
+            retry = json.dumps({key: value for key, value in unit.items() if key != "_id"})
+        await self.scripts["retry_detail"](
+            keys=[self.detail_stream, self.stats_key], args=[GROUP, unit["_id"], retry]
+        )
+        return final
+
+    async def remaining_details(self) -> int:
+        """Detail units not retired yet, delivered or not"""
+        return await self.redis.xlen(self.detail_stream)
+
+async def get_redis_frontier_stats(job_id: str, domains: List[str]) -> Dict[str, Dict[str, int]]:
+    """Unit counts per kind and state for a job, shaped like get_frontier_stats"""
+    redis = get_redis()
+    stats: Dict[str, Dict[str, int]] = {}
+    for domain in domains:
+        frontier = RedisFrontier(job_id, domain)
+        for kind in (LISTING, DETAIL):
+            stream = frontier._stream(kind)
+            if not await redis.exists(stream):
+                continue
+            queued = await redis.xlen(stream)
+            leased = (await redis.xpending(stream, GROUP))["pending"]
+            counts = stats.setdefault(kind, {"pending": 0, "leased": 0})
+            counts["pending"] += queued - leased
+            counts["leased"] += leased
+        failed = int(await redis.hget(frontier.stats_key, "failed") or 0)
+        if failed:
+            stats.setdefault(DETAIL, {"pending": 0, "leased": 0})
+            stats[DETAIL]["failed"] = stats[DETAIL].get("failed", 0) + failed
+    return stats
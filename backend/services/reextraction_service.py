@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+from models.database import database
+from models.schemas import Completeness
+from scrapers.html_archive import html_archive
+from scrapers.yello_parser import parse_business_details
+from utils.helpers import business_key, domain_host
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Fields that belong to the crawl/export lifecycle rather than the page content
+NON_EXTRACTED_FIELDS = {"id", "scraped_at", "exported_at", "export_mode", "completeness"}
+
+def reextract_pages(pages: List[Tuple[str, str]], domain: str) -> List[Dict]:
+    """Parse a batch of archived business pages (runs in a worker process)"""
+    results = []
+    for url, html in pages:
+        try:
+            business = parse_business_details(html, url, domain)
+        except Exception as e:
+            logger.error(f"Error re-extracting {url}: {e}")
+            continue
+        results.append(business.model_dump(exclude=NON_EXTRACTED_FIELDS))
+    return results
+
+def reextraction_changes(doc: Dict, record: Dict, fields: Optional[List[str]] = None) -> Dict:
+    """Fields of a stored business that a re-extracted detail page changes.
+
+    A full re-extraction also completes a business saved from a listing card;
+    one limited to some fields leaves its completeness alone.
+    """
+    candidate = {k: v for k, v in record.items() if not fields or k in fields}
+    changed = {k: v for k, v in candidate.items() if doc.get(k) != v}
+    if not fields and doc.get("completeness") == Completeness.LISTING:
+        changed["completeness"] = Completeness.DETAIL
+    return changed
+
+class ReextractionService:
+    """Replay archived business pages through the parsers without any network access.
+
+    Pages come from the raw HTML archive, are parsed across a process pool and
+    only fields whose value changed are written back to ``businesses``.
+    """
+
+    def __init__(self):
+        self.active_runs: Dict[str, asyncio.Task] = {}
+
+    async def start_run(self, domain: str, fields: Optional[List[str]] = None, processes: Optional[int] = None) -> str:
+        """Start a re-extraction run for a domain in the background"""
+        db = database.get_database()
+        run = {
+            "domain": domain,
+            "fields": fields or [],
+            "processes": processes or os.cpu_count(),
+            "status": "running",
+            "pages_parsed": 0,
+            "businesses_updated": 0,
+            "businesses_inserted": 0,
+            "businesses_unchanged": 0,
+            "started_at": datetime.utcnow(),
+            "completed_at": None,
+            "error": None,
+        }
+        result = await db.reextraction_runs.insert_one(run)
+        run_id = str(result.inserted_id)
+
+        task = asyncio.create_task(self._execute_run(run_id, domain, fields, run["processes"]))
+        self.active_runs[run_id] = task
+        logger.info(f"Started re-extraction run {run_id} for {domain}")
+        return run_id
+
+    async def get_run(self, run_id: str) -> Optional[Dict]:
+        """Get the status and counters of a re-extraction run"""
+        db = database.get_database()
+        return await db.reextraction_runs.find_one({"_id": ObjectId(run_id)})
+
+    async def _execute_run(self, run_id: str, domain: str, fields: Optional[List[str]], processes: int):
+        """Stream archived pages into the process pool and apply the results"""
+        db = database.get_database()
+        runs_collection = db.reextraction_runs
+        loop = asyncio.get_running_loop()
+        batch_size = settings.REEXTRACT_BATCH_SIZE
+
+        try:
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                pending = set()
+                batch: List[Tuple[str, str]] = []
+
+                async for page in html_archive.iter_pages(domain_host(domain), url_pattern="/company/"):
+                    batch.append((page["url"], page["html"]))
+                    if len(batch) < batch_size:
+                        continue
+                    pending.add(loop.run_in_executor(pool, reextract_pages, batch, domain))
+                    batch = []
+                    # Keep every core busy without buffering the whole archive in memory
+                    if len(pending) >= processes * 2:
+                        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                        for future in done:
+                            await self._apply_changes(run_id, domain, future.result(), fields)
+
+                if batch:
+                    pending.add(loop.run_in_executor(pool, reextract_pages, batch, domain))
+                for future in asyncio.as_completed(pending):
+                    await self._apply_changes(run_id, domain, await future, fields)
+
+            await runs_collection.update_one(
+                {"_id": ObjectId(run_id)},
+                {"$set": {"status": "completed", "completed_at": datetime.utcnow()}}
+            )
+            logger.info(f"Re-extraction run {run_id} for {domain} completed")
+
+        except Exception as e:
+            logger.error(f"Error in re-extraction run {run_id}: {e}")
+            await runs_collection.update_one(
+                {"_id": ObjectId(run_id)},
+                {"$set": {"status": "failed", "completed_at": datetime.utcnow(), "error": str(e)}}
+            )
+        finally:
+            self.active_runs.pop(run_id, None)
+
+    async def _apply_changes(self, run_id: str, domain: str, records: List[Dict], fields: Optional[List[str]]):
+        """Write only changed fields; businesses missing from the collection are inserted"""
+        if not records:
+            return
+        db = database.get_database()
+        businesses_collection = db.businesses
+
+        urls = [record["page_url"] for record in records]
+        existing = {}
+        async for doc in businesses_collection.find({"domain": domain, "page_url": {"$in": urls}}):
+            existing[doc["page_url"]] = doc
+
+        now = datetime.utcnow()
+        operations = []
+        updated = inserted = unchanged = 0
+        for record in records:
+            doc = existing.get(record["page_url"])
+            if doc is None:
+                operations.append(UpdateOne(
+                    {"domain": domain, "page_url": record["page_url"]},
+                    {
+                        "$set": {**record, "completeness": Completeness.DETAIL, "reextracted_at": now},
+                        "$setOnInsert": {"scraped_at": now, "business_key": business_key(domain, record["page_url"])},
+                    },
+                    upsert=True
+                ))
+                inserted += 1
+                continue
+
+            changed = reextraction_changes(doc, record, fields)
+            if not changed:
+                unchanged += 1
+                continue
+            changed["reextracted_at"] = now
+            operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": changed}))
+            updated += 1
+
+        if operations:
+            await businesses_collection.bulk_write(operations, ordered=False)
+
+        await db.reextraction_runs.update_one(
+            {"_id": ObjectId(run_id)},
+            {"$inc": {
+                "pages_parsed": len(records),
+                "businesses_updated": updated,
+                "businesses_inserted": inserted,
+                "businesses_unchanged": unchanged,
+            }}
+        )
+
+# Global re-extraction service instance
+reextraction_service = ReextractionService()
@@ -1,25 +1,61 @@
 import asyncio
-import aiohttp
 import logging
-from datetime import datetime
-from typing import List, Dict, Optional
+import math
+from datetime import datetime, timedelta
+from typing import Awaitable, List, Dict, Optional, Set, Tuple
 from motor.motor_asyncio import AsyncIOMotorCollection
 from pymongo import MongoClient
 from bson.objectid import ObjectId
 from models.database import database
-from models.schemas import ScrapingJob, ScrapingStatus, BusinessData, ScrapingProgress
+from models.schemas import ScrapingJob, ScrapingStatus, BusinessData, CityData, Completeness
 from scrapers.base_scraper import get_scraper
+from scrapers.sitemap import is_company_url
+from scrapers.rate_controller import rate_controller
+from scrapers.http_client import http_client_manager
+from scrapers.crawl_scheduler import crawl_scheduler, crawl_flow
+from utils.helpers import domain_host, extract_business_id_from_url
+from services.crawl_pipeline import PageProgressTracker, JobControl, ProgressCheckpointer, minute_bucket
+from services.business_writer import BusinessWriter, INSERTED, FAILED
+from services.seen_set import SeenSet, load_seen_set
+from services.crawl_frontier import CrawlFrontier, DETAIL, get_frontier_stats, next_listing_pages
+from services.redis_frontier import RedisFrontier, get_redis_frontier_stats
+from services.job_leases import job_leases
+from services.enrichment_service import enrichment_service
+from services.city_registry import city_registry
+from utils.redis_client import distributed
 from config import settings
 import time
 
 logger = logging.getLogger(__name__)
 
+# Detail queue sizing for the listing -> detail pipeline
+PIPELINE_MIN_QUEUE_SIZE = 100
+PIPELINE_QUEUE_PER_WORKER = 10
+
+def company_id(url: str) -> Optional[int]:
+    """Numeric Yello company id of a business URL (ids grow as businesses are added)"""
+    business_id = extract_business_id_from_url(url)
+    return int(business_id) if business_id else None
+
+def feed_quiet_pages(unit: Dict, new_business_urls: List[str], watermark: int) -> int:
+    """Listing pages in a row (this one included) without an unseen business above the watermark"""
+    fresh = any((company_id(url) or watermark + 1) > watermark for url in new_business_urls)
+    return 0 if fresh else unit.get("quiet_pages", 0) + 1
+
 class ScrapingService:
     """Service for managing and executing scraping jobs"""
     
     def __init__(self):
         self.active_jobs: Dict[str, asyncio.Task] = {}
         self.job_stats: Dict[str, Dict] = {}
+        # Known businesses of the domains each running job is crawling
+        self.seen_sets: Dict[str, Dict[str, SeenSet]] = {}
+        # Control channels of running jobs (pause/cancel/settings)
+        self.job_controls: Dict[str, JobControl] = {}
+        # Heartbeats the leases of running jobs (and takes over stuck ones)
+        self.lease_task: Optional[asyncio.Task] = None
+        # Jobs owned by another node that this one helps crawl (distributed frontier)
+        self.helper_jobs: Set[str] = set()
     
     async def create_job(self, job_data: Dict) -> str:
         """Create a new scraping job"""
@@ -37,8 +73,21 @@ class ScrapingService:
         logger.info(f"Created scraping job {job_id} with status {job.status}")
         return job_id
     
+    @property
+    def uses_workers(self) -> bool:
+        """Jobs run in scraper worker processes; the API only writes control intents"""
+        return settings.SCRAPER_MODE == "worker"
+    
     async def start_job(self, job_id: str) -> bool:
         """Start a scraping job"""
+        if self.uses_workers:
+            # A worker claims the job once it is RUNNING and unclaimed
+            result = await database.get_database().scraping_jobs.update_one(
+                {"_id": ObjectId(job_id), "status": {"$ne": ScrapingStatus.RUNNING}},
+                {"$set": {"status": ScrapingStatus.RUNNING, "started_at": datetime.utcnow()}}
+            )
+            return result.modified_count > 0
+        
         if job_id in self.active_jobs:
             logger.warning(f"Job {job_id} is already running")
             return False
@@ -46,59 +95,108 @@ class ScrapingService:
         db = database.get_database()
         jobs_collection = db.scraping_jobs
         
-        # Update job status
+        # Update job status; the lease keeps other processes from taking it over
+        now = datetime.utcnow()
         await jobs_collection.update_one(
             {"_id": ObjectId(job_id)},
             {
                 "$set": {
                     "status": ScrapingStatus.RUNNING,
-                    "started_at": datetime.utcnow()
+                    "started_at": now,
+                    **job_leases.lease_fields(now)
                 }
             }
         )
         
         # Start the scraping task
-        task = asyncio.create_task(self._execute_job(job_id))
-        self.active_jobs[job_id] = task
+        self._start_task(job_id)
         
         logger.info(f"Started scraping job {job_id}")
         return True
     
     async def force_start_job(self, job_id: str) -> bool:
         """Force start a scraping job, stopping any existing instance first"""
+        if self.uses_workers:
+            # The worker running the job restarts it; otherwise any worker claims it
+            now = datetime.utcnow()
+            await database.get_database().scraping_jobs.update_one(
+                {"_id": ObjectId(job_id)},
+                {"$set": {"status": ScrapingStatus.RUNNING, "started_at": now, "restart_requested_at": now}}
+            )
+            logger.info(f"Requested force start of job {job_id}")
+            return True
+        
         # If job is already running, stop it first
         if job_id in self.active_jobs:
             logger.info(f"Job {job_id} is already running, stopping it first for force start")
-            task = self.active_jobs.pop(job_id)
-            task.cancel()
-            try:
-                await task
-            except asyncio.CancelledError:
-                pass
+            await self._stop_task(job_id)
         
         db = database.get_database()
         jobs_collection = db.scraping_jobs
         
         # Update job status and reset started_at time
+        now = datetime.utcnow()
         await jobs_collection.update_one(
             {"_id": ObjectId(job_id)},
             {
                 "$set": {
                     "status": ScrapingStatus.RUNNING,
-                    "started_at": datetime.utcnow()
+                    "started_at": now,
+                    **job_leases.lease_fields(now)
                 }
             }
         )
         
         # Start the scraping task
-        task = asyncio.create_task(self._execute_job(job_id))
-        self.active_jobs[job_id] = task
+        self._start_task(job_id)
         
         logger.info(f"Force started scraping job {job_id}")
         return True
     
+    async def refresh_job(self, job_id: str, incremental: bool = True) -> bool:
+        """Crawl a finished job again from a fresh frontier.
+
+        An incremental refresh pages each city listed before only until
+        INCREMENTAL_CUTOFF_PAGES pages in a row show nothing newer than the
+        city's watermark; cities never fully listed are crawled in full.
+        """
+        jobs_collection = database.get_database().scraping_jobs
+        job = await jobs_collection.find_one({"_id": ObjectId(job_id)})
+        finished = (ScrapingStatus.COMPLETED, ScrapingStatus.CANCELLED, ScrapingStatus.FAILED)
+        if not job or job.get("status") not in finished or job_id in self.active_jobs:
+            return False
+
+        for domain in job["domains"]:
+            await self._frontier(job_id, domain).reset()
+        # Progress counters start over; they describe this refresh
+        await jobs_collection.update_one(
+            {"_id": ObjectId(job_id)},
+            {"$set": {
+                "incremental": incremental,
+                "refreshed_at": datetime.utcnow(),
+                "completed_at": None,
+                "total_cities": 0,
+                "cities_completed": 0,
+                "total_businesses": 0,
+                "businesses_scraped": 0,
+                "estimated_businesses": 0,
+                "current_city": None,
+                "current_page": 1,
+            }}
+        )
+        logger.info(f"🔁 Refreshing job {job_id}" + (" incrementally" if incremental else ""))
+        return await self.start_job(job_id)
+    
     async def pause_job(self, job_id: str) -> bool:
         """Pause a running job"""
+        if self.uses_workers:
+            # The worker stops the job after its final checkpoint
+            result = await database.get_database().scraping_jobs.update_one(
+                {"_id": ObjectId(job_id), "status": ScrapingStatus.RUNNING},
+                {"$set": {"status": ScrapingStatus.PAUSED}}
+            )
+            return result.modified_count > 0
+        
         if job_id not in self.active_jobs:
             return False
         
@@ -110,49 +208,43 @@ class ScrapingService:
             {"$set": {"status": ScrapingStatus.PAUSED}}
         )
         
-        # Cancel the task
-        task = self.active_jobs.pop(job_id)
-        task.cancel()
+        # Stop the task after its final checkpoint
+        await self._stop_task(job_id, ScrapingStatus.PAUSED)
         
         logger.info(f"Paused scraping job {job_id}")
         return True
     
     async def resume_job(self, job_id: str) -> bool:
         """Resume a paused job"""
+        if self.uses_workers:
+            result = await database.get_database().scraping_jobs.update_one(
+                {"_id": ObjectId(job_id), "status": {"$ne": ScrapingStatus.RUNNING}},
+                {"$set": {"status": ScrapingStatus.RUNNING, "resumed_at": datetime.utcnow()}}
+            )
+            return result.modified_count > 0
+        
         if job_id in self.active_jobs:
             logger.warning(f"Job {job_id} is already running")
             return False
         
         db = database.get_database()
         jobs_collection = db.scraping_jobs
-        progress_collection = db.scraping_progress
-        
-        # Get the most recent progress record to ensure accurate resumption
-        latest_progress = await progress_collection.find_one(
-            {"job_id": job_id},
-            sort=[("timestamp", -1)]  # Sort by timestamp descending to get the most recent
-        )
         
-        # Update job status and maintain the current_city and current_page values
+        # The resume point is the checkpoint kept on the job (current_city / current_page)
+        now = datetime.utcnow()
         update_data = {
             "status": ScrapingStatus.RUNNING,
-            "resumed_at": datetime.utcnow()
+            "resumed_at": now,
+            **job_leases.lease_fields(now)
         }
         
-        # If we found progress records, use them to set the exact resume point
-        if latest_progress:
-            update_data["current_city"] = latest_progress.get("city")
-            update_data["current_page"] = latest_progress.get("page", 1)
-            logger.info(f"Found resume point at city '{latest_progress.get('city')}', page {latest_progress.get('page', 1)}")
-        
         await jobs_collection.update_one(
             {"_id": ObjectId(job_id)},
             {"$set": update_data}
         )
         
         # Start the scraping task
-        task = asyncio.create_task(self._execute_job(job_id))
-        self.active_jobs[job_id] = task
+        self._start_task(job_id)
         
         logger.info(f"Resumed scraping job {job_id}")
         return True
@@ -172,13 +264,97 @@ class ScrapingService:
             }
         )
         
+        # In worker mode the worker running the job sees the status and stops it
         if job_id in self.active_jobs:
-            task = self.active_jobs.pop(job_id)
-            task.cancel()
+            await self._stop_task(job_id, ScrapingStatus.CANCELLED)
         
         logger.info(f"Cancelled scraping job {job_id}")
         return True
     
+    def update_job_settings(self, job_id: str, job_settings: Dict) -> bool:
+        """Apply new concurrency / delay settings to a job running in this process"""
+        control = self.job_controls.get(job_id)
+        if control is None:
+            return False
+        control.update_settings(job_settings)
+        return True
+    
+    def _start_task(self, job_id: str, helper: bool = False):
+        """Run a job in the background with a fresh control channel.
+
+        A helper works on the shared frontier of a job another node owns: it
+        neither takes the lease nor seeds or completes the job.
+        """
+        if helper:
+            self.helper_jobs.add(job_id)
+        else:
+            self.helper_jobs.discard(job_id)
+        self.job_controls[job_id] = JobControl()
+        self.active_jobs[job_id] = asyncio.create_task(self._execute_job(job_id))
+    
+    async def _stop_task(self, job_id: str, status: Optional[str] = None):
+        """Ask a running job to stop through its control channel.
+
+        The job writes its final checkpoint and exits; it is cancelled if it does
+        not stop within JOB_STOP_TIMEOUT.
+        """
+        task = self.active_jobs.pop(job_id, None)
+        if task is None:
+            return
+        control = self.job_controls.get(job_id)
+        if control is not None:
+            control.request_stop(status)
+        try:
+            await asyncio.wait_for(asyncio.shield(task), timeout=settings.JOB_STOP_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(f"Job {job_id} did not stop within {settings.JOB_STOP_TIMEOUT}s, cancelling it")
+            task.cancel()
+        except Exception as e:
+            logger.error(f"Job {job_id} failed while stopping: {e}")
+    
+    async def shutdown(self):
+        """Stop all running jobs with a final checkpoint; their status stays RUNNING for resume"""
+        if self.lease_task is not None:
+            self.lease_task.cancel()
+            self.lease_task = None
+        await asyncio.gather(*[self._stop_task(job_id) for job_id in list(self.active_jobs)])
+    
+    def start_lease_keeper(self, takeover: bool = True):
+        """Heartbeat the leases of jobs running here; with takeover, also resume stuck jobs"""
+        if self.lease_task is None:
+            self.lease_task = asyncio.create_task(self._keep_leases(takeover))
+    
+    async def _keep_leases(self, takeover: bool):
+        """Renew leases every JOB_HEARTBEAT_INTERVAL and claim RUNNING jobs nobody holds.
+
+        Runs right away at startup, so jobs left RUNNING by a crash or redeploy
+        resume once their lease expires. Claimed jobs are started one per
+        JOB_TAKEOVER_STAGGER seconds so the sites aren't hit all at once.
+        """
+        while True:
+            claimed = None
+            try:
+                owned = [job_id for job_id in self.active_jobs if job_id not in self.helper_jobs]
+                for job_id in await job_leases.renew(owned):
+                    logger.warning(f"Job {job_id} was taken over by another process, stopping it here")
+                    await self._stop_task(job_id)
+                if takeover:
+                    claimed = await self.take_over_job()
+            except Exception as e:
+                logger.error(f"Job lease heartbeat failed: {e}")
+            await asyncio.sleep(settings.JOB_TAKEOVER_STAGGER if claimed else settings.JOB_HEARTBEAT_INTERVAL)
+    
+    async def take_over_job(self) -> Optional[Dict]:
+        """Claim and start one RUNNING job that is unowned or whose lease expired"""
+        job = await job_leases.claim_next()
+        if job is None:
+            return None
+        job_id = str(job["_id"])
+        if job_id not in self.active_jobs:
+            logger.info(f"⏰ Resuming stuck job {job_id}")
+            self._start_task(job_id)
+        return job
+    
     async def get_job_status(self, job_id: str) -> Optional[Dict]:
         """Get current job status and progress"""
         db = database.get_database()
@@ -192,14 +368,58 @@ class ScrapingService:
         if job_id in self.job_stats:
             job.update(self.job_stats[job_id])
         
+        # Live per-host request rate, delay and error rate, plus connection reuse
+        hosts = [domain_host(domain) for domain in job.get("domains", [])]
+        job["rate_control"] = rate_controller.get_stats(hosts)
+        job["http_client"] = http_client_manager.get_stats(hosts)
+        if job_id in self.seen_sets:
+            job["seen_set"] = {domain: seen.get_stats() for domain, seen in self.seen_sets[job_id].items()}
+        job["scheduler"] = crawl_scheduler.get_stats(hosts)
+        if job.get("estimated_businesses"):
+            # Share of the businesses the sites list, as a progress estimate
+            job["estimated_progress"] = round(min(1.0, job.get("businesses_scraped", 0) / job["estimated_businesses"]), 3)
+        if distributed():
+            job["frontier"] = await get_redis_frontier_stats(job_id, job.get("domains", []))
+        else:
+            job["frontier"] = await get_frontier_stats(job_id)
+        
         return job
         
+    async def get_job_throughput(self, job_id: str, minutes: int = 60) -> Dict:
+        """Per-minute throughput of a job over the last `minutes` minutes"""
+        db = database.get_database()
+        since = minute_bucket(datetime.utcnow()) - timedelta(minutes=minutes - 1)
+        
+        # Buckets of all domains of the job, merged per minute
+        history: Dict[datetime, Dict] = {}
+        async for bucket in db.job_throughput.find(
+            {"job_id": job_id, "minute": {"$gte": since}},
+            {"_id": 0, "job_id": 0}
+        ).sort("minute", 1):
+            point = history.setdefault(bucket["minute"], {
+                "minute": bucket["minute"],
+                "pages": 0,
+                "businesses_found": 0,
+                "new_businesses": 0,
+                "businesses_scraped": 0,
+            })
+            for field in ("pages", "businesses_found", "new_businesses", "businesses_scraped"):
+                point[field] += bucket.get(field, 0)
+        
+        points = list(history.values())
+        scraped = sum(point["businesses_scraped"] for point in points)
+        return {
+            "job_id": job_id,
+            "minutes": minutes,
+            "businesses_per_minute": round(scraped / minutes, 2),
+            "history": points,
+        }
+        
     async def _execute_job(self, job_id: str):
         """Execute a scraping job"""
         db = database.get_database()
         jobs_collection = db.scraping_jobs
-        businesses_collection = db.businesses
-        progress_collection = db.scraping_progress
+        helper = job_id in self.helper_jobs
 
         try:
             # Get job details
@@ -217,235 +437,36 @@ class ScrapingService:
                 "start_time": time.time()
             }
 
-            # Create aiohttp session with timeout and concurrency limits
-            timeout = aiohttp.ClientTimeout(total=30)
-            connector = aiohttp.TCPConnector(limit=job["concurrent_requests"])
-
-            async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
-                for domain in job["domains"]:
-                    # Check if job is still running
-                    current_job = await jobs_collection.find_one({"_id": ObjectId(job_id)})
-                    if current_job["status"] != ScrapingStatus.RUNNING:
-                        logger.info(f"Job {job_id} stopped (status: {current_job['status']})")
-                        break
-
-                    self.job_stats[job_id]["current_domain"] = domain
-                    await jobs_collection.update_one(
-                        {"_id": ObjectId(job_id)},
-                        {"$set": {"current_domain": domain}}
-                    )
-
-                    logger.info(f"Scraping domain: {domain}")
-                    scraper = get_scraper(domain, session)
+            # Hold the job's lease while it runs (heartbeats come from the lease keeper)
+            if not helper:
+                await job_leases.acquire(job_id)
 
-                    # Get all cities for this domain
-                    cities = await scraper.get_cities()
-                    
-                    # Only update total_cities if we haven't done this before (for new jobs)
-                    if job.get("total_cities", 0) == 0:
-                        await jobs_collection.update_one(
-                            {"_id": ObjectId(job_id)},
-                            {"$set": {"total_cities": len(cities)}}
-                        )
-
-                    # 🚀 RESUME LOGIC: Start from where we left off
-                    start_city_index = 0
-                    start_page = 1
-                    
-                    # If resuming, find where we stopped
-                    current_city = job.get("current_city")
-                    current_page = job.get("current_page", 1)
-                    
-                    # Check if we're resuming from a previous run
-                    is_resuming = job.get("status") == ScrapingStatus.RUNNING and job.get("resumed_at")
-                    
-                    # If job was previously running and has progress info, try to resume
-                    if current_city:
-                        # Find the index of the current city
-                        for i, city in enumerate(cities):
-                            if city.name == current_city:
-                                start_city_index = i
-                                
-                                # When resuming, start from current_page (not current_page+1)
-                                # This is because current_page points to the next page that needs processing
-                                start_page = current_page
-                                
-                                logger.info(f"🔄 RESUMING from city '{current_city}' (index {i}) at page {start_page}")
-                                break
-                        else:
-                            # City not found, start from beginning
-                            logger.warning(f"Current city '{current_city}' not found in cities list, starting from beginning")
-                            
-                    # Double-check with progress collection to find the most accurate resume point
-                    if is_resuming:
-                        # Get most recent progress record
-                        latest_progress = await progress_collection.find_one(
-                            {"job_id": job_id},
-                            sort=[("timestamp", -1)]
-                        )
-                        
-                        if latest_progress:
-                            latest_city = latest_progress.get("city")
-                            latest_page = latest_progress.get("page", 1)
-                            
-                            # Find city index
-                            for i, city in enumerate(cities):
-                                if city.name == latest_city:
-                                    # Only override if this record is more recent
-                                    if latest_progress.get("timestamp") > job.get("last_progress_timestamp", datetime.min):
-                                        start_city_index = i
-                                        # Resume from the NEXT page since this one was completed
-                                        start_page = latest_page + 1  
-                                        logger.info(f"📊 Found more recent progress record: city '{latest_city}', resuming from page {start_page}")
-                                    break
-
-                    # Process each city starting from resume point
-                    for city_idx, city in enumerate(cities[start_city_index:], start=start_city_index):                        # Check job status again
-                        current_job = await jobs_collection.find_one({"_id": ObjectId(job_id)})
-                        if current_job["status"] != ScrapingStatus.RUNNING:
-                            break
+            control = self.job_controls[job_id]
+            # Requests of this job (and every task it creates) share one flow of the
+            # global scheduler, weighted by the job's concurrency setting
+            crawl_flow.set(job_id)
+            crawl_scheduler.set_weight(job_id, job["concurrent_requests"])
 
-                        self.job_stats[job_id]["current_city"] = city.name
-                        await jobs_collection.update_one(
-                            {"_id": ObjectId(job_id)},
-                            {"$set": {"current_city": city.name}}
-                        )
-
-                        logger.info(f"Scraping city: {city.name} ({city.business_count} businesses) - City {city_idx + 1}/{len(cities)}")
-
-                        # 🚀 RESUME LOGIC: Start from correct page
-                        initial_page = start_page if city_idx == start_city_index else 1
-                        if initial_page > 1:
-                            logger.info(f"🔄 RESUMING at page {initial_page} for city '{city.name}'")
-
-                        # Process pages for this city starting from resume point
-                        page = initial_page
-                        while True:
-                            # Check job status
-                            current_job = await jobs_collection.find_one({"_id": ObjectId(job_id)})
-                            if current_job["status"] != ScrapingStatus.RUNNING:
-                                break
-
-                            # First update just in-memory stats
-                            self.job_stats[job_id]["current_page"] = page
-
-                            # Get business listings for this page
-                            business_urls, has_next = await scraper.get_business_listings(city.url, page)
-
-                            if not business_urls:
-                                logger.warning(f"No businesses found on page {page} of {city.name}")
-                                break
-
-                            # Update total businesses count (track URLs found, not processed)
-                            await jobs_collection.update_one(
-                                {"_id": ObjectId(job_id)},
-                                {"$inc": {"total_businesses": len(business_urls)}}
-                            )
-
-                            logger.info(f"Found {len(business_urls)} businesses on page {page} of {city.name} - starting immediate scraping")
-
-                            # 🎯 SMART DUPLICATE CHECKING: Filter out already processed businesses
-                            new_business_urls = []
-                            for business_url in business_urls:
-                                # Check if business already exists in database
-                                existing = await businesses_collection.find_one({"page_url": business_url})
-                                if not existing:
-                                    new_business_urls.append(business_url)
-                                else:
-                                    logger.debug(f"⏭️  Skipping existing business: {business_url}")
-
-                            logger.info(f"📊 Page {page}: {len(business_urls)} total URLs, {len(new_business_urls)} new businesses to scrape")
-
-                            if new_business_urls:
-                                # Scrape only new businesses with semaphore for concurrency control
-                                semaphore = asyncio.Semaphore(job["concurrent_requests"])
-                                tasks = []
-
-                                for business_url in new_business_urls:
-                                    task = asyncio.create_task(
-                                        self._scrape_business_with_semaphore(
-                                            semaphore, scraper, business_url, 
-                                            businesses_collection, job_id, job["request_delay"]
-                                        )
-                                    )
-                                    tasks.append(task)
-
-                                # Wait for all new businesses on this page to be scraped
-                                results = await asyncio.gather(*tasks, return_exceptions=True)
-
-                                # 🎯 ACCURATE COUNTING: Only count actual successful database saves
-                                successful_saves = 0
-                                for result in results:
-                                    if isinstance(result, BusinessData):
-                                        successful_saves += 1
-                                    elif isinstance(result, Exception):
-                                        logger.error(f"Task failed with exception: {result}")
-
-                                # Update job counter only with actual saves
-                                if successful_saves > 0:
-                                    self.job_stats[job_id]["businesses_scraped"] += successful_saves
-                                    await jobs_collection.update_one(
-                                        {"_id": ObjectId(job_id)},
-                                        {"$inc": {"businesses_scraped": successful_saves}}
-                                    )
-
-                                logger.info(f"✅ Page {page} of {city.name}: successfully saved {successful_saves}/{len(new_business_urls)} new businesses")
-                            else:
-                                logger.info(f"⏭️  Page {page} of {city.name}: all businesses already exist, skipping")
-
-                            # Log progress and update database with current position AFTER processing the page
-                            progress_data = {
-                                "job_id": job_id,
-                                "domain": domain,
-                                "city": city.name,
-                                "page": page,
-                                "businesses_found": len(business_urls),
-                                "new_businesses": len(new_business_urls),
-                                "businesses_scraped": successful_saves if new_business_urls else 0,
-                                "timestamp": datetime.utcnow()
-                            }
-                            
-                            # Save progress to the progress collection
-                            await progress_collection.insert_one(progress_data)
-                            
-                            # Update job document with current position AFTER processing the page
-                            # This ensures we'll resume from the next page, not repeat this page
-                            await jobs_collection.update_one(
-                                {"_id": ObjectId(job_id)},
-                                {"$set": {
-                                    "current_city": city.name,
-                                    "current_page": page,
-                                    "last_progress_timestamp": datetime.utcnow()
-                                }}
-                            )
-
-                            # Move to next page if available
-                            if not has_next:
-                                logger.info(f"✅ Completed all pages for {city.name}")
-                                break
-                                
-                            # Increment page number for next iteration
-                            page += 1
-                            
-                            # When a page is completed, update the job record to point to the NEXT page
-                            # This ensures that if we resume, we start with the next unprocessed page
-                            await jobs_collection.update_one(
-                                {"_id": ObjectId(job_id)},
-                                {"$set": {"current_page": page}}
-                            )
-
-                            # Small delay between pages to be respectful
-                            await asyncio.sleep(job["request_delay"])
-
-                        # Reset start_page for next city
-                        start_page = 1
-
-                        # Mark city as completed
-                        self.job_stats[job_id]["cities_completed"] += 1
-                        await jobs_collection.update_one(
-                            {"_id": ObjectId(job_id)},
-                            {"$inc": {"cities_completed": 1}}
-                        )
+            # Domains are crawled side by side; the scheduler shares the request budget
+            domain_tasks = [
+                asyncio.create_task(self._crawl_domain(job_id, job, domain))
+                for domain in job["domains"]
+            ]
+            try:
+                await asyncio.gather(*domain_tasks)
+            finally:
+                for task in domain_tasks:
+                    if not task.done():
+                        task.cancel()
+                await asyncio.gather(*domain_tasks, return_exceptions=True)
+            
+            if control.stopping:
+                logger.info(f"Job {job_id} stopped (status: {control.stop_status or 'shutdown'})")
+                return
+            if helper:
+                # The owner completes the job once the shared frontier is drained
+                logger.info(f"🤝 Finished helping with job {job_id}")
+                return
             
             # Mark job as completed
             await jobs_collection.update_one(
@@ -459,24 +480,29 @@ class ScrapingService:
             )
             
             logger.info(f"Scraping job {job_id} completed successfully")
+            # Done units are only needed to resume; keep them a while for the job's stats
+            for domain in job["domains"]:
+                await self._frontier(job_id, domain).expire()
+
+            if settings.CRAWL_DEPTH == "listing" and settings.ENRICHMENT_AUTO_START:
+                # Detail pages of the businesses saved from listing cards, at low priority
+                for domain in job["domains"]:
+                    await enrichment_service.start_run(domain)
             
         except asyncio.CancelledError:
-            # Check if job was paused or cancelled
-            current_job = await jobs_collection.find_one({"_id": ObjectId(job_id)})
-            if current_job and current_job.get("status") == ScrapingStatus.PAUSED:
+            # A stop that outlived JOB_STOP_TIMEOUT: pause and cancel have already stored
+            # their status, while a shutdown, lease takeover or restart (no stop status)
+            # leaves the job RUNNING to be resumed from its checkpoint
+            control = self.job_controls.get(job_id)
+            stop_status = control.stop_status if control is not None else None
+            if helper:
+                logger.info(f"Stopped helping with job {job_id}")
+            elif stop_status == ScrapingStatus.PAUSED:
                 logger.info(f"Scraping job {job_id} was paused")
-                # Don't change status - it's already set to PAUSED
-            else:
+            elif stop_status == ScrapingStatus.CANCELLED:
                 logger.info(f"Scraping job {job_id} was cancelled")
-                await jobs_collection.update_one(
-                    {"_id": ObjectId(job_id)},
-                    {
-                        "$set": {
-                            "status": ScrapingStatus.CANCELLED,
-                            "completed_at": datetime.utcnow()
-                        }
-                    }
-                )
+            else:
+                logger.info(f"Scraping job {job_id} was stopped here and stays running for resume")
         except Exception as e:
             # Check if this is a network-related error
             error_str = str(e).lower()
@@ -487,7 +513,10 @@ class ScrapingService:
             
             is_network_error = any(indicator in error_str for indicator in network_error_indicators)
             
-            if is_network_error:
+            if helper:
+                # The job's status is up to its owner
+                logger.error(f"Error while helping with job {job_id}: {e}")
+            elif is_network_error:
                 logger.warning(f"Network error detected in job {job_id}: {e}")
                 await jobs_collection.update_one(
                     {"_id": ObjectId(job_id)},
@@ -514,72 +543,784 @@ class ScrapingService:
                     }
                 )
         finally:
-            # Clean up
-            if job_id in self.active_jobs:
-                self.active_jobs.pop(job_id)
-            if job_id in self.job_stats:
-                self.job_stats.pop(job_id)
+            # Clean up, unless a force start has already replaced this run
+            task = self.active_jobs.get(job_id)
+            if task is None or task is asyncio.current_task():
+                self.active_jobs.pop(job_id, None)
+                self.job_stats.pop(job_id, None)
+                self.seen_sets.pop(job_id, None)
+                self.job_controls.pop(job_id, None)
+                crawl_scheduler.forget(job_id)
+                self.helper_jobs.discard(job_id)
+                if not helper:
+                    await job_leases.release(job_id)
     
-    async def _scrape_business_with_semaphore(
-        self, 
-        semaphore: asyncio.Semaphore, 
-        scraper, 
-        business_url: str, 
-        collection: AsyncIOMotorCollection,
+    def _frontier(self, job_id: str, domain: str):
+        """The job's frontier for a domain; with FRONTIER_BACKEND=redis it is shared by all nodes"""
+        return RedisFrontier(job_id, domain) if distributed() else CrawlFrontier(job_id, domain)
+
+    async def _crawl_domain(self, job_id: str, job: Dict, domain: str):
+        """Crawl one domain of a job through its persisted frontier"""
+        jobs_collection = database.get_database().scraping_jobs
+        if self.job_controls[job_id].stopping:
+            return
+
+        self.job_stats[job_id]["current_domain"] = domain
+        await jobs_collection.update_one(
+            {"_id": ObjectId(job_id)},
+            {"$set": {"current_domain": domain}}
+        )
+
+        logger.info(f"Scraping domain: {domain}")
+        # Sessions are pooled per host and shared across jobs and resumes
+        session = http_client_manager.get_session(domain_host(domain))
+        scraper = get_scraper(domain, session)
+        # request_delay only seeds the adaptive per-host rate
+        rate_controller.configure(domain_host(domain), job["request_delay"])
+
+        # Work units persist in the crawl frontier: a restart releases the
+        # previous run's leases and continues without any discovery requests.
+        # With FRONTIER_BACKEND=redis the frontier is shared by all nodes.
+        frontier = self._frontier(job_id, domain)
+        if await frontier.has_units():
+            await frontier.release_leases()
+            logger.info(f"🔄 RESUMING {domain} from its crawl frontier")
+        elif job_id in self.helper_jobs:
+            # Seeding is left to the job's owner
+            logger.info(f"🤝 {domain} of job {job_id} is not seeded yet, nothing to help with")
+            return
+        else:
+            sitemaps = await scraper.get_sitemaps() if settings.URL_DISCOVERY == "sitemap" else []
+            if sitemaps:
+                # Company URLs come straight from the sitemaps; each root sitemap
+                # counts as a "city" of the job
+                if job.get("total_cities", 0) == 0:
+                    await jobs_collection.update_one(
+                        {"_id": ObjectId(job_id)},
+                        {"$inc": {"total_cities": len(sitemaps)}}
+                    )
+                await frontier.seed(
+                    [CityData(name=url, url=url, business_count=0, domain=domain) for url in sitemaps],
+                    sitemap=True
+                )
+            else:
+                # Cities come from the city registry; only a stale or missing
+                # entry costs discovery requests
+                cities = await city_registry.get_cities(domain, scraper)
+        
+                # Only count cities if we haven't done this before (for new jobs);
+                # each domain of the job adds its own, with its listed business counts
+                if job.get("total_cities", 0) == 0:
+                    await jobs_collection.update_one(
+                        {"_id": ObjectId(job_id)},
+                        {"$inc": {
+                            "total_cities": len(cities),
+                            "estimated_businesses": sum(city.business_count for city in cities),
+                        }}
+                    )
+
+                # 🚀 RESUME LOGIC: Start from where we left off
+                start_city_index = 0
+                start_page = 1
+        
+                # If resuming, find where we stopped
+                current_city = job.get("current_city")
+                current_page = job.get("current_page", 1)
+        
+                # If job was previously running and has progress info, try to resume
+                if current_city:
+                    # Find the index of the current city
+                    for i, city in enumerate(cities):
+                        if city.name == current_city:
+                            start_city_index = i
+                    
+                            # When resuming, start from current_page (not current_page+1)
+                            # This is because current_page points to the next page that needs processing
+                            start_page = current_page
+                    
+                            logger.info(f"🔄 RESUMING from city '{current_city}' (index {i}) at page {start_page}")
+                            break
+                    else:
+                        # City not found, start from beginning
+                        logger.warning(f"Current city '{current_city}' not found in cities list, starting from beginning")
+                
+                # A refresh pages the cities listed before incrementally
+                incremental = {"incremental": True} if job.get("incremental") else {}
+                await frontier.seed(cities, start_city_index, start_page, **incremental)
+
+        # Dedup against an in-memory set of the domain's known businesses
+        seen = await load_seen_set(domain)
+        self.seen_sets.setdefault(job_id, {})[domain] = seen
+
+        # Crawl cities through the listing -> detail pipeline
+        await self._run_pipeline(job_id, job, domain, scraper, frontier, seen)
+
+    async def _run_pipeline(
+        self,
         job_id: str,
-        delay: float
+        job: Dict,
+        domain: str,
+        scraper,
+        frontier,
+        seen: SeenSet
     ):
-        """Scrape a single business with concurrency control"""
-        async with semaphore:
+        """Crawl a domain's frontier with listing producers and a pool of detail workers.
+
+        Up to MAX_CONCURRENT_SCRAPERS producers claim listing pages in crawl order
+        (side by side within a sharded city), turning listing units into detail
+        units; a feeder leases detail
+        units onto the queue, and workers scrape them. Returns when the frontier is
+        exhausted or a stop arrives on the job's control channel; settings changes
+        resize the worker pool and reset the host rate.
+        """
+        control = self.job_controls[job_id]
+        messages = control.subscribe()
+        worker_count = max(1, job["concurrent_requests"])
+        # Bounded queue: the feeder only leases what the workers can pick up soon
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max(PIPELINE_MIN_QUEUE_SIZE, worker_count * PIPELINE_QUEUE_PER_WORKER))
+        tracker = PageProgressTracker()
+        # Cities fully listed by an earlier run but not checkpointed as completed
+        for city in await frontier.uncounted_cities():
+            tracker.finish_city(city["city_index"], city["city"])
+        checkpointer = ProgressCheckpointer(job_id)
+        checkpointer.start()
+
+        async def on_flush(results):
+            # 🎯 ACCURATE COUNTING: count inserts as soon as they are written, so saves
+            # on pages that are not checkpointed before a pause are not lost
+            saved_count = sum(1 for _, outcome in results if outcome == INSERTED)
+            self.job_stats[job_id]["businesses_scraped"] += saved_count
+            checkpointer.inc("businesses_scraped", saved_count)
+            if saved_count:
+                checkpointer.record(domain, businesses_scraped=saved_count)
+            await self._settle_writes(frontier, tracker, results)
+            await self._checkpoint_pages(job_id, frontier, tracker, checkpointer)
+
+        writer = BusinessWriter(on_flush=on_flush)
+        writer.start()
+
+        # Workers check "retire" before taking the next URL, so the pool can shrink
+        pool = {"workers": [], "retire": 0}
+
+        def spawn_workers(count: int):
+            for _ in range(count):
+                pool["workers"].append(asyncio.create_task(
+                    self._detail_worker(job_id, domain, scraper, frontier, queue, tracker, checkpointer, writer, pool)
+                ))
+
+        async def crawl():
+            producers = asyncio.gather(*[
+                self._produce_listings(job_id, job, domain, scraper, frontier, tracker, checkpointer, seen, writer)
+                for _ in range(max(1, settings.MAX_CONCURRENT_SCRAPERS))
+            ])
             try:
-                # Check if business already exists
-                existing = await collection.find_one({"page_url": business_url})
-                if existing:
-                    logger.debug(f"Business already exists: {business_url}")
-                    # Return None to indicate no new business was scraped (don't count as success)
-                    return None
-                
-                # Scrape business details
-                logger.debug(f"Starting detail scraping for: {business_url}")
-                business_data = await scraper.scrape_business_details(business_url)
-                
-                if business_data:
-                    # Save to database
-                    logger.debug(f"Attempting to save business: {business_data.name}")
-                    try:
-                        # Convert to dict and exclude None _id field to avoid MongoDB duplicate key error
-                        business_dict = business_data.model_dump(by_alias=True, exclude_unset=True)
-                        if '_id' in business_dict and business_dict['_id'] is None:
-                            del business_dict['_id']
-                        
-                        result = await collection.insert_one(business_dict)
-                        logger.info(f"✅ Saved new business: {business_data.name} (ID: {result.inserted_id})")
-                        return business_data
-                    except Exception as db_error:
-                        logger.error(f"❌ Database save failed for {business_data.name}: {db_error}")
-                        return None
-                else:
-                    logger.warning(f"❌ Failed to scrape business details: {business_url}")
-                    return None
-                    
+                await self._feed_details(frontier, queue, producers)
+                await producers
+            finally:
+                if not producers.done():
+                    producers.cancel()
+            # Frontier is exhausted: let the workers exit
+            for _ in pool["workers"]:
+                await queue.put(None)
+            await asyncio.gather(*pool["workers"])
+
+        spawn_workers(worker_count)
+        crawl_task = asyncio.create_task(crawl())
+        try:
+            while True:
+                message_task = asyncio.create_task(messages.get())
+                done, _ = await asyncio.wait({crawl_task, message_task}, return_when=asyncio.FIRST_COMPLETED)
+                if crawl_task in done:
+                    message_task.cancel()
+                    crawl_task.result()
+                    return
+
+                kind, payload = message_task.result()
+                if kind == "stop":
+                    logger.info(f"⏹️  Stopping job {job_id} ({payload or 'shutdown'})")
+                    return
+
+                if "concurrent_requests" in payload:
+                    live = len([task for task in pool["workers"] if not task.done()]) - pool["retire"]
+                    change = payload["concurrent_requests"] - live
+                    if change > 0:
+                        spawn_workers(change)
+                    elif change < 0:
+                        pool["retire"] += -change
+                    crawl_scheduler.set_weight(job_id, payload["concurrent_requests"])
+                    logger.info(f"🔧 Job {job_id} now runs {payload['concurrent_requests']} detail workers")
+                if "request_delay" in payload:
+                    rate_controller.set_delay(domain_host(domain), payload["request_delay"])
+        finally:
+            control.unsubscribe(messages)
+            for task in [crawl_task, *pool["workers"]]:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(crawl_task, *pool["workers"], return_exceptions=True)
+            # Businesses already scraped are saved even when the job stops early,
+            # then the final progress checkpoint is written. Units still leased are
+            # released when the job next starts.
+            await writer.close()
+            await self._checkpoint_pages(job_id, frontier, tracker, checkpointer)
+            await checkpointer.close()
+
+    async def _produce_listings(
+        self,
+        job_id: str,
+        job: Dict,
+        domain: str,
+        scraper,
+        frontier,
+        tracker: PageProgressTracker,
+        checkpointer: ProgressCheckpointer,
+        seen: SeenSet,
+        writer: BusinessWriter
+    ):
+        """Claim listing pages from the frontier and turn new business URLs into detail units.
+
+        With CRAWL_DEPTH=listing new businesses are saved from their listing
+        cards instead; only cards without a name become detail units.
+        """
+        while True:
+            unit = await frontier.claim_listing()
+            if unit is None:
+                # Pages in flight on other producers may still add next pages
+                if not await frontier.listings_in_flight():
+                    return
+                await asyncio.sleep(settings.FRONTIER_POLL_INTERVAL)
+                continue
+
+            city_idx, city_name, page = unit["city_index"], unit["city"], unit["page"]
+            if unit.get("beyond_end"):
+                # Sharded past the city's real last page, found meanwhile
+                await frontier.complete_listing(unit, [], False)
+                await self._finish_city_if_listed(frontier, tracker, city_idx, city_name, unit.get("newest_id"))
+                await self._checkpoint_pages(job_id, frontier, tracker, checkpointer)
+                continue
+
+            self.job_stats[job_id]["current_city"] = city_name
+            self.job_stats[job_id]["current_page"] = page
+            if unit.get("sitemap"):
+                await self._process_sitemap(job_id, domain, scraper, frontier, tracker, checkpointer, seen, unit)
+                continue
+            if "partition" in unit:
+                logger.info(f"🗂️  Scraping page {page} of {unit['partition']} in {city_name}")
+            elif page == 1:
+                logger.info(f"Scraping city: {city_name} - City {city_idx + 1}/{unit.get('city_count')}")
+            else:
+                logger.info(f"🔄 Scraping page {page} of {city_name} from the frontier")
+
+            # Get business listings for this page
+            cards = None
+            if settings.CRAWL_DEPTH == "listing":
+                cards, has_next = await scraper.get_listing_cards(unit["city_url"], page)
+                business_urls = [card["page_url"] for card in cards]
+            else:
+                business_urls, has_next = await scraper.get_business_listings(unit["city_url"], page)
+
+            if not business_urls:
+                logger.warning(f"No businesses found on page {page} of {city_name}")
+                checkpointer.record(domain, pages=1)
+                await frontier.complete_listing(unit, [], False)
+                if "last_page" in unit:
+                    await self._end_listing(frontier, unit, page - 1)
+                await self._finish_city_if_listed(frontier, tracker, city_idx, city_name, unit.get("newest_id"))
+                await self._checkpoint_pages(job_id, frontier, tracker, checkpointer)
+                continue
+
+            # Update total businesses count (track URLs found, not processed)
+            checkpointer.inc("total_businesses", len(business_urls))
+
+            new_business_urls = await self._new_business_urls(domain, seen, business_urls)
+            if len(new_business_urls) < len(business_urls):
+                logger.debug(f"⏭️  Skipping {len(business_urls) - len(new_business_urls)} known businesses on page {page}")
+
+            # The newest company id seen in the city's listing so far travels with its
+            # pages and becomes the city's watermark once the listing is complete
+            known_ids = [unit.get("newest_id"), *map(company_id, business_urls)]
+            newest_id = max((business_id for business_id in known_ids if business_id is not None), default=None)
+
+            # Incremental refresh: a city listed before is read as a newest-first feed
+            # and left after INCREMENTAL_CUTOFF_PAGES pages in a row without unseen
+            # businesses above its watermark (unseen older ones are still queued)
+            feed = None
+            if unit.get("incremental"):
+                watermark = unit.get("watermark")
+                if watermark is None:
+                    watermark = await self._city_watermark(domain, city_name)
+                if watermark is not None:
+                    quiet_pages = feed_quiet_pages(unit, new_business_urls, watermark)
+                    if has_next and quiet_pages >= settings.INCREMENTAL_CUTOFF_PAGES:
+                        logger.info(f"✂️  {city_name}: nothing new for {quiet_pages} pages, stopping at page {page}")
+                        has_next = False
+                    feed = {"incremental": True, "watermark": watermark, "quiet_pages": quiet_pages}
+            carry = dict(feed or {})
+            if newest_id is not None:
+                carry["newest_id"] = newest_id
+
+            # Registered before the detail units become claimable by the feeder
+            tracker.register_page(
+                unit["url"], city_idx, city_name, page,
+                len(business_urls), len(new_business_urls), has_next
+            )
+
+            # At the last known page of a listing, find out how far it goes so the
+            # remaining pages can be fetched in parallel instead of one by one.
+            # A city deeper than CATEGORY_PARTITION_MIN_PAGES is crawled through
+            # its category listings instead: they parallelize further and reach
+            # businesses past the site's pagination cap (overlaps hit the seen-set).
+            last_page = None
+            partitions = None
+            at_tail = has_next and page >= unit.get("last_page", page) and feed is None
+            can_partition = settings.CATEGORY_PARTITIONING and page == 1 and "partition" not in unit and feed is None
+            if at_tail and (settings.CITY_SHARDING or can_partition):
+                # Probing can outlast the lease: renew it so the city is not sharded twice
+                probe = self._discover_last_page(scraper, unit, business_urls)
+                last_page = await self._renewing_lease(frontier, unit, probe)
+                if can_partition and last_page >= settings.CATEGORY_PARTITION_MIN_PAGES:
+                    categories = scraper.get_city_categories(unit["city_url"])
+                    partitions = await self._renewing_lease(frontier, unit, categories)
+                    if partitions:
+                        logger.info(f"🗂️  {city_name} (~{last_page} pages) is crawled as {len(partitions)} category listings")
+                if partitions or not settings.CITY_SHARDING:
+                    last_page = None
+
+            detail_urls = new_business_urls
+            saved_from_cards = 0
+            if cards is not None:
+                detail_urls = await self._save_listing_cards(job, domain, unit, cards, new_business_urls, writer)
+                saved_from_cards = len(new_business_urls) - len(detail_urls)
+
+            # Detail units and the next pages are persisted before this page is done,
+            # so a restart either repeats the page or continues after it, never skips it
+            queued = await frontier.complete_listing(unit, detail_urls, has_next, last_page, partitions, carry)
+            # URLs that already had a unit (page repeated after a crash) belong to an earlier run
+            for _ in range(len(detail_urls) - queued):
+                tracker.complete_item(unit["url"], False)
+            queued += saved_from_cards
+            logger.info(f"📊 Page {page} of {city_name}: {len(business_urls)} total URLs, {queued} new businesses queued")
+            checkpointer.record(domain, pages=1, businesses_found=len(business_urls), new_businesses=queued)
+
+            if not queued:
+                logger.info(f"⏭️  Page {page} of {city_name}: all businesses already exist, skipping")
+
+            if not has_next and page < unit.get("last_page", page):
+                await self._end_listing(frontier, unit, page)
+            if not partitions and not next_listing_pages(unit, has_next, last_page):
+                # Shards finish in any order: the city is done when none is open
+                await self._finish_city_if_listed(frontier, tracker, city_idx, city_name, newest_id)
+            await self._checkpoint_pages(job_id, frontier, tracker, checkpointer)
+
+    async def _save_listing_cards(
+        self,
+        job: Dict,
+        domain: str,
+        unit: Dict,
+        cards: List[Dict],
+        new_urls: List[str],
+        writer: BusinessWriter
+    ) -> List[str]:
+        """Save new businesses from their listing cards; returns the URLs of cards without a name.
+
+        The businesses are written before the listing unit completes, so a crash
+        never leaves a page done without them.
+        """
+        new = set(new_urls)
+        detail_urls = []
+        for card in cards:
+            url = card["page_url"]
+            if url not in new:
+                continue
+            if not card.get("name"):
+                detail_urls.append(url)
+                continue
+            # Only fields the card shows are set, like a detail scrape
+            fields = {field: card[field] for field in ("address", "phone", "website") if card.get(field)}
+            business = BusinessData(
+                title=card["name"],
+                name=card["name"],
+                country=job.get("country") or "",
+                city=unit["city"],
+                category=card.get("category") or unit.get("partition") or "",
+                page_url=url,
+                domain=domain,
+                completeness=Completeness.LISTING,
+                **fields
+            )
+            await writer.add(business, context=(unit["url"], unit, True, url))
+        await writer.flush()
+        return detail_urls
+
+    async def _new_business_urls(self, domain: str, seen: SeenSet, urls: List[str]) -> List[str]:
+        """Business URLs not scraped before, marked as seen once returned"""
+        businesses_collection = database.get_database().businesses
+
+        # 🎯 SMART DUPLICATE CHECKING: local seen-set lookups, also across cities.
+        # Only Bloom-filter "maybe" answers need the (domain, page_url) index
+        maybe_urls = [url for url in urls if seen.check(url) is None]
+        existing_urls = set()
+        if maybe_urls:
+            async for doc in businesses_collection.find(
+                {"domain": domain, "page_url": {"$in": maybe_urls}},
+                {"_id": 0, "page_url": 1}
+            ):
+                existing_urls.add(doc["page_url"])
+
+        new_urls = []
+        for url in urls:
+            known = seen.check(url)
+            if known is None:
+                known = url in existing_urls
+            if known:
+                continue
+            # Mark as seen when queued so other cities' listings skip it too
+            seen.add(url)
+            new_urls.append(url)
+        return new_urls
+
+    async def _process_sitemap(
+        self,
+        job_id: str,
+        domain: str,
+        scraper,
+        frontier,
+        tracker: PageProgressTracker,
+        checkpointer: ProgressCheckpointer,
+        seen: SeenSet,
+        unit: Dict
+    ):
+        """Read a sitemap unit: an index adds its child sitemaps, a urlset its company URLs.
+
+        Child sitemaps whose lastmod is not newer than their last read by a
+        completed job are skipped: all their companies were crawled then.
+        """
+        city_idx, city_name = unit["city_index"], unit["city"]
+        sitemap_url = unit["city_url"]
+        sitemap_reads = database.get_database().sitemap_reads
+        children, entries = await scraper.read_sitemap(sitemap_url)
+        checkpointer.record(domain, pages=1)
+
+        if children:
+            company_children = [child for child in children if "compan" in child[0].lower()]
+            children = company_children or children
+            unchanged = await self._unchanged_sitemaps(domain, children)
+            partitions = [(loc.rsplit("/", 1)[-1], loc) for loc, _ in children if loc not in unchanged]
+            logger.info(
+                f"🗺️  {sitemap_url}: {len(partitions)} sitemaps to read"
+                + (f", {len(unchanged)} unchanged since the last crawl" if unchanged else "")
+            )
+            await frontier.complete_listing(unit, [], False, partitions=partitions)
+        else:
+            business_urls = list(dict.fromkeys(loc for loc, _ in entries if is_company_url(loc)))
+            checkpointer.inc("total_businesses", len(business_urls))
+            new_business_urls = await self._new_business_urls(domain, seen, business_urls)
+
+            tracker.register_page(
+                unit["url"], city_idx, city_name, unit["page"],
+                len(business_urls), len(new_business_urls), False
+            )
+            queued = await frontier.complete_listing(unit, new_business_urls, False)
+            for _ in range(len(new_business_urls) - queued):
+                tracker.complete_item(unit["url"], False)
+            logger.info(f"🗺️  {sitemap_url}: {len(business_urls)} company URLs, {queued} queued")
+            checkpointer.record(domain, pages=1, businesses_found=len(business_urls), new_businesses=queued)
+
+        await sitemap_reads.update_one(
+            {"domain": domain, "url": sitemap_url},
+            {"$set": {"read_at": datetime.utcnow(), "job_id": job_id}},
+            upsert=True
+        )
+        await self._finish_city_if_listed(frontier, tracker, city_idx, city_name)
+        await self._checkpoint_pages(job_id, frontier, tracker, checkpointer)
+
+    async def _unchanged_sitemaps(self, domain: str, children: List[Tuple[str, Optional[datetime]]]) -> Set[str]:
+        """Child sitemaps not modified since a completed job read them"""
+        db = database.get_database()
+        lastmods = {loc: lastmod for loc, lastmod in children if lastmod}
+        if not lastmods:
+            return set()
+        reads = [
+            doc async for doc in db.sitemap_reads.find(
+                {"domain": domain, "url": {"$in": list(lastmods)}},
+                {"_id": 0, "url": 1, "read_at": 1, "job_id": 1}
+            )
+        ]
+        completed = {
+            str(doc["_id"]) async for doc in db.scraping_jobs.find(
+                {
+                    "_id": {"$in": [ObjectId(job_id) for job_id in {read["job_id"] for read in reads}]},
+                    "status": ScrapingStatus.COMPLETED
+                },
+                {"_id": 1}
+            )
+        }
+        return {
+            read["url"] for read in reads
+            if read["job_id"] in completed and lastmods[read["url"]] <= read["read_at"]
+        }
+
+    async def _renewing_lease(self, frontier, unit: Dict, work: Awaitable):
+        """Await slow work on a claimed unit, renewing its lease so no other process takes it over"""
+        async def renew():
+            while True:
+                await asyncio.sleep(settings.FRONTIER_LEASE_SECONDS / 3)
+                if not await frontier.renew_lease(unit):
+                    logger.warning(f"⚠️ Lost the lease of {unit['url']} to another process")
+                    return
+
+        renewer = asyncio.create_task(renew())
+        try:
+            return await work
+        finally:
+            renewer.cancel()
+
+    async def _discover_last_page(self, scraper, unit: Dict, business_urls: List[str]) -> int:
+        """Estimate a city's last listing page, from its business count or by probing.
+
+        Page 1 of a city with a known business count gives an estimate directly.
+        Otherwise pages are probed at doubling distances until one is empty, then
+        the boundary is found by binary search. A probe that returns the URLs of
+        the current page is taken as a redirect and counts as empty. The result
+        may be off: shards past the real end are dropped and the last shard
+        continues page by page.
+        """
+        page, city_name = unit["page"], unit["city"]
+        max_pages = settings.CITY_MAX_PAGES
+        if page == 1 and unit.get("business_count"):
+            estimate = min(math.ceil(unit["business_count"] / len(business_urls)), max_pages)
+            if estimate > page:
+                logger.info(f"🔭 {city_name}: ~{estimate} pages from {unit['business_count']} businesses")
+                return estimate
+
+        # has_next: the next page exists
+        low = page + 1
+        if low >= max_pages:
+            return low
+        known = set(business_urls)
+        probes = 0
+
+        async def probe(probe_page: int) -> Tuple[bool, bool]:
+            nonlocal probes
+            probes += 1
+            urls, more = await scraper.get_business_listings(unit["city_url"], probe_page)
+            exists = bool(urls) and not known.issuperset(urls)
+            return exists, exists and not more
+
+        high = low * 2
+        while high <= max_pages:
+            exists, last = await probe(high)
+            if last:
+                low = high
+                break
+            if not exists:
+                break
+            low, high = high, high * 2
+        else:
+            high = max_pages + 1
+
+        while high - low > 1:
+            middle = (low + high) // 2
+            exists, last = await probe(middle)
+            if last:
+                low = middle
+                break
+            if exists:
+                low = middle
+            else:
+                high = middle
+
+        logger.info(f"🔭 {city_name}: last page ~{low} after {probes} probes")
+        return low
+
+    async def _end_listing(self, frontier, unit: Dict, last_page: int):
+        """Drop a sharded listing's pages past its real last page"""
+        dropped = await frontier.end_listing(unit, last_page)
+        listing = f"{unit['partition']} in {unit['city']}" if "partition" in unit else unit["city"]
+        logger.info(f"✂️  {listing} ends at page {last_page}" + (f", dropped {dropped} pages" if dropped else ""))
+
+    async def _finish_city_if_listed(
+        self,
+        frontier,
+        tracker: PageProgressTracker,
+        city_idx: int,
+        city_name: str,
+        newest_id: Optional[int] = None
+    ):
+        """Close a city in the tracker once none of its listing pages is open.
+
+        The city's watermark (the newest company id its listing showed) is
+        written here, once per listing, from the id carried by its pages.
+        """
+        if await frontier.city_listed(city_idx):
+            logger.info(f"✅ Queued all pages for {city_name}")
+            tracker.finish_city(city_idx, city_name)
+            # From now on refreshes may cut the city's listing off early
+            update = {"$set": {"listed_at": datetime.utcnow()}}
+            if newest_id is not None:
+                update["$max"] = {"newest_id": newest_id}
+            await database.get_database().city_watermarks.update_one(
+                {"domain": frontier.domain, "city": city_name}, update, upsert=True
+            )
+
+    async def _city_watermark(self, domain: str, city_name: str) -> Optional[int]:
+        """Newest company id of a city that was fully listed before, else None"""
+        doc = await database.get_database().city_watermarks.find_one(
+            {"domain": domain, "city": city_name, "listed_at": {"$ne": None}},
+            {"_id": 0, "newest_id": 1}
+        )
+        return doc.get("newest_id") if doc else None
+
+    async def _feed_details(self, frontier, queue: asyncio.Queue, producer: asyncio.Future):
+        """Lease detail units onto the worker queue until the frontier is exhausted"""
+        while True:
+            units = await frontier.claim_details(max(1, queue.maxsize - queue.qsize()))
+            for unit in units:
+                await queue.put(unit)
+            if units:
+                continue
+
+            if producer.done():
+                producer.result()
+                # Leased units may still be failing back to pending
+                if await frontier.remaining_details() == 0:
+                    return
+            await asyncio.sleep(settings.FRONTIER_POLL_INTERVAL)
+
+    async def _detail_worker(
+        self,
+        job_id: str,
+        domain: str,
+        scraper,
+        frontier,
+        queue: asyncio.Queue,
+        tracker: PageProgressTracker,
+        checkpointer: ProgressCheckpointer,
+        writer: BusinessWriter,
+        pool: Dict
+    ):
+        """Scrape leased detail units from the queue until the feeder sends a stop marker"""
+        while True:
+            if pool["retire"] > 0:
+                pool["retire"] -= 1
+                return
+
+            unit = await queue.get()
+            if unit is None:
+                return
+
+            # Only units created in this run count towards this run's page checkpoints
+            tracked = unit.get("run_id") == frontier.run_id
+            business_data = None
+            try:
+                business_data = await self._scrape_business(scraper, unit["url"])
             except Exception as e:
-                # Check if this is a network error that should pause the job
-                error_str = str(e).lower()
-                network_error_indicators = [
-                    'connection', 'timeout', 'network', 'dns', 'resolve', 
-                    'unreachable', 'refused', 'reset', 'ssl', 'certificate'
-                ]
+                logger.error(f"Task failed with exception: {e}")
+
+            if business_data:
+                # 🎯 ACCURATE COUNTING: the unit is done when the bulk write has persisted it
+                await writer.add(business_data, context=(unit.get("listing_url"), unit, tracked, unit["url"]))
+            elif await frontier.fail_detail(unit) and tracked:
+                # Out of attempts: the page is complete without this business
+                tracker.complete_item(unit.get("listing_url"), False)
+                await self._checkpoint_pages(job_id, frontier, tracker, checkpointer)
+
+    async def _settle_writes(self, frontier, tracker: PageProgressTracker, results: List[Tuple[Tuple, str]]):
+        """Settle the frontier units and page items of a flushed batch of businesses.
+
+        Saved or already existing businesses complete their detail units. A
+        failed write is retried like a failed scrape, so its page is not
+        checkpointed without it.
+        """
+        await frontier.complete_details([
+            unit["_id"] for (_, unit, _, _), outcome in results
+            if outcome != FAILED and unit["kind"] == DETAIL
+        ])
+        failed_cards: Dict[str, Tuple[Dict, List[str]]] = {}
+        for (listing_url, unit, tracked, url), outcome in results:
+            if outcome != FAILED:
+                if tracked:
+                    tracker.complete_item(listing_url, outcome == INSERTED)
+            elif unit["kind"] == DETAIL:
+                # Not persisted: retried like a failed scrape, the page waits for it
+                if await frontier.fail_detail(unit) and tracked:
+                    tracker.complete_item(listing_url, False)
+            else:
+                failed_cards.setdefault(listing_url, (unit, []))[1].append(url)
+        # Businesses saved from listing cards have no unit: a lost one is
+        # queued for a detail scrape, which completes its page item
+        for listing_url, (unit, urls) in failed_cards.items():
+            queued = await frontier.add_details(unit, urls)
+            for _ in range(len(urls) - queued):
+                tracker.complete_item(listing_url, False)
+
+    async def _checkpoint_pages(
+        self,
+        job_id: str,
+        frontier,
+        tracker: PageProgressTracker,
+        checkpointer: ProgressCheckpointer
+    ):
+        """Record progress for pages (and cities) that finished in crawl order.
+
+        Progress is accumulated in the checkpointer, which writes it to MongoDB
+        as one coalesced update per interval.
+        """
+        for event in tracker.pop_completed():
+            if event["type"] == "city":
+                logger.info(f"✅ Completed all pages for {event['city']}")
+                # Mark city as completed (once, even with several nodes on the job)
+                if await frontier.mark_city_completed(event["city_index"], event["city"]):
+                    self.job_stats[job_id]["cities_completed"] += 1
+                    checkpointer.inc("cities_completed")
+                continue
+
+            successful_saves = event["businesses_scraped"]
+            if event["new_businesses"]:
+                logger.info(f"✅ Page {event['page']} of {event['city']}: successfully saved {successful_saves}/{event['new_businesses']} new businesses")
+
+            now = datetime.utcnow()
+
+            # The job's single resume checkpoint: current_page points to the NEXT
+            # page that needs processing, so a resume never repeats a checkpointed page
+            next_page = event["page"] + 1 if event["has_next"] else event["page"]
+            checkpointer.set({
+                "current_city": event["city"],
+                "current_page": next_page,
+                "last_progress_timestamp": now
+            })
+
+        await checkpointer.maybe_flush()
+
+    async def _scrape_business(self, scraper, business_url: str) -> Optional[BusinessData]:
+        """Scrape a single business (saving is left to the job's BusinessWriter)"""
+        try:
+            # Scrape business details
+            logger.debug(f"Starting detail scraping for: {business_url}")
+            business_data = await scraper.scrape_business_details(business_url)
+            
+            if business_data:
+                logger.debug(f"Scraped business: {business_data.name}")
+                business_data.completeness = Completeness.DETAIL
+                return business_data
+            else:
+                logger.warning(f"❌ Failed to scrape business details: {business_url}")
+                return None
                 
-                if any(indicator in error_str for indicator in network_error_indicators):
-                    logger.warning(f"Network error scraping {business_url}: {e}")
-                    # This individual error will be handled by the main job error handler
-                    raise e
-                else:
-                    logger.error(f"Error scraping business {business_url}: {e}")
-                    return None
-            finally:
-                # Delay between requests
-                await asyncio.sleep(delay)
+        except Exception as e:
+            # Check if this is a network error that should pause the job
+            error_str = str(e).lower()
+            network_error_indicators = [
+                'connection', 'timeout', 'network', 'dns', 'resolve', 
+                'unreachable', 'refused', 'reset', 'ssl', 'certificate'
+            ]
+            
+            if any(indicator in error_str for indicator in network_error_indicators):
+                logger.warning(f"Network error scraping {business_url}: {e}")
+                # This individual error will be handled by the main job error handler
+                raise e
+            else:
+                logger.error(f"Error scraping business {business_url}: {e}")
+                return None
 
 # Global scraping service instance
 scraping_service = ScrapingService()
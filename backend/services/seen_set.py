@@ -0,0 +1,180 @@
+import hashlib
+import logging
+import math
+import time
+from array import array
+from bisect import bisect_left
+from typing import Dict, Optional, Union
+from models.database import database
+from utils.helpers import extract_business_id_from_url
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+class CompanyIdSet:
+    """Roaring-style set of non-negative integers.
+
+    Values are split on their high 16 bits into containers holding the low 16
+    bits: a sorted array('H') while sparse (2 bytes per id), switching to an
+    8 KB bitmap once a container passes ARRAY_LIMIT ids.
+    """
+
+    ARRAY_LIMIT = 4096
+    BITMAP_BYTES = 8192
+
+    def __init__(self):
+        self.containers: Dict[int, Union[array, bytearray]] = {}
+        self.count = 0
+
+    def _to_bitmap(self, values: array) -> bytearray:
+        bitmap = bytearray(self.BITMAP_BYTES)
+        for low in values:
+            bitmap[low >> 3] |= 1 << (low & 7)
+        return bitmap
+
+    def add(self, value: int) -> bool:
+        """Add a value; returns False if it was already present"""
+        high, low = value >> 16, value & 0xFFFF
+        container = self.containers.get(high)
+        if container is None:
+            self.containers[high] = array('H', [low])
+        elif isinstance(container, bytearray):
+            mask = 1 << (low & 7)
+            if container[low >> 3] & mask:
+                return False
+            container[low >> 3] |= mask
+        else:
+            index = bisect_left(container, low)
+            if index < len(container) and container[index] == low:
+                return False
+            container.insert(index, low)
+            if len(container) > self.ARRAY_LIMIT:
+                self.containers[high] = self._to_bitmap(container)
+        self.count += 1
+        return True
+
+    def discard(self, value: int):
+        high, low = value >> 16, value & 0xFFFF
+        container = self.containers.get(high)
+        if container is None:
+            return
+        if isinstance(container, bytearray):
+            mask = 1 << (low & 7)
+            if container[low >> 3] & mask:
+                container[low >> 3] &= ~mask & 0xFF
+                self.count -= 1
+        else:
+            index = bisect_left(container, low)
+            if index < len(container) and container[index] == low:
+                del container[index]
+                self.count -= 1
+
+    def __contains__(self, value: int) -> bool:
+        container = self.containers.get(value >> 16)
+        if container is None:
+            return False
+        low = value & 0xFFFF
+        if isinstance(container, bytearray):
+            return bool(container[low >> 3] & (1 << (low & 7)))
+        index = bisect_left(container, low)
+        return index < len(container) and container[index] == low
+
+    def __len__(self) -> int:
+        return self.count
+
+    def memory_bytes(self) -> int:
+        return sum(
+            len(c) if isinstance(c, bytearray) else len(c) * c.itemsize
+            for c in self.containers.values()
+        )
+
+class BloomFilter:
+    """Fixed-size Bloom filter for strings, allocated on first add"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits: Optional[bytearray] = None
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str):
+        if self.bits is None:
+            self.bits = bytearray((self.size + 7) // 8)
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        if self.bits is None:
+            return False
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def memory_bytes(self) -> int:
+        return len(self.bits) if self.bits is not None else 0
+
+class SeenSet:
+    """Businesses of one domain that are already saved or queued in this run.
+
+    URLs with a Yello company id are tracked exactly by id, so the same company
+    listed under several cities (or with a different slug) is seen once. Other
+    URLs go into a Bloom filter, whose positive answers are only "maybe" and
+    must be confirmed against the database.
+    """
+
+    def __init__(self, domain: str):
+        self.domain = domain
+        self.ids = CompanyIdSet()
+        self.urls = BloomFilter(settings.SEEN_SET_BLOOM_CAPACITY, settings.SEEN_SET_BLOOM_ERROR_RATE)
+
+    def add(self, url: str):
+        business_id = extract_business_id_from_url(url)
+        if business_id is not None:
+            self.ids.add(int(business_id))
+        else:
+            self.urls.add(url)
+
+    def discard(self, url: str):
+        """Forget a URL so it can be queued again (not possible for Bloom-tracked URLs)"""
+        business_id = extract_business_id_from_url(url)
+        if business_id is not None:
+            self.ids.discard(int(business_id))
+
+    def check(self, url: str) -> Optional[bool]:
+        """True if seen, False if new, None if it may have been seen"""
+        business_id = extract_business_id_from_url(url)
+        if business_id is not None:
+            return int(business_id) in self.ids
+        return None if url in self.urls else False
+
+    def get_stats(self) -> Dict:
+        return {
+            "company_ids": len(self.ids),
+            "other_urls": self.urls.count,
+            "memory_bytes": self.ids.memory_bytes() + self.urls.memory_bytes(),
+        }
+
+async def load_seen_set(domain: str) -> SeenSet:
+    """Warm-load the seen-set for a domain from saved businesses"""
+    seen = SeenSet(domain)
+    start = time.monotonic()
+    # Projection on page_url only: covered by the (domain, page_url) index
+    cursor = database.get_database().businesses.find(
+        {"domain": domain},
+        {"_id": 0, "page_url": 1},
+        batch_size=10000
+    )
+    async for doc in cursor:
+        seen.add(doc["page_url"])
+
+    stats = seen.get_stats()
+    logger.info(
+        f"🧠 Loaded {stats['company_ids'] + stats['other_urls']} known businesses for {domain} "
+        f"({stats['memory_bytes'] / 1024:.0f} KB) in {time.monotonic() - start:.1f}s"
+    )
+    return seen
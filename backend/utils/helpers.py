@@ -82,12 +82,38 @@ def normalize_domain(domain: str) -> str:
     parsed = urlparse(domain)
     return f"{parsed.scheme}://{parsed.netloc}"
 
+def domain_host(domain: str) -> str:
+    """Get the host (netloc) of a domain or URL"""
+    return urlparse(normalize_domain(domain)).netloc
+
 def extract_business_id_from_url(url: str) -> Optional[str]:
     """Extract business ID from Yello URL"""
     # Pattern: /company/{id}/{slug}
     match = re.search(r'/company/(\d+)/', url)
     return match.group(1) if match else None
 
+def business_key(domain: str, page_url: str) -> str:
+    """Deterministic key for a business: domain host + Yello company id (or the URL)"""
+    business_id = extract_business_id_from_url(page_url)
+    return f"{domain_host(domain)}:{business_id or page_url}"
+
+def category_page_url(category_url: str, page: int) -> str:
+    """URL of a page of a category listing.
+
+    Yello sites number category pages before the city filter:
+    /category/{slug}/city:{city} continues as /category/{slug}/{page}/city:{city}.
+    """
+    if page == 1:
+        return category_url
+    path, city_filter, city = category_url.partition('/city:')
+    return f"{path}/{page}{city_filter}{city}"
+
+def listing_page_url(listing_url: str, page: int) -> str:
+    """URL of a page of a city listing (/location/{city}/{page}) or a category listing"""
+    if '/category/' in listing_url:
+        return category_page_url(listing_url, page)
+    return listing_url if page == 1 else f"{listing_url}/{page}"
+
 def safe_int(value: str, default: int = 0) -> int:
     """Safely convert string to int"""
     try:
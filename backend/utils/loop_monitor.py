@@ -0,0 +1,68 @@
+"""
+Event loop lag monitor
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class EventLoopMonitor:
+    """Measure how long the event loop is blocked by synchronous work.
+
+    A background task sleeps for a fixed interval and records how late it wakes
+    up; any delay beyond the interval is time the loop spent running something
+    else without yielding (HTML parsing, JSON encoding, ...).
+    """
+
+    def __init__(self, interval: float = 0.05, threshold: float = 0.01):
+        self.interval = interval
+        self.threshold = threshold
+        self.task: Optional[asyncio.Task] = None
+        self.lags: Deque[float] = deque(maxlen=2000)
+        self.blocked_time = 0.0
+        self.max_lag = 0.0
+        self.started_at: Optional[float] = None
+
+    def start(self):
+        """Start measuring in a background task of the running loop"""
+        if self.task is None:
+            self.started_at = time.monotonic()
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def _run(self):
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = time.monotonic() - start - self.interval
+            self.lags.append(lag)
+            if lag > self.threshold:
+                self.blocked_time += lag
+            self.max_lag = max(self.max_lag, lag)
+
+    def get_stats(self) -> Dict:
+        lags = sorted(self.lags)
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0.0
+        return {
+            "blocked_time": round(self.blocked_time, 3),
+            "blocked_ratio": round(self.blocked_time / elapsed, 4) if elapsed else 0.0,
+            "max_lag": round(self.max_lag, 4),
+            "p50_lag": round(lags[len(lags) // 2], 4) if lags else 0.0,
+            "p99_lag": round(lags[int(len(lags) * 0.99)], 4) if lags else 0.0,
+            "uptime": round(elapsed, 1),
+        }
+
+# Global event loop monitor
+loop_monitor = EventLoopMonitor()
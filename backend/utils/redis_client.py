@@ -0,0 +1,58 @@
+"""
+Shared asyncio Redis connection for the distributed crawl frontier.
+
+redis is an optional dependency: it is only needed with FRONTIER_BACKEND=redis.
+"""
+
+import asyncio
+import logging
+from typing import Optional
+from config import settings
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+AVAILABLE = aioredis is not None
+
+_client = None
+
+def get_redis():
+    """Process-wide client for REDIS_URL, created on first use"""
+    global _client
+    if aioredis is None:
+        raise RuntimeError("FRONTIER_BACKEND=redis needs the redis package (pip install redis)")
+    if _client is None:
+        _client = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+        logger.info(f"Connected to Redis at {settings.REDIS_URL}")
+    return _client
+
+async def close_redis():
+    """Close the process-wide client, if one was created"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+def distributed() -> bool:
+    """Whether work units and per-host rate tokens are shared through Redis"""
+    return settings.FRONTIER_BACKEND == "redis"
+
+async def redis_reachable() -> bool:
+    """Whether REDIS_URL answers a ping"""
+    if aioredis is None:
+        return False
+    try:
+        return bool(await asyncio.wait_for(get_redis().ping(), timeout=5))
+    except Exception:
+        await close_redis()
+        return False
+
+def shared_rates() -> bool:
+    """Whether per-host rate tokens are drawn from Redis by every node and worker process"""
+    if distributed():
+        return True
+    return settings.SCRAPER_MODE == "worker" and settings.WORKER_RATE_BACKEND == "redis" and AVAILABLE
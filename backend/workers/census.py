@@ -0,0 +1,60 @@
+"""
+City census: discover the cities and business counts of every country's domain.
+
+    python -m workers.census [--force] [--domain businesslist.pk ...]
+
+Domains come from countries_updated.json and are discovered concurrently
+(CITY_CENSUS_CONCURRENCY at a time) into the city registry, which jobs then
+start and resume from. Entries younger than CITY_REGISTRY_TTL_DAYS are kept
+unless --force is given.
+"""
+
+import argparse
+import asyncio
+import logging
+from models.database import database
+from services.city_registry import city_registry
+from services.job_seeding_service import job_seeding_service
+from scrapers.http_client import http_client_manager
+from scrapers.html_archive import html_archive
+from utils.redis_client import close_redis
+
+logger = logging.getLogger(__name__)
+
+def country_domains():
+    """Domains of all countries in the configuration, in file order"""
+    return [
+        country["domain"]
+        for region in job_seeding_service.countries_data.get("countries", [])
+        for country in region.get("countries", [])
+        if country.get("domain")
+    ]
+
+async def run_census(domains, force: bool):
+    await database.connect_db()
+    try:
+        results = await city_registry.census(domains, force=force)
+    finally:
+        await http_client_manager.close()
+        await html_archive.close()
+        await close_redis()
+        await database.close_db()
+
+    for domain, result in results.items():
+        if "cities" in result:
+            print(f"{domain:40} {result['status']:12} {result['cities']:6} cities {result['businesses']:10,} businesses")
+        else:
+            print(f"{domain:40} {result['status']:12} {result.get('error', '')}")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Discover cities and business counts of all country domains")
+    parser.add_argument("--force", action="store_true", help="rediscover domains whose registry entry is still fresh")
+    parser.add_argument("--domain", action="append", help="only these domains (repeatable)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(run_census(args.domain or country_domains(), args.force))
+
+if __name__ == "__main__":
+    main()
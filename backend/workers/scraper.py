@@ -0,0 +1,98 @@
+"""
+Scraper worker processes, decoupled from the API server.
+
+    python -m workers.scraper --jobs 4 --processes 2
+
+Each process claims RUNNING jobs from MongoDB and runs up to --jobs of them on
+its own event loop, and schedules freshness revisits. Run it with SCRAPER_MODE=worker so the API only writes
+control intents (start, pause, cancel, settings) for the workers to pick up.
+
+Request limits are per process unless shared: every worker process gets
+1/WORKER_PROCESS_COUNT of MAX_CONCURRENT_REQUESTS and MAX_REQUESTS_PER_HOST,
+and draws host rate tokens from Redis (WORKER_RATE_BACKEND=redis, or
+"auto" when REDIS_URL answers) or gets the same fraction of each host's
+rate ("local"). WORKER_PROCESS_COUNT defaults to --processes; set it to the
+total when workers run on several machines, or every host is crawled that
+many times faster than configured.
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import signal
+from models.database import database
+from services.job_worker import JobWorker
+from services.enrichment_service import enrichment_service
+from services.freshness_service import freshness_service
+from scrapers.http_client import http_client_manager
+from scrapers.html_archive import html_archive
+from scrapers.parse_pool import parse_pool
+from utils.redis_client import close_redis, redis_reachable
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+async def run_worker(max_jobs: int):
+    """Run one worker until SIGTERM / SIGINT, then checkpoint and release its jobs"""
+    await database.connect_db()
+    if settings.WORKER_RATE_BACKEND == "auto":
+        settings.WORKER_RATE_BACKEND = "redis" if await redis_reachable() else "local"
+        how = "shared through Redis" if settings.WORKER_RATE_BACKEND == "redis" else "divided"
+        logger.info(f"Host rates are {how} across {settings.WORKER_PROCESS_COUNT} worker processes")
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    # Revisit runs lease their businesses, so every worker process can schedule them
+    freshness_service.start_scheduler()
+    try:
+        await JobWorker(max_jobs).run(stop)
+    finally:
+        await enrichment_service.shutdown()
+        await freshness_service.shutdown()
+        await http_client_manager.close()
+        await html_archive.close()
+        parse_pool.shutdown()
+        await close_redis()
+        await database.close_db()
+
+def run_process(max_jobs: int, process_count: int):
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(processName)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    if settings.WORKER_PROCESS_COUNT <= 0:
+        settings.WORKER_PROCESS_COUNT = process_count
+    asyncio.run(run_worker(max_jobs))
+
+def main():
+    parser = argparse.ArgumentParser(description="Run scraper worker processes")
+    parser.add_argument("--jobs", type=int, default=settings.WORKER_JOBS_PER_PROCESS, help="jobs per process")
+    parser.add_argument("--processes", type=int, default=1, help="worker processes to start")
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        run_process(args.jobs, 1)
+        return
+
+    processes = [
+        multiprocessing.Process(target=run_process, args=(args.jobs, args.processes), name=f"scraper-worker-{i}")
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    # Forward SIGTERM so every worker checkpoints its jobs before exiting
+    signal.signal(signal.SIGTERM, lambda signum, frame: [process.terminate() for process in processes])
+    # Ctrl+C reaches every process of the group; each one checkpoints and exits
+    for process in processes:
+        while True:
+            try:
+                process.join()
+                break
+            except KeyboardInterrupt:
+                continue
+
+if __name__ == "__main__":
+    main()
@@ -7,20 +7,46 @@ db = db.getSiblingDB('business_scraper');
 // Create collections with indexes for better performance
 db.createCollection('businesses');
 db.createCollection('scraping_jobs');
-db.createCollection('scraping_progress');
+db.createCollection('job_throughput');
+db.createCollection('crawl_frontier');
+db.createCollection('html_archive');
+db.createCollection('sitemap_reads');
+db.createCollection('enrichment_runs');
+db.createCollection('city_watermarks');
+db.createCollection('city_registry');
+db.createCollection('freshness_runs');
+db.createCollection('freshness_domains');
+db.createCollection('reextraction_runs');
 
 // Create indexes for better query performance
 db.businesses.createIndex({ "page_url": 1 }, { unique: true });
 db.businesses.createIndex({ "name": 1 });
 db.businesses.createIndex({ "city": 1 });
 db.businesses.createIndex({ "created_at": 1 });
+db.businesses.createIndex({ "business_key": 1 }, { unique: true, partialFilterExpression: { "business_key": { "$exists": true } } });
+db.businesses.createIndex({ "domain": 1, "completeness": 1, "enrich_after": 1 });
+db.businesses.createIndex({ "domain": 1, "revisited_at": 1, "scraped_at": 1 });
 
 db.scraping_jobs.createIndex({ "status": 1 });
 db.scraping_jobs.createIndex({ "created_at": 1 });
 db.scraping_jobs.createIndex({ "domains": 1 });
+db.scraping_jobs.createIndex({ "status": 1, "lease_expires_at": 1 });
 
-db.scraping_progress.createIndex({ "job_id": 1 });
-db.scraping_progress.createIndex({ "timestamp": 1 });
-db.scraping_progress.createIndex({ "job_id": 1, "timestamp": 1 });
+db.job_throughput.createIndex({ "job_id": 1, "minute": 1, "domain": 1 }, { unique: true });
+// Expire throughput buckets after PROGRESS_RETENTION_DAYS (30 days by default)
+db.job_throughput.createIndex({ "minute": 1 }, { expireAfterSeconds: 30 * 86400 });
+
+db.crawl_frontier.createIndex({ "job_id": 1, "url": 1 }, { unique: true });
+db.crawl_frontier.createIndex({ "job_id": 1, "domain": 1, "kind": 1, "state": 1, "city_index": 1, "page": 1 });
+db.crawl_frontier.createIndex({ "lease_token": 1 }, { sparse: true });
+db.crawl_frontier.createIndex({ "expire_at": 1 }, { expireAfterSeconds: 0 });
+
+db.html_archive.createIndex({ "url": 1, "fetched_at": -1 });
+db.html_archive.createIndex({ "host": 1, "digest": 1 });
+
+db.sitemap_reads.createIndex({ "domain": 1, "url": 1 }, { unique: true });
+db.city_watermarks.createIndex({ "domain": 1, "city": 1 }, { unique: true });
+db.city_registry.createIndex({ "domain": 1 }, { unique: true });
+db.freshness_domains.createIndex({ "domain": 1 }, { unique: true });
 
 print('✅ Business Scraper database initialized with indexes');
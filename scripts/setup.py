@@ -72,8 +72,9 @@ def create_env_file():
 MONGODB_URL=mongodb://localhost:27017
 DATABASE_NAME=business_scraper
 
-# Redis (for task queue)
+# Redis (shared crawl frontier for multi-node scraping)
 REDIS_URL=redis://localhost:6379
+FRONTIER_BACKEND=mongo
 
 # API Configuration
 API_HOST=0.0.0.0
@@ -82,7 +83,8 @@ API_RELOAD=true
 
 # Scraping Configuration
 MAX_CONCURRENT_SCRAPERS=5
-MAX_CONCURRENT_REQUESTS=10
+MAX_CONCURRENT_REQUESTS=50
+MAX_REQUESTS_PER_HOST=8
 REQUEST_DELAY=1.0
 
 # Browser Configuration
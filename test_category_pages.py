@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test category listing pagination against a local stub server: page N of a
+city-filtered category is /category/{slug}/{N}/city:{city}, as the pagination
+links of test_fixtures/yello/category_page.html show.
+"""
+import asyncio
+import os
+import sys
+
+import aiohttp
+from aiohttp import web
+from lxml import html as lxml_html
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from config import settings
+from scrapers.base_scraper import YelloScraper
+from utils.helpers import category_page_url, listing_page_url
+from test_fixtures.stub_server import check, load_fixture, report, start_stub
+
+settings.HTML_ARCHIVE_ENABLED = False
+
+async def serve_category_page():
+    """Serve the category fixture as page 2 of restaurants in Dubai; returns (runner, base_url)"""
+    async def category_page(request):
+        return web.Response(text=load_fixture('category_page.html'), content_type="text/html")
+
+    return await start_stub({"/category/restaurants/2/city:dubai": category_page})
+
+def test_page_urls():
+    print("\n🧪 Listing page URLs")
+    failures = 0
+    category = "https://www.businesslist.ae/category/restaurants/city:dubai"
+    failures += check(category_page_url(category, 1) == category, "page 1 is the category listing itself")
+    failures += check(
+        category_page_url(category, 2) == "https://www.businesslist.ae/category/restaurants/2/city:dubai",
+        "the page number goes before the city filter"
+    )
+    failures += check(listing_page_url(category, 3) == category_page_url(category, 3), "category listings page as categories")
+    failures += check(
+        listing_page_url("https://www.businesslist.ae/location/dubai", 3) == "https://www.businesslist.ae/location/dubai/3",
+        "city listings still append the page number"
+    )
+
+    # The fixture's own pagination links follow the same scheme
+    root = lxml_html.fromstring(load_fixture('category_page.html'))
+    next_link = root.cssselect('a.pages_arrow[rel="next"]')[0].get('href')
+    failures += check(next_link == category_page_url("/category/restaurants/city:dubai", 3),
+                      "the fixture's next link is page 3 by the same scheme")
+    return failures
+
+async def test_category_page_two():
+    print("\n🧪 Fetching page 2 of a category listing")
+    failures = 0
+    runner, base = await serve_category_page()
+    try:
+        async with aiohttp.ClientSession() as session:
+            scraper = YelloScraper(base, session)
+            # The stub only serves the page at its real URL
+            category = f"{base}/category/restaurants/city:dubai"
+            for fast_scan in (True, False):
+                settings.LISTING_FAST_SCAN = fast_scan
+                urls, has_next = await scraper.get_business_listings(category, 2)
+                failures += check(
+                    [url.rsplit('/', 2)[-2] for url in urls] == ["3001", "3002", "3003"] and has_next,
+                    f"page 2 lists its businesses and has a next page ({'fast scan' if fast_scan else 'DOM'})"
+                )
+
+            cards, has_next = await scraper.get_listing_cards(category, 2)
+            failures += check([card["name"] for card in cards] == ["Saffron Kitchen", "Marina Grill", "Deira Shawarma"] and has_next,
+                              "listing cards of page 2 are read")
+    finally:
+        await runner.cleanup()
+    return failures
+
+async def main():
+    failures = test_page_urls()
+    failures += await test_category_page_two()
+    return report(failures, "Category pages are fetched by their own pagination scheme")
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
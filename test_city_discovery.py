@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test city discovery against a local stub server: cities and business counts
+are read from the browse page, and a site that cannot be read falls back to
+guessed common cities, which the city registry never keeps.
+"""
+import asyncio
+import os
+import sys
+
+import aiohttp
+from aiohttp import web
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from config import settings
+from scrapers.base_scraper import YelloScraper
+from test_fixtures.stub_server import check, report, start_stub
+
+settings.HTML_ARCHIVE_ENABLED = False
+
+BROWSE_PAGE = """<html><body>
+<a href="/location/karachi">Karachi 68,340</a>
+<a href="/location/lahore">Lahore 41,002</a>
+<a href="/location/quetta">Quetta</a>
+</body></html>"""
+
+async def serve_browse_page(up: bool):
+    """Serve the browse page (or 500s when down); returns (runner, base_url)"""
+    async def browse(request):
+        if not up:
+            return web.Response(status=500)
+        return web.Response(text=BROWSE_PAGE, content_type="text/html")
+
+    async def homepage(request):
+        return web.Response(status=500)
+
+    return await start_stub({"/browse-business-cities": browse, "/": homepage})
+
+async def test_discovery():
+    failures = 0
+    async with aiohttp.ClientSession() as session:
+        print("\n🧪 Discovering cities from the browse page")
+        runner, base = await serve_browse_page(up=True)
+        try:
+            cities, discovered = await YelloScraper(base, session).discover_cities()
+            failures += check(discovered, "cities are read from the site")
+            failures += check(
+                [(city.name, city.business_count) for city in cities] == [("Karachi", 68340), ("Lahore", 41002), ("Quetta", 0)],
+                "names and business counts are parsed"
+            )
+            failures += check(cities[0].url == f"{base}/location/karachi", "city URLs are absolute")
+        finally:
+            await runner.cleanup()
+
+        print("\n🧪 Falling back when the site cannot be read")
+        runner, base = await serve_browse_page(up=False)
+        try:
+            scraper = YelloScraper(base, session)
+            cities, discovered = await scraper.discover_cities()
+            failures += check(not discovered and cities, "common cities are a guess, not a discovery")
+            failures += check([city.name for city in await scraper.get_cities()] == [city.name for city in cities],
+                              "get_cities still returns the guess")
+        finally:
+            await runner.cleanup()
+    return failures
+
+async def main():
+    failures = await test_discovery()
+    return report(failures, "City discovery works")
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test city sharding against a local stub server that serves the committed yello
+fixtures as a city's listing pages: the last page is estimated from the city's
+business count, or probed (doubling, then binary search), and a page that
+repeats page 1 (a redirect) counts as past the end.
+"""
+import asyncio
+import os
+import sys
+
+import aiohttp
+from aiohttp import web
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from config import settings
+from scrapers.base_scraper import YelloScraper
+from services.crawl_frontier import next_listing_pages
+from services.scraping_service import ScrapingService
+from test_fixtures.stub_server import check, load_fixture, report, start_stub
+
+settings.HTML_ARCHIVE_ENABLED = False
+
+async def serve_city(last_page: int, redirect_past_end: bool):
+    """Serve a city of last_page pages at /location/dubai; returns (runner, base_url, fetched pages)"""
+    fetched = []
+
+    async def listing(request):
+        page = int(request.match_info.get("page", 1))
+        fetched.append(page)
+        if page == 1:
+            name = 'listing_page.html'
+        elif page < last_page:
+            name = 'listing_cards.html'
+        elif page == last_page:
+            name = 'listing_last_page.html'
+        else:
+            # Past the end a site either lists nothing or sends page 1 again
+            name = 'listing_page.html' if redirect_past_end else 'listing_no_companies.html'
+        return web.Response(text=load_fixture(name), content_type="text/html")
+
+    runner, base = await start_stub({"/location/dubai": listing, "/location/dubai/{page}": listing})
+    return runner, base, fetched
+
+def city_unit(base: str, **extra):
+    return {"city": "Dubai", "city_url": f"{base}/location/dubai", "page": 1, **extra}
+
+async def test_estimate():
+    print("\n🧪 Estimating the last page from the business count")
+    failures = 0
+    service = ScrapingService()
+    urls = ["/company/1001/a", "/company/1002/b", "/company/1003/c"]
+    unit = city_unit("http://127.0.0.1:1", business_count=100)
+    failures += check(await service._discover_last_page(None, unit, urls) == 34, "100 businesses at 3 per page are 34 pages")
+
+    max_pages = settings.CITY_MAX_PAGES
+    settings.CITY_MAX_PAGES = 20
+    try:
+        failures += check(await service._discover_last_page(None, unit, urls) == 20, "the estimate is capped at CITY_MAX_PAGES")
+    finally:
+        settings.CITY_MAX_PAGES = max_pages
+
+    failures += check(next_listing_pages(unit, True, 34) == list(range(2, 35)), "page 1 shards the city into pages 2..34 at once")
+    shard = {**unit, "page": 10, "last_page": 34}
+    failures += check(next_listing_pages(shard, True) == [], "a shard inside the range leads nowhere")
+    tail = {**unit, "page": 34, "last_page": 34}
+    failures += check(next_listing_pages(tail, True) == [35], "the last shard continues page by page")
+    failures += check(next_listing_pages(tail, False) == [], "and stops where the site does")
+    return failures
+
+async def test_probe():
+    print("\n🧪 Probing for the last page")
+    failures = 0
+    service = ScrapingService()
+    async with aiohttp.ClientSession() as session:
+        for last_page, redirect in ((13, False), (2, False), (40, True)):
+            runner, base, fetched = await serve_city(last_page, redirect)
+            try:
+                scraper = YelloScraper(base, session)
+                urls, _ = await scraper.get_business_listings(f"{base}/location/dubai", 1)
+                found = await service._discover_last_page(scraper, city_unit(base), urls)
+                how = "redirecting to page 1" if redirect else "listing nothing"
+                failures += check(found == last_page, f"{last_page} pages, {how} past the end: found {found}")
+                failures += check(len(fetched) - 1 <= 2 * last_page.bit_length() + 1,
+                                  f"in {len(fetched) - 1} probes")
+            finally:
+                await runner.cleanup()
+    return failures
+
+async def main():
+    failures = await test_estimate()
+    failures += await test_probe()
+    return report(failures, "City sharding finds the last page")
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
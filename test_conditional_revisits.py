@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test the pieces of freshness revisits that need no database: conditional
+fetches against a local stub server, content hashes and revisit ages.
+"""
+import asyncio
+import os
+import sys
+
+import aiohttp
+from aiohttp import web
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from config import settings
+from scrapers.base_scraper import YelloScraper
+from services.freshness_service import content_hash, revisit_age
+from test_fixtures.stub_server import check, report, start_stub
+
+settings.HTML_ARCHIVE_ENABLED = False
+
+PAGE = "<html><body><h1>Al Noor Trading LLC</h1></body></html>"
+
+async def serve_pages():
+    """Serve one page with an ETag and one with Last-Modified; returns (runner, base_url)"""
+    async def with_etag(request):
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304)
+        return web.Response(text=PAGE, content_type="text/html", headers={"ETag": '"v1"'})
+
+    async def with_last_modified(request):
+        last_modified = "Wed, 01 May 2024 10:00:00 GMT"
+        if request.headers.get("If-Modified-Since") == last_modified:
+            return web.Response(status=304)
+        return web.Response(text=PAGE, content_type="text/html", headers={"Last-Modified": last_modified})
+
+    return await start_stub({"/company/1/etag": with_etag, "/company/2/last-modified": with_last_modified})
+
+def test_hashes_and_ages():
+    print("\n🧪 Content hashes and revisit ages")
+    failures = 0
+    fields = {"name": "Al Noor", "phone": "04 331 0000", "tags": ["Trading"]}
+    failures += check(content_hash(fields) == content_hash(dict(reversed(list(fields.items())))), "hash ignores field order")
+    failures += check(content_hash(fields) != content_hash({**fields, "phone": "04 999 0000"}), "a changed field changes the hash")
+    failures += check(revisit_age(1.0).days == settings.FRESHNESS_MIN_AGE_DAYS, "a domain that always changes is revisited at the minimum age")
+    failures += check(revisit_age(0.0).days == settings.FRESHNESS_MAX_AGE_DAYS, "a domain that never changes is revisited at the maximum age")
+    failures += check(revisit_age(0.5) < revisit_age(0.1), "slower-changing domains are revisited less often")
+    return failures
+
+async def test_conditional_fetches():
+    print("\n🧪 Conditional fetches against a stub server")
+    failures = 0
+    runner, base = await serve_pages()
+    try:
+        async with aiohttp.ClientSession() as session:
+            scraper = YelloScraper(base, session)
+            for path, field in (("/company/1/etag", "etag"), ("/company/2/last-modified", "last_modified")):
+                validators = {"etag": None, "last_modified": None}
+                status, body = await scraper.fetch_page(base + path, validators=validators)
+                failures += check(status == 200 and body and validators[field], f"first fetch stores the {field}")
+
+                status, body = await scraper.fetch_page(base + path, validators=validators)
+                failures += check(status == 304 and body is None, f"unchanged page is a bodiless 304 by {field}")
+
+            status, body = await scraper.fetch_page(base + "/company/1/etag")
+            failures += check(status == 200 and body, "fetches without validators are unconditional")
+    finally:
+        await runner.cleanup()
+    return failures
+
+async def main():
+    failures = test_hashes_and_ages()
+    failures += await test_conditional_fetches()
+    return report(failures, "Conditional revisits work")
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
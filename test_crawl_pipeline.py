@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Test the crawl pipeline's persistent state against MongoDB: progress
+checkpoints coalesce into one job update per flush, and frontier leases
+expire so another process takes the unit over, unless they are renewed.
+
+Needs a MongoDB at MONGODB_URI (a throwaway database is created next to the
+configured one and dropped afterwards); skipped if none is reachable.
+"""
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from bson.objectid import ObjectId
+from config import settings
+from models.database import database
+from models.schemas import CityData
+from services.crawl_frontier import CrawlFrontier
+from services.crawl_pipeline import ProgressCheckpointer, minute_bucket
+from test_fixtures.mongo_db import throwaway_database
+from test_fixtures.stub_server import check, report
+
+DOMAIN = "https://www.yello.ae"
+CITIES = [CityData(name="Dubai", url=f"{DOMAIN}/location/dubai", business_count=0, domain=DOMAIN)]
+
+async def test_checkpoint_coalescing():
+    print("\n🧪 Coalescing progress checkpoints")
+    failures = 0
+    db = database.get_database()
+    job_id = str((await db.scraping_jobs.insert_one({"businesses_scraped": 0, "pages_scraped": 0})).inserted_id)
+    checkpointer = ProgressCheckpointer(job_id)
+
+    minute = minute_bucket(datetime.utcnow())
+    for page in range(1, 11):
+        checkpointer.inc("businesses_scraped", 3)
+        checkpointer.inc("pages_scraped")
+        checkpointer.set({"current_city": "Dubai", "current_page": page + 1})
+        checkpointer.record(DOMAIN, minute, pages=1, businesses_scraped=3)
+    checkpointer.record(DOMAIN, minute + timedelta(minutes=1), pages=1)
+
+    await checkpointer.maybe_flush()
+    failures += check(checkpointer.flushes == 0, "11 pages stay buffered below PROGRESS_CHECKPOINT_PAGES")
+    await checkpointer.flush()
+    await checkpointer.flush()
+    failures += check(checkpointer.flushes == 1, "progress is written once, an empty flush writes nothing")
+
+    job = await db.scraping_jobs.find_one({"_id": ObjectId(job_id)})
+    failures += check(job["businesses_scraped"] == 30 and job["pages_scraped"] == 10, "increments add up")
+    failures += check(job["current_page"] == 11, "the latest checkpoint wins")
+    buckets = [doc async for doc in db.job_throughput.find({"job_id": job_id}).sort("minute", 1)]
+    failures += check(len(buckets) == 2, "one throughput bucket per minute")
+    failures += check(
+        any(bucket["pages"] == 10 and bucket["businesses_scraped"] == 30 for bucket in buckets),
+        "a minute's counts add up in its bucket"
+    )
+
+    checkpointer.inc("businesses_scraped", 2)
+    await checkpointer.close()
+    job = await db.scraping_jobs.find_one({"_id": ObjectId(job_id)})
+    failures += check(job["businesses_scraped"] == 32, "close writes what is left")
+    return failures
+
+async def test_lease_takeover():
+    print("\n🧪 Taking over expired frontier leases")
+    failures = 0
+    lease_seconds = settings.FRONTIER_LEASE_SECONDS
+    settings.FRONTIER_LEASE_SECONDS = 1
+    try:
+        a = CrawlFrontier("lease-test", DOMAIN)
+        b = CrawlFrontier("lease-test", DOMAIN)
+        await a.seed(CITIES)
+
+        unit = await a.claim_listing()
+        failures += check(unit is not None and await b.claim_listing() is None, "a leased unit is not claimed twice")
+
+        for _ in range(3):
+            await asyncio.sleep(0.5)
+            failures += check(await a.renew_lease(unit), "a renewed lease stays with its process")
+        failures += check(await b.claim_listing() is None, "a renewed unit is not taken over")
+
+        await asyncio.sleep(1.2)
+        stolen = await b.claim_listing()
+        failures += check(stolen is not None and stolen["_id"] == unit["_id"], "an expired lease is taken over")
+        failures += check(stolen["attempts"] == 2, "the takeover counts an attempt")
+        failures += check(not await a.renew_lease(unit), "the first process can no longer renew it")
+
+        await b.complete_listing(stolen, [f"{DOMAIN}/company/1/a", f"{DOMAIN}/company/2/b"], False)
+        details = await b.claim_details(10)
+        failures += check(len(details) == 2 and not await a.claim_details(10), "detail units are leased to one process")
+
+        # A restart releases the leases of the previous run right away
+        restarted = CrawlFrontier("lease-test", DOMAIN)
+        failures += check(await restarted.release_leases() == 2, "a restart releases its leased units")
+        failures += check(len(await restarted.claim_details(10)) == 2, "and claims them again without waiting")
+
+        await restarted.expire()
+        expiring = await restarted.collection.count_documents({"job_id": "lease-test", "expire_at": {"$ne": None}})
+        failures += check(expiring == 3, "a completed job's units get an expiry")
+    finally:
+        settings.FRONTIER_LEASE_SECONDS = lease_seconds
+    return failures
+
+async def main():
+    async with throwaway_database("crawl_pipeline_test") as db_name:
+        if db_name is None:
+            return 0
+        failures = await test_checkpoint_coalescing()
+        failures += await test_lease_takeover()
+    return report(failures, "Checkpoints coalesce and leases are taken over")
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,40 @@
+"""
+Throwaway MongoDB database for the root test scripts that need one.
+"""
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from config import settings
+from models.database import database
+
+@asynccontextmanager
+async def throwaway_database(prefix: str) -> AsyncIterator[Optional[str]]:
+    """Connect `database` to a new database next to MONGODB_URI's and drop it afterwards.
+
+    Yields the database name, or None (after printing why) when no MongoDB is
+    reachable, so the script can skip.
+    """
+    uri = settings.MONGODB_URI
+    client = AsyncIOMotorClient(uri, serverSelectionTimeoutMS=2000)
+    try:
+        await client.admin.command('ping')
+    except Exception as e:
+        print(f"⏭️  Skipping: no MongoDB at {uri} ({e})")
+        yield None
+        return
+
+    db_name = f"{prefix}_{uuid.uuid4().hex[:8]}"
+    server = uri.split('?')[0].rstrip('/')
+    if server.count('/') >= 3:
+        server = server.rsplit('/', 1)[0]
+    settings.MONGODB_URI = f"{server}/{db_name}"
+    try:
+        await database.connect_db()
+        yield db_name
+    finally:
+        await client.drop_database(db_name)
+        await database.close_db()
+        client.close()
+        settings.MONGODB_URI = uri
@@ -0,0 +1,38 @@
+"""
+Helpers shared by the root test_*.py scripts: the yello fixtures, check()
+output, a local aiohttp stub server and the failure tally main() returns.
+"""
+import os
+from typing import Awaitable, Callable, Dict, Tuple
+
+from aiohttp import web
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'yello')
+
+def load_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+def check(condition, message):
+    print(f"   {'✅' if condition else '❌'} {message}")
+    return 0 if condition else 1
+
+async def start_stub(routes: Dict[str, Callable[[web.Request], Awaitable[web.Response]]]) -> Tuple[web.AppRunner, str]:
+    """Serve GET handlers by path on a free localhost port; returns (runner, base_url)"""
+    app = web.Application()
+    for path, handler in routes.items():
+        app.router.add_get(path, handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+def report(failures: int, success: str, failed: str = "check(s) failed") -> int:
+    """Print a script's outcome; returns its exit code"""
+    if failures:
+        print(f"\n❌ {failures} {failed}")
+        return 1
+    print(f"\n🎉 {success}")
+    return 0
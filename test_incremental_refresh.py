@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test the incremental refresh cutoff on the committed yello listing fixtures:
+a refreshed city is read as a newest-first feed and left once
+INCREMENTAL_CUTOFF_PAGES pages in a row show no unseen business whose
+company id is above the city's watermark.
+"""
+import os
+import sys
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from config import settings
+from scrapers.yello_parser import parse_business_listings
+from services.crawl_frontier import next_listing_pages
+from services.scraping_service import feed_quiet_pages
+from test_fixtures.stub_server import check, load_fixture, report
+
+BASE_URL = "https://www.yello.ae"
+
+def load_listing(name: str):
+    return parse_business_listings(load_fixture(name), BASE_URL)
+
+# A city of 10 pages: the newest businesses (2001-2002) first, then older ones (1001-1003)
+NEWEST = load_listing('listing_cards.html')
+OLDER = load_listing('listing_page.html')
+LAST = load_listing('listing_last_page.html')
+CITY = [NEWEST] + [OLDER] * 8 + [(LAST[0], False)]
+
+def walk_feed(watermark: int, seen=()):
+    """Follow a refreshed city's listing the way the producer does; returns the pages fetched"""
+    unit = {"page": 1, "incremental": True}
+    fetched = []
+    while True:
+        business_urls, has_next = CITY[unit["page"] - 1]
+        fetched.append(unit["page"])
+        new_business_urls = [url for url in business_urls if url not in seen]
+        quiet_pages = feed_quiet_pages(unit, new_business_urls, watermark)
+        if has_next and quiet_pages >= settings.INCREMENTAL_CUTOFF_PAGES:
+            has_next = False
+        pages = next_listing_pages(unit, has_next)
+        if not pages:
+            return fetched
+        unit = {"page": pages[0], "incremental": True, "quiet_pages": quiet_pages}
+
+def test_quiet_pages():
+    print("\n🧪 Counting quiet pages")
+    failures = 0
+    newest_urls = NEWEST[0]
+    failures += check(feed_quiet_pages({}, newest_urls, 2001) == 0, "a business above the watermark makes the page fresh")
+    failures += check(feed_quiet_pages({"quiet_pages": 2}, newest_urls, 2002) == 3, "ids at or below the watermark are quiet")
+    failures += check(feed_quiet_pages({"quiet_pages": 2}, [], 1000) == 3, "a page of known businesses is quiet")
+    failures += check(feed_quiet_pages({"quiet_pages": 2}, [f"{BASE_URL}/location/dubai"], 5000) == 0,
+                      "a URL without a company id is never taken as old")
+    return failures
+
+def test_cutoff():
+    print("\n🧪 Cutting a refreshed city's listing off")
+    failures = 0
+    cutoff = settings.INCREMENTAL_CUTOFF_PAGES
+    failures += check(walk_feed(2000) == list(range(1, cutoff + 2)),
+                      f"new businesses on page 1, then {cutoff} quiet pages")
+    failures += check(walk_feed(2002) == list(range(1, cutoff + 1)), "nothing above the watermark: stops after the cutoff")
+    failures += check(walk_feed(2000, seen=set(NEWEST[0])) == list(range(1, cutoff + 1)),
+                      "new ids that are already saved do not keep the feed going")
+    failures += check(walk_feed(1000) == list(range(1, len(CITY) + 1)), "a city newer than all its pages is read to the end")
+    return failures
+
+def main():
+    failures = test_quiet_pages()
+    failures += test_cutoff()
+    return report(failures, "Incremental refreshes stop at the watermark")
+
+if __name__ == "__main__":
+    sys.exit(main())
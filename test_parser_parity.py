@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Parity test for the lxml fast-path parser against the BeautifulSoup parser.
+
+Parses every page in test_fixtures/yello with both backends, checks the
+extracted data is identical and prints pages/sec for each backend. Parity is
+checked again once extraction plans put a fallback selector first.
+"""
+import os
+import sys
+import time
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from config import settings
+from scrapers import lxml_parser
+from scrapers.listing_scanner import scan_listing_page
+from scrapers.yello_parser import (
+    parse_business_listings,
+    parse_business_details,
+    parse_listing_cards,
+    parse_business_listings_bs4,
+    parse_business_details_bs4,
+    parse_listing_cards_bs4,
+)
+from test_fixtures.stub_server import FIXTURES_DIR, report
+
+BASE_URL = "https://www.yello.ae"
+DOMAIN = "https://www.yello.ae"
+BENCHMARK_ROUNDS = 50
+
+def load_fixtures(prefix):
+    pages = {}
+    for name in sorted(os.listdir(FIXTURES_DIR)):
+        if name.startswith(prefix) and name.endswith('.html'):
+            with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+                pages[name] = f.read()
+    return pages
+
+def business_dict(business):
+    # scraped_at is a creation timestamp, not extracted data
+    return business.model_dump(exclude={'scraped_at'})
+
+def check_parity(backend):
+    """Compare a backend against BeautifulSoup on every fixture"""
+    settings.PARSER_BACKEND = backend
+    failures = 0
+
+    for name, html in load_fixtures('listing_').items():
+        expected = parse_business_listings_bs4(html, BASE_URL)
+        actual = parse_business_listings(html, BASE_URL)
+        scanned = scan_listing_page(html.encode('utf-8'), BASE_URL) or ([], False)
+        if actual != expected:
+            failures += 1
+            print(f"❌ {name}: {actual} != {expected}")
+        elif scanned != expected:
+            failures += 1
+            print(f"❌ {name} (byte scan): {scanned} != {expected}")
+        else:
+            print(f"✅ {name}: {len(actual[0])} URLs, has_next={actual[1]}")
+
+        expected_cards = parse_listing_cards_bs4(html, BASE_URL)
+        actual_cards = parse_listing_cards(html, BASE_URL)
+        if actual_cards != expected_cards:
+            failures += 1
+            print(f"❌ {name} (cards): {actual_cards} != {expected_cards}")
+        elif not {card["page_url"] for card in actual_cards[0]}.issuperset(expected[0]):
+            failures += 1
+            print(f"❌ {name} (cards): listing URLs missing from the cards")
+        else:
+            print(f"✅ {name}: {len(actual_cards[0])} cards")
+
+    for name, html in load_fixtures('detail_').items():
+        url = f"{BASE_URL}/company/1/{name}"
+        expected = business_dict(parse_business_details_bs4(html, url, DOMAIN))
+        actual = business_dict(parse_business_details(html, url, DOMAIN))
+        fast_path = lxml_parser.parse_business_details(html, url, DOMAIN) is not None
+        if actual != expected:
+            failures += 1
+            diff = {k: (actual[k], expected[k]) for k in expected if actual[k] != expected[k]}
+            print(f"❌ {name}: {diff}")
+        else:
+            print(f"✅ {name}: {'lxml' if fast_path else 'BeautifulSoup fallback'}")
+
+    return failures
+
+def parse_fixture(name, html):
+    """Parse a fixture the way the crawl does (listing URLs and cards, or details)"""
+    if name.startswith('listing_'):
+        parse_business_listings(html, BASE_URL)
+        parse_listing_cards(html, BASE_URL)
+    else:
+        parse_business_details(html, f"{BASE_URL}/company/1/{name}", DOMAIN)
+
+def check_parity_after_reorder():
+    """Learn plans on pages a fallback selector wins, then compare every fixture.
+
+    Once a plan's winner is not its first declared selector, pages are parsed
+    winner-first; with a short EXTRACTION_PLAN_REVALIDATE every other page
+    runs the declared chain again, so both orders (and relearning) are covered.
+    """
+    settings.PARSER_BACKEND = "lxml"
+    revalidate = settings.EXTRACTION_PLAN_REVALIDATE
+    host = BASE_URL.split('//', 1)[1]
+    failures = 0
+    reordered_pages = 0
+
+    try:
+        pages = {**load_fixtures('listing_'), **load_fixtures('detail_')}
+        for trained_on, html in pages.items():
+            lxml_parser.extraction_plans.plans.clear()
+            for _ in range(settings.EXTRACTION_PLAN_WARMUP):
+                parse_fixture(trained_on, html)
+
+            plans = lxml_parser.extraction_plans.plans.get(host, {})
+            reordered = {field: plan.winner for field, plan in plans.items()
+                         if plan.winner is not None and plan.winner != plan.candidates[0]}
+            if not reordered:
+                continue
+            reordered_pages += 1
+
+            for every in (10 ** 6, 2):
+                settings.EXTRACTION_PLAN_REVALIDATE = every
+                print(f"\n   Plans learned on {trained_on} ({reordered}), revalidating every {every} pages")
+                failures += check_parity("lxml")
+    finally:
+        settings.EXTRACTION_PLAN_REVALIDATE = revalidate
+        lxml_parser.extraction_plans.plans.clear()
+
+    if not reordered_pages:
+        failures += 1
+        print("❌ no fixture puts a fallback selector first")
+    return failures
+
+def benchmark(backend):
+    """Pages per second over the whole fixture corpus"""
+    settings.PARSER_BACKEND = backend
+    listings = load_fixtures('listing_')
+    details = load_fixtures('detail_')
+
+    start = time.perf_counter()
+    for _ in range(BENCHMARK_ROUNDS):
+        for html in listings.values():
+            parse_business_listings(html, BASE_URL)
+        for name, html in details.items():
+            parse_business_details(html, f"{BASE_URL}/company/1/{name}", DOMAIN)
+    elapsed = time.perf_counter() - start
+
+    pages = BENCHMARK_ROUNDS * (len(listings) + len(details))
+    return pages / elapsed
+
+def benchmark_listing_scan():
+    """Listing pages per second for the DOM-free byte scanner"""
+    listings = [html.encode('utf-8') for html in load_fixtures('listing_').values()]
+
+    start = time.perf_counter()
+    for _ in range(BENCHMARK_ROUNDS):
+        for body in listings:
+            scan_listing_page(body, BASE_URL)
+    elapsed = time.perf_counter() - start
+
+    return BENCHMARK_ROUNDS * len(listings) / elapsed
+
+def main():
+    if not lxml_parser.AVAILABLE:
+        print("❌ lxml/cssselect are not installed")
+        return 1
+
+    print("🧪 Checking lxml parser parity with BeautifulSoup")
+    failures = check_parity("lxml")
+
+    print("\n⏱️  Parsing throughput")
+    bs4_rate = benchmark("bs4")
+    lxml_rate = benchmark("lxml")
+    print(f"   BeautifulSoup: {bs4_rate:.1f} pages/sec")
+    print(f"   lxml:          {lxml_rate:.1f} pages/sec ({lxml_rate / bs4_rate:.1f}x)")
+    print(f"   Listing byte scan: {benchmark_listing_scan():.1f} listing pages/sec")
+
+    print("\n🧪 Checking parity again with learned extraction plans")
+    failures += check_parity("lxml")
+    for domain, fields in lxml_parser.extraction_plans.get_stats().items():
+        for field, stats in fields.items():
+            print(f"   {domain} {field}: winner={stats['winner']!r} hits={stats['hits']}")
+
+    print("\n🧪 Checking parity with plans reordered to a fallback selector")
+    failures += check_parity_after_reorder()
+
+    return report(failures, "lxml output is identical to BeautifulSoup", "fixture(s) differ")
+
+if __name__ == "__main__":
+    sys.exit(main())
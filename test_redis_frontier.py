@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test the distributed crawl frontier and cluster-wide rate tokens against Redis.
+
+Needs a Redis server at REDIS_URL (e.g. `redis-server` locally); the test is
+skipped if none is reachable. Two RedisFrontier instances with different
+consumer names stand in for two scraper nodes working on one job.
+"""
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from config import settings
+from models.schemas import CityData
+from utils import redis_client
+from services.redis_frontier import RedisFrontier, get_redis_frontier_stats
+from scrapers.redis_rate_limiter import redis_rate_limiter
+from test_fixtures.stub_server import check, report
+
+DOMAIN = "https://www.yello.ae"
+
+CITIES = [
+    CityData(name="Dubai", url=f"{DOMAIN}/location/dubai", business_count=0, domain=DOMAIN),
+    CityData(name="Abu Dhabi", url=f"{DOMAIN}/location/abu-dhabi", business_count=0, domain=DOMAIN),
+]
+
+def node(job_id, name):
+    frontier = RedisFrontier(job_id, DOMAIN)
+    frontier.consumer = name
+    return frontier
+
+async def test_frontier(job_id):
+    failures = 0
+    a = node(job_id, "node-a-100")
+    b = node(job_id, "node-b-200")
+
+    print("\n🧪 Seeding and sharing listing units")
+    failures += check(not await a.has_units(), "new job has no units")
+    await a.seed(CITIES)
+    await b.seed(CITIES)  # a second seed adds nothing
+    failures += check(await b.has_units(), "seeded frontier is visible to the other node")
+
+    first = await a.claim_listing()
+    second = await b.claim_listing()
+    failures += check(
+        {first["city"], second["city"]} == {"Dubai", "Abu Dhabi"},
+        "each node leases a different city"
+    )
+    failures += check(await a.claim_listing() is None, "no listing left to claim")
+    failures += check(await a.listings_in_flight() == 2, "both listings are in flight")
+
+    print("\n🧪 Completing listings atomically")
+    urls = [f"{DOMAIN}/company/{i}" for i in range(5)]
+    added = await a.complete_listing(first, urls, has_next=True)
+    failures += check(added == 5, "detail units added for the listing page")
+    added = await b.complete_listing(second, urls[:2] + [f"{DOMAIN}/company/9"], has_next=False)
+    failures += check(added == 1, "URLs already in the frontier are not added twice")
+    failures += check(await a.remaining_details() == 6, "six detail units queued")
+    next_page = await b.claim_listing()
+    failures += check(next_page["page"] == 2 and next_page["city"] == first["city"], "next page is claimable by any node")
+    failures += check(await b.renew_lease(next_page), "the node holding a unit renews its lease")
+    failures += check(not await a.renew_lease(next_page), "another node cannot renew it")
+    await b.complete_listing(next_page, [], has_next=False)
+
+    uncounted = await a.uncounted_cities()
+    failures += check(len(uncounted) == 2, "finished cities wait to be counted")
+    failures += check(await a.mark_city_completed(uncounted[0]["city_index"], uncounted[0]["city"]), "first node counts a city")
+    failures += check(not await b.mark_city_completed(uncounted[0]["city_index"], uncounted[0]["city"]), "second node does not count it again")
+
+    print("\n🧪 Detail leases, retries and takeover")
+    batch_a = await a.claim_details(3)
+    batch_b = await b.claim_details(10)
+    failures += check(len(batch_a) == 3 and len(batch_b) == 3, "detail units are split between nodes")
+    await a.complete_details([unit["_id"] for unit in batch_a])
+    failures += check(not await b.fail_detail(batch_b[0]), "a failed unit goes back for retry")
+    failures += check(await a.remaining_details() == 3, "completed units are retired")
+
+    # Node b restarts the job while holding two units; the new run takes them over
+    restarted = node(job_id, "node-b-200")
+    released = await restarted.release_leases()
+    failures += check(released == 2, "units of the earlier run are taken over")
+    retried = await restarted.claim_details(10)
+    failures += check(len(retried) == 3, "taken over units and the retry are claimed")
+    retry = next(unit for unit in retried if unit["url"] == batch_b[0]["url"])
+    failures += check(retry["attempts"] == 2, "the retry counts its attempts")
+    await restarted.complete_details([unit["_id"] for unit in retried])
+    failures += check(await a.remaining_details() == 0, "frontier is drained")
+
+    stats = await get_redis_frontier_stats(job_id, [DOMAIN])
+    failures += check(stats["detail"]["leased"] == 0, f"no leases left ({stats})")
+    return failures
+
+async def test_rate_limiter():
+    print("\n🧪 Cluster-wide rate tokens")
+    host = f"test-{uuid.uuid4().hex}.example"
+    rate = 5.0
+    start = time.monotonic()
+    # Concurrent callers (on any node) draw from the same bucket
+    await asyncio.gather(*[redis_rate_limiter.acquire(host, rate) for _ in range(7)])
+    elapsed = time.monotonic() - start
+    expected = (7 - settings.RATE_BURST) / rate
+    failures = check(elapsed >= expected * 0.9, f"7 requests at {rate}/s took {elapsed:.2f}s (>= {expected:.2f}s)")
+    await redis_client.get_redis().delete(f"rate:{host}")
+    return failures
+
+async def main():
+    try:
+        redis = redis_client.get_redis()
+        await redis.ping()
+    except Exception as e:
+        print(f"⏭️  Skipping: no Redis at {settings.REDIS_URL} ({e})")
+        return 0
+
+    job_id = f"test-{uuid.uuid4().hex}"
+    try:
+        failures = await test_frontier(job_id)
+        failures += await test_rate_limiter()
+    finally:
+        keys = [key async for key in redis.scan_iter(match=f"frontier:{{{job_id}:*")]
+        if keys:
+            await redis.delete(*keys)
+        await redis_client.close_redis()
+
+    return report(failures, "Redis frontier works across nodes")
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
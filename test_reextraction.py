@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Test offline re-extraction records: archived detail pages are parsed into
+extracted fields only, so applying them never touches lifecycle fields such
+as scraped_at or the export markers, while a business saved from a listing
+card is completed by a full re-extraction.
+"""
+import os
+import sys
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from models.schemas import Completeness
+from services.reextraction_service import NON_EXTRACTED_FIELDS, reextract_pages, reextraction_changes
+from test_fixtures.stub_server import check, load_fixture, report
+
+DOMAIN = "https://www.yello.ae"
+URL = "https://www.yello.ae/company/12345/al-noor-trading"
+
+def main():
+    html = load_fixture('detail_full.html')
+
+    print("\n🧪 Re-extracting an archived detail page")
+    failures = 0
+    records = reextract_pages([(URL, html)], DOMAIN)
+    failures += check(len(records) == 1 and records[0]["name"], "page is re-extracted")
+    record = records[0]
+    failures += check(not NON_EXTRACTED_FIELDS & record.keys(), "lifecycle fields are left out")
+
+    failures += check(not reextraction_changes({**record, "completeness": Completeness.DETAIL}, record),
+                      "a stored detail business is unchanged")
+    failures += check(not reextraction_changes(record, record), "a business saved before crawl depths is unchanged")
+    changed = reextraction_changes({**record, "completeness": Completeness.LISTING}, record)
+    failures += check(changed == {"completeness": Completeness.DETAIL}, "a stored listing business becomes a detail one")
+    changed = reextraction_changes({**record, "completeness": Completeness.LISTING, "phone": None}, record, ["phone"])
+    failures += check(changed == {"phone": record["phone"]}, "a run limited to some fields keeps completeness")
+
+    return report(failures, "Re-extraction keeps lifecycle fields and completes listing businesses")
+
+if __name__ == "__main__":
+    sys.exit(main())
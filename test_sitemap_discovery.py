@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test sitemap URL discovery against a local stub server serving sitemap fixtures.
+
+The stub serves robots.txt, a sitemap index and a gzipped company sitemap the
+way Yello sites do; a second stub has no sitemap, so the crawl falls back to
+listing pages.
+"""
+import asyncio
+import gzip
+import os
+import sys
+from datetime import datetime
+
+import aiohttp
+from aiohttp import web
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from scrapers.base_scraper import YelloScraper
+from scrapers.sitemap import parse_lastmod, parse_sitemap, is_company_url
+from test_fixtures.stub_server import check, report, start_stub
+
+SITEMAP_INDEX = """<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>{base}/sitemap-companies-1.xml.gz</loc><lastmod>2024-05-01T10:00:00+04:00</lastmod></sitemap>
+  <sitemap><loc>{base}/sitemap-companies-2.xml</loc></sitemap>
+  <sitemap><loc>{base}/sitemap-categories.xml</loc><lastmod>2024-01-01</lastmod></sitemap>
+</sitemapindex>
+"""
+
+COMPANY_URLSET = """<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+{urls}
+</urlset>
+"""
+
+def urlset(base, ids, lastmod=None):
+    urls = "\n".join(
+        f"  <url><loc>{base}/company/{i}/business-{i}</loc>"
+        + (f"<lastmod>{lastmod}</lastmod>" if lastmod else "")
+        + "</url>"
+        for i in ids
+    )
+    return COMPANY_URLSET.format(urls=urls)
+
+async def serve_sitemaps(with_sitemaps: bool):
+    """Serve sitemap fixtures on a free localhost port; returns (runner, base_url)"""
+    state = {}
+
+    async def robots(request):
+        lines = ["User-agent: *", "Disallow: /search"]
+        if with_sitemaps:
+            lines.append(f"Sitemap: {state['base']}/sitemap.xml")
+        return web.Response(text="\n".join(lines))
+
+    async def sitemap(request):
+        if not with_sitemaps:
+            return web.Response(status=404)
+        return web.Response(text=SITEMAP_INDEX.format(base=state["base"]), content_type="application/xml")
+
+    async def companies_gz(request):
+        body = gzip.compress(urlset(state["base"], range(1, 4), "2024-05-01").encode())
+        return web.Response(body=body, content_type="application/x-gzip")
+
+    async def companies(request):
+        return web.Response(text=urlset(state["base"], range(4, 6)), content_type="application/xml")
+
+    runner, state["base"] = await start_stub({
+        "/robots.txt": robots,
+        "/sitemap.xml": sitemap,
+        "/sitemap-companies-1.xml.gz": companies_gz,
+        "/sitemap-companies-2.xml": companies,
+    })
+    return runner, state["base"]
+
+def test_parsing():
+    print("\n🧪 Parsing sitemaps")
+    failures = 0
+    base = "https://www.yello.ae"
+    children, urls = parse_sitemap(SITEMAP_INDEX.format(base=base).encode())
+    failures += check(len(children) == 3 and not urls, "sitemap index lists its child sitemaps")
+    failures += check(children[0][1] == datetime(2024, 5, 1, 6, 0), "lastmod is converted to UTC")
+    failures += check(children[1][1] is None, "a missing lastmod is None")
+
+    children, urls = parse_sitemap(gzip.compress(urlset(base, range(3)).encode()))
+    failures += check(not children and len(urls) == 3, "gzipped urlset is read")
+    failures += check(all(is_company_url(loc) for loc, _ in urls), "company URLs are recognized")
+
+    children, urls = parse_sitemap(urlset(base, range(3)).encode()[:-40])
+    failures += check(len(urls) == 2, "a truncated sitemap keeps the URLs read so far")
+    failures += check(parse_lastmod("not a date") is None, "an invalid lastmod is ignored")
+    return failures
+
+async def test_stub_server():
+    failures = 0
+    async with aiohttp.ClientSession() as session:
+        print("\n🧪 Reading sitemaps from a stub Yello site")
+        runner, base = await serve_sitemaps(with_sitemaps=True)
+        try:
+            scraper = YelloScraper(base, session)
+            sitemaps = await scraper.get_sitemaps()
+            failures += check(sitemaps == [f"{base}/sitemap.xml"], "sitemap found through robots.txt")
+
+            children, urls = await scraper.read_sitemap(sitemaps[0])
+            failures += check(len(children) == 3 and not urls, "sitemap index read")
+
+            _, urls = await scraper.read_sitemap(children[0][0])
+            failures += check(
+                [loc for loc, _ in urls] == [f"{base}/company/{i}/business-{i}" for i in range(1, 4)],
+                "gzipped company sitemap read"
+            )
+            failures += check(urls[0][1] == datetime(2024, 5, 1), "company lastmod read")
+
+            _, urls = await scraper.read_sitemap(children[1][0])
+            failures += check(len(urls) == 2, "plain company sitemap read")
+
+            children, urls = await scraper.read_sitemap(f"{base}/missing.xml")
+            failures += check(not children and not urls, "a missing sitemap reads as empty")
+        finally:
+            await runner.cleanup()
+
+        print("\n🧪 Falling back when a site has no sitemap")
+        runner, base = await serve_sitemaps(with_sitemaps=False)
+        try:
+            scraper = YelloScraper(base, session)
+            failures += check(await scraper.get_sitemaps() == [], "no sitemaps, listing pages are used")
+        finally:
+            await runner.cleanup()
+    return failures
+
+async def main():
+    failures = test_parsing()
+    failures += await test_stub_server()
+    return report(failures, "Sitemap discovery works")
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test that businesses the bulk writer fails to save are not lost: their detail
+units go back to the frontier instead of being marked done, a lost listing-card
+business is queued for a detail scrape, and the page is not checkpointed.
+
+Needs a MongoDB at MONGODB_URI (a throwaway database is created next to the
+configured one and dropped afterwards); skipped if none is reachable. A
+collection validator on the test database forces the write errors.
+"""
+import asyncio
+import os
+import sys
+import uuid
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from models.database import database
+from models.schemas import BusinessData, Completeness
+from services.business_writer import BusinessWriter
+from services.crawl_frontier import CrawlFrontier, DONE, LISTING, PENDING
+from services.crawl_pipeline import PageProgressTracker
+from services.scraping_service import scraping_service
+from test_fixtures.mongo_db import throwaway_database
+from test_fixtures.stub_server import check, report
+
+DOMAIN = "https://www.yello.ae"
+LISTING_URL = f"{DOMAIN}/location/dubai/2"
+REJECTED = "Unsaveable Trading"
+
+def business(company_id: int, name: str, completeness: str = Completeness.DETAIL) -> BusinessData:
+    return BusinessData(
+        title=name,
+        name=name,
+        country="UAE",
+        city="Dubai",
+        category="Trading",
+        page_url=f"{DOMAIN}/company/{company_id}/{name.replace(' ', '_')}",
+        domain=DOMAIN,
+        completeness=completeness
+    )
+
+async def test_failed_writes():
+    print("\n🧪 Settling a flush with failed writes")
+    failures = 0
+    db = database.get_database()
+    # Documents named REJECTED fail validation: a per-document write error
+    await db.command("collMod", "businesses", validator={"name": {"$ne": REJECTED}})
+
+    frontier = CrawlFrontier(f"test-{uuid.uuid4().hex}", DOMAIN)
+    listing = {
+        "_id": "listing", "kind": LISTING, "url": LISTING_URL,
+        "city_index": 0, "city": "Dubai", "page": 2,
+    }
+    saved, lost, card = business(3001, "Saved Trading"), business(3002, REJECTED), business(3003, REJECTED, Completeness.LISTING)
+    await frontier.add_details(listing, [saved.page_url, lost.page_url])
+    units = {unit["url"]: unit for unit in await frontier.claim_details(10)}
+
+    tracker = PageProgressTracker()
+    tracker.register_page(LISTING_URL, 0, "Dubai", 2, 3, 3, True)
+    outcomes = []
+
+    async def on_flush(results):
+        outcomes.extend(outcome for _, outcome in results)
+        await scraping_service._settle_writes(frontier, tracker, results)
+
+    writer = BusinessWriter(on_flush=on_flush)
+    for data in (saved, lost):
+        unit = units[data.page_url]
+        await writer.add(data, context=(LISTING_URL, unit, True, unit["url"]))
+    await writer.add(card, context=(LISTING_URL, listing, True, card.page_url))
+    await writer.flush()
+
+    failures += check(outcomes == ["inserted", "failed", "failed"], f"outcomes are inserted, failed, failed ({outcomes})")
+    failures += check(writer.stats["failed"] == 2 and writer.stats["inserted"] == 1, "the writer counts both failures")
+
+    states = {doc["url"]: doc["state"] async for doc in frontier.collection.find({"job_id": frontier.job_id})}
+    failures += check(states.get(saved.page_url) == DONE, "the saved business's unit is done")
+    failures += check(states.get(lost.page_url) == PENDING, "the failed business's unit is back to pending, not done")
+    failures += check(states.get(card.page_url) == PENDING, "the lost listing-card business is queued for a detail scrape")
+
+    failures += check(tracker.pages[LISTING_URL]["pending"] == 2, "only the saved business completes its page item")
+    failures += check(tracker.pop_completed() == [], "the page is not checkpointed")
+
+    # A replayed save of the same business is already in the database
+    outcomes.clear()
+    retry = (await frontier.claim_details(10))[0]
+    await writer.add(saved, context=(LISTING_URL, retry, True, retry["url"]))
+    await writer.flush()
+    failures += check(outcomes == ["existing"], f"a business saved before comes back as existing ({outcomes})")
+    return failures
+
+async def main():
+    async with throwaway_database("write_failures_test") as db_name:
+        if db_name is None:
+            return 0
+        failures = await test_failed_writes()
+    return report(failures, "Failed writes are retried, not lost")
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))